@@ -73,6 +73,9 @@ export default function CollectionPage() {
         // Load author information for each postcard
         const postcardsWithAuthors = await Promise.allSettled(
           response.data.map(async (postcard) => {
+            if (!postcard.author_id) {
+              return { ...postcard, author: undefined } as PostcardWithAuthor;
+            }
             try {
               const authorResponse = await getUserProfileApiUsersUserIdGet({
                 path: { user_id: postcard.author_id },
@@ -175,7 +178,7 @@ export default function CollectionPage() {
                 <Card shadow="sm" padding="md" radius="md" withBorder h="100%">
                   <Card.Section>
                     <Image
-                      src={postcard.image_url}
+                      src={postcard.image_url ?? undefined}
                       height={180}
                       alt="絵葉書"
                       fallbackSrc="https://via.placeholder.com/300x200?text=No+Image"
@@ -196,9 +199,10 @@ export default function CollectionPage() {
                       <Group gap="xs">
                         <Calendar size={12} color="#868e96" />
                         <Text size="xs" c="dimmed">
-                          {new Date(postcard.created_at).toLocaleDateString(
-                            "ja-JP",
-                          )}
+                          {postcard.created_at &&
+                            new Date(postcard.created_at).toLocaleDateString(
+                              "ja-JP",
+                            )}
                         </Text>
                       </Group>
 
@@ -254,7 +254,7 @@ export default function PostcardMap({
             x: pos.x,
             y: pos.y,
             isOwn: true,
-            imageUrl: postcard.image_url,
+            imageUrl: postcard.image_url ?? "",
           });
         } else {
           console.warn(
@@ -20,6 +20,9 @@ import type {
   CreatePostcardApiPostcardsPostData,
   CreatePostcardApiPostcardsPostResponses,
   CreatePostcardApiPostcardsPostErrors,
+  GetPostcardsBatchApiPostcardsBatchPostData,
+  GetPostcardsBatchApiPostcardsBatchPostResponses,
+  GetPostcardsBatchApiPostcardsBatchPostErrors,
   DeletePostcardApiPostcardsPostcardIdDeleteData,
   DeletePostcardApiPostcardsPostcardIdDeleteResponses,
   DeletePostcardApiPostcardsPostcardIdDeleteErrors,
@@ -35,6 +38,15 @@ import type {
   GetNearbyPostcardsApiPostcardsNearbyGetData,
   GetNearbyPostcardsApiPostcardsNearbyGetResponses,
   GetNearbyPostcardsApiPostcardsNearbyGetErrors,
+  StreamNearbyPostcardsApiPostcardsNearbyStreamGetData,
+  StreamNearbyPostcardsApiPostcardsNearbyStreamGetResponses,
+  StreamNearbyPostcardsApiPostcardsNearbyStreamGetErrors,
+  GetPostcardsInBoundsApiPostcardsInBoundsGetData,
+  GetPostcardsInBoundsApiPostcardsInBoundsGetResponses,
+  GetPostcardsInBoundsApiPostcardsInBoundsGetErrors,
+  GetPostcardTileApiPostcardsTilesZXYGetData,
+  GetPostcardTileApiPostcardsTilesZXYGetResponses,
+  GetPostcardTileApiPostcardsTilesZXYGetErrors,
   CollectPostcardApiPostcardsPostcardIdCollectPostData,
   CollectPostcardApiPostcardsPostcardIdCollectPostResponses,
   CollectPostcardApiPostcardsPostcardIdCollectPostErrors,
@@ -125,7 +137,7 @@ export const deleteMyProfileApiUsersMeDelete = <
 
 /**
  * 自身のユーザー情報取得
- * 認証済みユーザー自身の情報を取得します。
+ * 認証済みユーザー自身の情報を取得します。レスポンスには `ETag` が付き、内容が変わっていなければ `If-None-Match` に対して 304 を返します。
  */
 export const getMyProfileApiUsersMeGet = <ThrowOnError extends boolean = false>(
   options?: Options<GetMyProfileApiUsersMeGetData, ThrowOnError>,
@@ -177,7 +189,7 @@ export const updateMyProfileApiUsersMePut = <
 
 /**
  * 他のユーザー情報取得
- * 指定した user_id のユーザー情報を取得します。他のユーザーのプロフィール閲覧に利用します。
+ * 指定した user_id のユーザー情報を取得します。他のユーザーのプロフィール閲覧に利用します。レスポンスには `ETag` が付き、内容が変わっていなければ `If-None-Match` に対して 304 を返します。
  */
 export const getUserProfileApiUsersUserIdGet = <
   ThrowOnError extends boolean = false,
@@ -229,6 +241,35 @@ export const createPostcardApiPostcardsPost = <
   });
 };
 
+/**
+ * 絵葉書の一括取得
+ * 指定した複数の絵葉書（最大100件）の詳細情報をまとめて取得します。地図やコレクション画面で多数の絵葉書を表示する際に利用します。旅の軌跡は `include_path` を指定した場合のみ含まれます。見つからなかった絵葉書IDは `missing` に、混雑により取得できなかった絵葉書IDは `unprocessed` に含まれます（`unprocessed` は時間をおいて再度取得してください）。
+ */
+export const getPostcardsBatchApiPostcardsBatchPost = <
+  ThrowOnError extends boolean = false,
+>(
+  options: Options<GetPostcardsBatchApiPostcardsBatchPostData, ThrowOnError>,
+) => {
+  return (options.client ?? client).post<
+    GetPostcardsBatchApiPostcardsBatchPostResponses,
+    GetPostcardsBatchApiPostcardsBatchPostErrors,
+    ThrowOnError
+  >({
+    security: [
+      {
+        scheme: "bearer",
+        type: "http",
+      },
+    ],
+    url: "/api/postcards/batch",
+    ...options,
+    headers: {
+      "Content-Type": "application/json",
+      ...options.headers,
+    },
+  });
+};
+
 /**
  * 絵葉書削除
  * ユーザーが作成した絵葉書を削除します。
@@ -259,7 +300,7 @@ export const deletePostcardApiPostcardsPostcardIdDelete = <
 
 /**
  * 絵葉書詳細取得
- * 指定した絵葉書の詳細情報を取得します。コレクションから詳細画面を表示する際に利用します。
+ * 指定した絵葉書の詳細情報を取得します。コレクションから詳細画面を表示する際に利用します。レスポンスには `ETag` が付き、内容が変わっていなければ `If-None-Match` に対して 304 を返します。
  */
 export const getPostcardDetailApiPostcardsPostcardIdGet = <
   ThrowOnError extends boolean = false,
@@ -316,7 +357,7 @@ export const updatePostcardApiPostcardsPostcardIdPut = <
 
 /**
  * 絵葉書の旅の軌跡取得
- * 指定した絵葉書がこれまでに辿った旅の軌跡（経由地）を取得します。
+ * 指定した絵葉書がこれまでに辿った旅の軌跡（経由地）を到着時刻の古い順に取得します。`since` を指定するとその時刻より後に到着した経由地のみを返すため、差分だけを取得できます。`next_cursor` が返された場合は `cursor` に指定して続きを取得します。`tolerance` を指定すると、その誤差（メートル）以内で経由地を間引いて返します。`fields`（例: `lat,lon`）を指定すると、経由地の指定した項目のみを返します。`Accept: application/vnd.postcard.compact+json`（または `application/msgpack`）を指定すると、経由地を項目ごとの配列で返し、座標は 1e-5 度単位の整数、到着時刻はマイクロ秒の整数で、それぞれ直前の値との差分になります。レスポンスには `ETag` が付き、軌跡が変わっていなければ `If-None-Match` に対して 304 を返します。
  */
 export const getPostcardPathApiPostcardsPostcardIdPathGet = <
   ThrowOnError extends boolean = false,
@@ -344,7 +385,7 @@ export const getPostcardPathApiPostcardsPostcardIdPathGet = <
 
 /**
  * 近くの絵葉書取得
- * クライアントの現在地付近を通過中の、リレー中の絵葉書を取得します。このAPIは、クライアント側で定期的に呼び出されることを想定しています。
+ * クライアントの現在地付近を通過中の、リレー中の絵葉書を取得します。このAPIは、クライアント側で定期的に呼び出されることを想定しています。`Accept: application/vnd.postcard.compact+json`（または `application/msgpack`）を指定すると、項目ごとの配列で返し、座標は 1e-5 度単位の整数で直前の値との差分になります。
  */
 export const getNearbyPostcardsApiPostcardsNearbyGet = <
   ThrowOnError extends boolean = false,
@@ -367,6 +408,87 @@ export const getNearbyPostcardsApiPostcardsNearbyGet = <
   });
 };
 
+/**
+ * 近くの絵葉書の変化を購読
+ * クライアントの現在地付近の絵葉書の変化を Server-Sent Events で受け取ります。接続直後に範囲内の全件を `snapshot` イベントで送り、以降は位置が更新されるたびに差分のみを `entered`（範囲内に入った）、`moved`（範囲内で移動した）、`left`（範囲外に出た）、`collected`（拾われた）イベントで送ります。受信が遅れた場合は差分の代わりに `snapshot` が送られます。現在地が変わった場合は接続し直してください。接続の開始までに同時接続数が上限に達した場合は `error` イベントを送って切断します。
+ */
+export const streamNearbyPostcardsApiPostcardsNearbyStreamGet = <
+  ThrowOnError extends boolean = false,
+>(
+  options: Options<
+    StreamNearbyPostcardsApiPostcardsNearbyStreamGetData,
+    ThrowOnError
+  >,
+) => {
+  return (options.client ?? client).get<
+    StreamNearbyPostcardsApiPostcardsNearbyStreamGetResponses,
+    StreamNearbyPostcardsApiPostcardsNearbyStreamGetErrors,
+    ThrowOnError
+  >({
+    security: [
+      {
+        scheme: "bearer",
+        type: "http",
+      },
+    ],
+    url: "/api/postcards/nearby/stream",
+    ...options,
+  });
+};
+
+/**
+ * 表示範囲内の絵葉書取得
+ * 地図の表示範囲（緯度経度の矩形）内にある、リレー中の絵葉書を取得します。範囲内の件数が多い場合は、ズームレベルに応じたグリッドでまとめ、件数と重心を `clusters` として返します。まとめられなかった絵葉書は `postcards` に個別に含まれます。`total` は範囲内の全件数です。
+ */
+export const getPostcardsInBoundsApiPostcardsInBoundsGet = <
+  ThrowOnError extends boolean = false,
+>(
+  options: Options<
+    GetPostcardsInBoundsApiPostcardsInBoundsGetData,
+    ThrowOnError
+  >,
+) => {
+  return (options.client ?? client).get<
+    GetPostcardsInBoundsApiPostcardsInBoundsGetResponses,
+    GetPostcardsInBoundsApiPostcardsInBoundsGetErrors,
+    ThrowOnError
+  >({
+    security: [
+      {
+        scheme: "bearer",
+        type: "http",
+      },
+    ],
+    url: "/api/postcards/in-bounds",
+    ...options,
+  });
+};
+
+/**
+ * 地図タイル内の絵葉書取得
+ * Web メルカトルの z/x/y タイル内にある、リレー中の絵葉書の位置を取得します。座標はタイル内の整数座標（0 〜 extent-1）で、絵葉書とクラスタをそれぞれ列ごとの配列で返します。レスポンスには `ETag` と `Cache-Control`（利用者のブラウザのみにキャッシュさせる `private`）が付き、内容が変わっていなければ `If-None-Match` に対して 304 を返します。
+ */
+export const getPostcardTileApiPostcardsTilesZXYGet = <
+  ThrowOnError extends boolean = false,
+>(
+  options: Options<GetPostcardTileApiPostcardsTilesZXYGetData, ThrowOnError>,
+) => {
+  return (options.client ?? client).get<
+    GetPostcardTileApiPostcardsTilesZXYGetResponses,
+    GetPostcardTileApiPostcardsTilesZXYGetErrors,
+    ThrowOnError
+  >({
+    security: [
+      {
+        scheme: "bearer",
+        type: "http",
+      },
+    ],
+    url: "/api/postcards/tiles/{z}/{x}/{y}",
+    ...options,
+  });
+};
+
 /**
  * 絵葉書をコレクションに追加
  * 地図上で見つけた絵葉書を「拾う」APIです。拾われた絵葉書はユーザーのコレクションに追加され、他のユーザーには表示されなくなります。
@@ -397,7 +519,7 @@ export const collectPostcardApiPostcardsPostcardIdCollectPost = <
 
 /**
  * 自分の投稿した絵葉書取得
- * ログイン中のユーザーが投稿した全ての絵葉書を取得します。作成日時の新しい順に並びます。
+ * ログイン中のユーザーが投稿した絵葉書を作成日時の新しい順に取得します。`limit` を指定しない場合は全件を返します。`limit` を指定して `next_cursor` が返された場合は `cursor` に指定して続きを取得します。`fields` を指定すると指定した項目のみを返します。旅の軌跡が不要な場合は `include_path=false` を指定します。`Accept: application/vnd.postcard.compact+json`（または `application/msgpack`）を指定すると、項目ごとの配列で返します。
  */
 export const getMyPostcardsApiPostcardsMyGet = <
   ThrowOnError extends boolean = false,
@@ -450,7 +572,7 @@ export const likePostcardApiPostcardsPostcardIdLikePost = <
 
 /**
  * 自身のコレクション取得
- * ログイン中のユーザーが拾った絵葉書のコレクション一覧を取得します。
+ * ログイン中のユーザーが拾った絵葉書のコレクション一覧を取得します。`limit` を指定しない場合は全件を返します。`limit` を指定して続きがある場合はレスポンスヘッダー `X-Next-Cursor` の値を `cursor` に指定して続きを取得します。`fields` を指定すると指定した項目のみを返します。
  */
 export const getMyCollectionApiUsersMeCollectionGet = <
   ThrowOnError extends boolean = false,
@@ -1,5 +1,44 @@
 // This file is auto-generated by @hey-api/openapi-ts
 
+/**
+ * BatchPostcard
+ */
+export type BatchPostcard = {
+  /**
+   * Postcard Id
+   */
+  postcard_id: string;
+  /**
+   * Image Url
+   */
+  image_url: string;
+  /**
+   * Text
+   */
+  text: string;
+  /**
+   * Created At
+   */
+  created_at: string;
+  /**
+   * Author Id
+   */
+  author_id: string;
+  /**
+   * Likes Count
+   */
+  likes_count: number;
+  /**
+   * Path
+   */
+  path?: Array<PathPoint> | null;
+  /**
+   * Is Own
+   */
+  is_own: boolean;
+  current_position: Position | null;
+};
+
 /**
  * CollectResponse
  */
@@ -44,6 +83,25 @@ export type LikeResponse = {
   message: string;
 };
 
+/**
+ * MapPostcard
+ */
+export type MapPostcard = {
+  /**
+   * Postcard Id
+   */
+  postcard_id: string;
+  /**
+   * Image Url
+   */
+  image_url: string;
+  current_position: Position;
+  /**
+   * Last Updated At
+   */
+  last_updated_at: string;
+};
+
 /**
  * NearbyPostcard
  */
@@ -75,19 +133,19 @@ export type PathPoint = {
   /**
    * Prefecture
    */
-  prefecture: string;
+  prefecture?: string | null;
   /**
    * Lat
    */
-  lat: number;
+  lat?: number | null;
   /**
    * Lon
    */
-  lon: number;
+  lon?: number | null;
   /**
    * Arrival Time
    */
-  arrival_time: string;
+  arrival_time?: string | null;
 };
 
 /**
@@ -104,6 +162,49 @@ export type Position = {
   lon: number;
 };
 
+/**
+ * PostcardBatchRequest
+ */
+export type PostcardBatchRequest = {
+  /**
+   * Postcard Ids
+   */
+  postcard_ids: Array<string>;
+  /**
+   * Include Path
+   */
+  include_path?: boolean;
+};
+
+/**
+ * PostcardBatchResponse
+ */
+export type PostcardBatchResponse = {
+  /**
+   * Postcards
+   */
+  postcards: Array<BatchPostcard>;
+  /**
+   * Missing
+   */
+  missing: Array<string>;
+  /**
+   * Unprocessed
+   */
+  unprocessed?: Array<string>;
+};
+
+/**
+ * PostcardCluster
+ */
+export type PostcardCluster = {
+  position: Position;
+  /**
+   * Count
+   */
+  count: number;
+};
+
 /**
  * PostcardCreateRequest
  */
@@ -204,23 +305,27 @@ export type PostcardInCollection = {
   /**
    * Image Url
    */
-  image_url: string;
+  image_url?: string | null;
   /**
    * Text
    */
-  text: string;
+  text?: string | null;
   /**
    * Created At
    */
-  created_at: string;
+  created_at?: string | null;
   /**
    * Author Id
    */
-  author_id: string;
+  author_id?: string | null;
   /**
    * Likes Count
    */
-  likes_count: number;
+  likes_count?: number | null;
+  /**
+   * Collected At
+   */
+  collected_at?: string | null;
 };
 
 /**
@@ -235,6 +340,34 @@ export type PostcardPathResponse = {
    * Path
    */
   path: Array<PathPoint>;
+  /**
+   * Next Cursor
+   */
+  next_cursor?: string | null;
+};
+
+/**
+ * PostcardTile
+ */
+export type PostcardTile = {
+  /**
+   * Z
+   */
+  z: number;
+  /**
+   * X
+   */
+  x: number;
+  /**
+   * Y
+   */
+  y: number;
+  /**
+   * Extent
+   */
+  extent: number;
+  postcards: TilePostcards;
+  clusters: TileClusters;
 };
 
 /**
@@ -265,6 +398,60 @@ export type PostcardUpdateResponse = {
   postcard_id: string;
 };
 
+/**
+ * PostcardsInBoundsResponse
+ */
+export type PostcardsInBoundsResponse = {
+  /**
+   * Postcards
+   */
+  postcards: Array<MapPostcard>;
+  /**
+   * Clusters
+   */
+  clusters: Array<PostcardCluster>;
+  /**
+   * Total
+   */
+  total: number;
+};
+
+/**
+ * TileClusters
+ */
+export type TileClusters = {
+  /**
+   * X
+   */
+  x: Array<number>;
+  /**
+   * Y
+   */
+  y: Array<number>;
+  /**
+   * Count
+   */
+  count: Array<number>;
+};
+
+/**
+ * TilePostcards
+ */
+export type TilePostcards = {
+  /**
+   * Ids
+   */
+  ids: Array<string>;
+  /**
+   * X
+   */
+  x: Array<number>;
+  /**
+   * Y
+   */
+  y: Array<number>;
+};
+
 /**
  * UserCreateRequest
  */
@@ -314,32 +501,32 @@ export type UserPostcard = {
   /**
    * Image Url
    */
-  image_url: string;
+  image_url?: string | null;
   /**
    * Text
    */
-  text: string;
+  text?: string | null;
   /**
    * Created At
    */
-  created_at: string;
+  created_at?: string | null;
   /**
    * Author Id
    */
-  author_id: string;
+  author_id?: string | null;
   /**
    * Likes Count
    */
-  likes_count: number;
+  likes_count?: number | null;
   /**
    * Status
    */
-  status: string;
-  current_position: Position | null;
+  status?: string | null;
+  current_position?: Position | null;
   /**
    * Path
    */
-  path: Array<PathPoint>;
+  path?: Array<PathPoint> | null;
 };
 
 /**
@@ -354,6 +541,10 @@ export type UserPostcardsResponse = {
    * Count
    */
   count: number;
+  /**
+   * Next Cursor
+   */
+  next_cursor?: string | null;
 };
 
 /**
@@ -510,6 +701,12 @@ export type DeleteMyProfileApiUsersMeDeleteResponse =
 
 export type GetMyProfileApiUsersMeGetData = {
   body?: never;
+  headers?: {
+    /**
+     * If-None-Match
+     */
+    "if-none-match"?: string | null;
+  };
   path?: never;
   query?: never;
   url: "/api/users/me";
@@ -524,6 +721,10 @@ export type GetMyProfileApiUsersMeGetErrors = {
    * ユーザープロフィールが見つからない場合
    */
   404: ErrorResponse;
+  /**
+   * Validation Error
+   */
+  422: HttpValidationError;
 };
 
 export type GetMyProfileApiUsersMeGetError =
@@ -576,6 +777,12 @@ export type UpdateMyProfileApiUsersMePutResponse =
 
 export type GetUserProfileApiUsersUserIdGetData = {
   body?: never;
+  headers?: {
+    /**
+     * If-None-Match
+     */
+    "if-none-match"?: string | null;
+  };
   path: {
     /**
      * User Id
@@ -649,6 +856,37 @@ export type CreatePostcardApiPostcardsPostResponses = {
 export type CreatePostcardApiPostcardsPostResponse =
   CreatePostcardApiPostcardsPostResponses[keyof CreatePostcardApiPostcardsPostResponses];
 
+export type GetPostcardsBatchApiPostcardsBatchPostData = {
+  body: PostcardBatchRequest;
+  path?: never;
+  query?: never;
+  url: "/api/postcards/batch";
+};
+
+export type GetPostcardsBatchApiPostcardsBatchPostErrors = {
+  /**
+   * 認証トークンがない、または無効な場合
+   */
+  401: ErrorResponse;
+  /**
+   * 絵葉書IDの指定が不正、または件数が多すぎる場合
+   */
+  422: ErrorResponse;
+};
+
+export type GetPostcardsBatchApiPostcardsBatchPostError =
+  GetPostcardsBatchApiPostcardsBatchPostErrors[keyof GetPostcardsBatchApiPostcardsBatchPostErrors];
+
+export type GetPostcardsBatchApiPostcardsBatchPostResponses = {
+  /**
+   * Successful Response
+   */
+  200: PostcardBatchResponse;
+};
+
+export type GetPostcardsBatchApiPostcardsBatchPostResponse =
+  GetPostcardsBatchApiPostcardsBatchPostResponses[keyof GetPostcardsBatchApiPostcardsBatchPostResponses];
+
 export type DeletePostcardApiPostcardsPostcardIdDeleteData = {
   body?: never;
   path: {
@@ -695,6 +933,12 @@ export type DeletePostcardApiPostcardsPostcardIdDeleteResponse =
 
 export type GetPostcardDetailApiPostcardsPostcardIdGetData = {
   body?: never;
+  headers?: {
+    /**
+     * If-None-Match
+     */
+    "if-none-match"?: string | null;
+  };
   path: {
     /**
      * Postcard Id
@@ -783,17 +1027,57 @@ export type UpdatePostcardApiPostcardsPostcardIdPutResponse =
 
 export type GetPostcardPathApiPostcardsPostcardIdPathGetData = {
   body?: never;
+  headers?: {
+    /**
+     * If-None-Match
+     */
+    "if-none-match"?: string | null;
+    /**
+     * Accept
+     */
+    accept?: string | null;
+  };
   path: {
     /**
      * Postcard Id
      */
     postcard_id: string;
   };
-  query?: never;
+  query?: {
+    /**
+     * Since
+     * この時刻（ISO 8601）より後に到着した経由地のみを取得
+     */
+    since?: string | null;
+    /**
+     * Limit
+     * 1回で取得する経由地の最大件数
+     */
+    limit?: number | null;
+    /**
+     * Cursor
+     * 前回のレスポンスの next_cursor
+     */
+    cursor?: string | null;
+    /**
+     * Tolerance
+     * 軌跡を簡略化する際の許容誤差（メートル）
+     */
+    tolerance?: number | null;
+    /**
+     * Fields
+     * 経由地に含める項目（カンマ区切り: prefecture, lat, lon, arrival_time）
+     */
+    fields?: string | null;
+  };
   url: "/api/postcards/{postcard_id}/path";
 };
 
 export type GetPostcardPathApiPostcardsPostcardIdPathGetErrors = {
+  /**
+   * since、cursor または fields が不正な場合
+   */
+  400: ErrorResponse;
   /**
    * 認証トークンがない、または無効な場合
    */
@@ -823,6 +1107,12 @@ export type GetPostcardPathApiPostcardsPostcardIdPathGetResponse =
 
 export type GetNearbyPostcardsApiPostcardsNearbyGetData = {
   body?: never;
+  headers?: {
+    /**
+     * Accept
+     */
+    accept?: string | null;
+  };
   path?: never;
   query: {
     /**
@@ -873,6 +1163,172 @@ export type GetNearbyPostcardsApiPostcardsNearbyGetResponses = {
 export type GetNearbyPostcardsApiPostcardsNearbyGetResponse =
   GetNearbyPostcardsApiPostcardsNearbyGetResponses[keyof GetNearbyPostcardsApiPostcardsNearbyGetResponses];
 
+export type StreamNearbyPostcardsApiPostcardsNearbyStreamGetData = {
+  body?: never;
+  path?: never;
+  query: {
+    /**
+     * Lat
+     * クライアントの現在地の緯度
+     */
+    lat: number;
+    /**
+     * Lon
+     * クライアントの現在地の経度
+     */
+    lon: number;
+    /**
+     * Radius
+     * 検索範囲（半径、メートル単位）
+     */
+    radius?: number | null;
+  };
+  url: "/api/postcards/nearby/stream";
+};
+
+export type StreamNearbyPostcardsApiPostcardsNearbyStreamGetErrors = {
+  /**
+   * 認証トークンがない、または無効な場合
+   */
+  401: ErrorResponse;
+  /**
+   * 同時接続数の上限に達している場合
+   */
+  503: ErrorResponse;
+  /**
+   * Validation Error
+   */
+  422: HttpValidationError;
+};
+
+export type StreamNearbyPostcardsApiPostcardsNearbyStreamGetError =
+  StreamNearbyPostcardsApiPostcardsNearbyStreamGetErrors[keyof StreamNearbyPostcardsApiPostcardsNearbyStreamGetErrors];
+
+export type StreamNearbyPostcardsApiPostcardsNearbyStreamGetResponses = {
+  /**
+   * Successful Response
+   */
+  200: unknown;
+};
+
+export type GetPostcardsInBoundsApiPostcardsInBoundsGetData = {
+  body?: never;
+  path?: never;
+  query: {
+    /**
+     * Min Lat
+     * 表示範囲の南端の緯度
+     */
+    min_lat: number;
+    /**
+     * Min Lon
+     * 表示範囲の西端の経度
+     */
+    min_lon: number;
+    /**
+     * Max Lat
+     * 表示範囲の北端の緯度
+     */
+    max_lat: number;
+    /**
+     * Max Lon
+     * 表示範囲の東端の経度
+     */
+    max_lon: number;
+    /**
+     * Zoom
+     * 地図のズームレベル
+     */
+    zoom: number;
+  };
+  url: "/api/postcards/in-bounds";
+};
+
+export type GetPostcardsInBoundsApiPostcardsInBoundsGetErrors = {
+  /**
+   * 表示範囲が不正な場合
+   */
+  400: ErrorResponse;
+  /**
+   * 認証トークンがない、または無効な場合
+   */
+  401: ErrorResponse;
+  /**
+   * Validation Error
+   */
+  422: HttpValidationError;
+};
+
+export type GetPostcardsInBoundsApiPostcardsInBoundsGetError =
+  GetPostcardsInBoundsApiPostcardsInBoundsGetErrors[keyof GetPostcardsInBoundsApiPostcardsInBoundsGetErrors];
+
+export type GetPostcardsInBoundsApiPostcardsInBoundsGetResponses = {
+  /**
+   * Successful Response
+   */
+  200: PostcardsInBoundsResponse;
+};
+
+export type GetPostcardsInBoundsApiPostcardsInBoundsGetResponse =
+  GetPostcardsInBoundsApiPostcardsInBoundsGetResponses[keyof GetPostcardsInBoundsApiPostcardsInBoundsGetResponses];
+
+export type GetPostcardTileApiPostcardsTilesZXYGetData = {
+  body?: never;
+  headers?: {
+    /**
+     * If-None-Match
+     */
+    "if-none-match"?: string | null;
+  };
+  path: {
+    /**
+     * Z
+     * ズームレベル
+     */
+    z: number;
+    /**
+     * X
+     * タイルの列
+     */
+    x: number;
+    /**
+     * Y
+     * タイルの行
+     */
+    y: number;
+  };
+  query?: never;
+  url: "/api/postcards/tiles/{z}/{x}/{y}";
+};
+
+export type GetPostcardTileApiPostcardsTilesZXYGetErrors = {
+  /**
+   * 認証トークンがない、または無効な場合
+   */
+  401: ErrorResponse;
+  /**
+   * タイル座標が範囲外の場合
+   */
+  404: ErrorResponse;
+  /**
+   * Validation Error
+   */
+  422: HttpValidationError;
+};
+
+export type GetPostcardTileApiPostcardsTilesZXYGetError =
+  GetPostcardTileApiPostcardsTilesZXYGetErrors[keyof GetPostcardTileApiPostcardsTilesZXYGetErrors];
+
+export type GetPostcardTileApiPostcardsTilesZXYGetResponses = {
+  /**
+   * Successful Response
+   */
+  200: PostcardTile;
+};
+
+export type GetPostcardTileApiPostcardsTilesZXYGetResponse =
+  GetPostcardTileApiPostcardsTilesZXYGetResponses[keyof GetPostcardTileApiPostcardsTilesZXYGetResponses];
+
 export type CollectPostcardApiPostcardsPostcardIdCollectPostData = {
   body?: never;
   path: {
@@ -915,16 +1371,55 @@ export type CollectPostcardApiPostcardsPostcardIdCollectPostResponse =
 
 export type GetMyPostcardsApiPostcardsMyGetData = {
   body?: never;
+  headers?: {
+    /**
+     * Accept
+     */
+    accept?: string | null;
+  };
   path?: never;
-  query?: never;
+  query?: {
+    /**
+     * Limit
+     * 1回で取得する絵葉書の最大件数（省略時は全件）
+     */
+    limit?: number | null;
+    /**
+     * Cursor
+     * 前回のレスポンスの next_cursor
+     */
+    cursor?: string | null;
+    /**
+     * Fields
+     * 含める項目（カンマ区切り: postcard_id, image_url, text, created_at, author_id, likes_count, status, current_position）
+     */
+    fields?: string | null;
+    /**
+     * Include Path
+     * 旅の軌跡を含めるか
+     */
+    include_path?: boolean;
+  };
   url: "/api/postcards/my";
 };
 
 export type GetMyPostcardsApiPostcardsMyGetErrors = {
+  /**
+   * cursor または fields が不正な場合
+   */
+  400: ErrorResponse;
   /**
    * 認証トークンがない、または無効な場合
    */
   401: ErrorResponse;
+  /**
+   * 混雑により一覧を取得できなかった場合（Retry-After 秒後に再試行）
+   */
+  503: ErrorResponse;
+  /**
+   * Validation Error
+   */
+  422: HttpValidationError;
 };
 
 export type GetMyPostcardsApiPostcardsMyGetError =
@@ -987,15 +1482,43 @@ export type LikePostcardApiPostcardsPostcardIdLikePostResponse =
 export type GetMyCollectionApiUsersMeCollectionGetData = {
   body?: never;
   path?: never;
-  query?: never;
+  query?: {
+    /**
+     * Limit
+     * 1回で取得する絵葉書の最大件数（省略時は全件）
+     */
+    limit?: number | null;
+    /**
+     * Cursor
+     * 前回のレスポンスの X-Next-Cursor
+     */
+    cursor?: string | null;
+    /**
+     * Fields
+     * 含める項目（カンマ区切り: postcard_id, image_url, text, created_at, author_id, likes_count）
+     */
+    fields?: string | null;
+  };
   url: "/api/users/me/collection";
 };
 
 export type GetMyCollectionApiUsersMeCollectionGetErrors = {
+  /**
+   * cursor または fields が不正な場合
+   */
+  400: ErrorResponse;
   /**
    * 認証トークンがない、または無効な場合
    */
   401: ErrorResponse;
+  /**
+   * 混雑により一覧を取得できなかった場合（Retry-After 秒後に再試行）
+   */
+  503: ErrorResponse;
+  /**
+   * Validation Error
+   */
+  422: HttpValidationError;
 };
 
 export type GetMyCollectionApiUsersMeCollectionGetError =
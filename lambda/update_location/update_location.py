@@ -4,8 +4,7 @@ import logging
 import os
 import time
 from datetime import datetime, timezone
-from typing import Dict, Any
-from decimal import Decimal
+from typing import Dict, Any, Iterator
 from location_calculate_minimal import MovingLettersAlgorithm
 import numpy as np
 
@@ -15,9 +14,35 @@ logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # Initialize DynamoDB client
-dynamodb = boto3.resource("dynamodb")
+# 低レベルクライアントで読み書きし、座標を Decimal を介さず float として扱う
+dynamodb = boto3.client("dynamodb")
 table_name = os.environ.get("DYNAMODB_TABLE_NAME", "postcard-dev-dynamodb")
-table = dynamodb.Table(table_name)
+
+
+def scan_traveling_postcards() -> Iterator[Dict[str, Any]]:
+    """Scan traveling postcard metadata items in the raw wire format"""
+    scan_kwargs = {
+        "TableName": table_name,
+        "FilterExpression": "begins_with(PK, :pk_prefix) AND SK = :sk AND #status = :status",
+        "ProjectionExpression": "PK, SK, postcard_id, current_lat, current_lon",
+        "ExpressionAttributeNames": {"#status": "status"},
+        "ExpressionAttributeValues": {
+            ":pk_prefix": {"S": "POSTCARD#"},
+            ":sk": {"S": "METADATA"},
+            ":status": {"S": "traveling"},
+        },
+    }
+    while True:
+        response = dynamodb.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def wire_coordinate(value: Dict[str, str]) -> float:
+    """Parse a coordinate stored as a number (or a legacy string)"""
+    return float(value.get("N", value.get("S")))
 
 
 def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
@@ -90,28 +115,18 @@ def lambda_handler_runner(event: Dict[str, Any], context) -> Dict[str, Any]:
 
         try:
             # Scan for all POSTCARD items with METADATA sort key and traveling status
-            response = table.scan(
-                FilterExpression="begins_with(PK, :pk_prefix) AND SK = :sk AND #status = :status",
-                ExpressionAttributeNames={"#status": "status"},
-                ExpressionAttributeValues={
-                    ":pk_prefix": "POSTCARD#",
-                    ":sk": "METADATA",
-                    ":status": "traveling",
-                },
-            )
-
-            for item in response.get("Items", []):
+            for item in scan_traveling_postcards():
                 if item.get("current_lat") and item.get("current_lon"):
-                    # Handle both string and Decimal types from DynamoDB
+                    # Handle both number and string types from DynamoDB
                     try:
-                        current_lat = float(str(item["current_lat"]))
-                        current_lon = float(str(item["current_lon"]))
+                        current_lat = wire_coordinate(item["current_lat"])
+                        current_lon = wire_coordinate(item["current_lon"])
 
                         traveling_postcards.append(
                             {
                                 "PK": item["PK"],
                                 "SK": item["SK"],
-                                "postcard_id": item.get("postcard_id"),
+                                "postcard_id": item.get("postcard_id", {}).get("S"),
                                 "current_lat": current_lat,
                                 "current_lon": current_lon,
                             }
@@ -198,14 +213,19 @@ def lambda_handler_runner(event: Dict[str, Any], context) -> Dict[str, Any]:
                 # Convert back to lat/lon
                 new_lon, new_lat = alg.m_to_lonlat(p[0], p[1], lat0)
 
-                # Update this postcard in DynamoDB (convert to Decimal for DynamoDB)
-                table.update_item(
+                # Update this postcard in DynamoDB (numbers are sent as strings)
+                # updated_at はサーバーと同じ固定長の形式にする（文字列比較で時系列順に並ぶ）
+                updated_at = datetime.now(timezone.utc).strftime(
+                    "%Y-%m-%dT%H:%M:%S.%fZ"
+                )
+                dynamodb.update_item(
+                    TableName=table_name,
                     Key={"PK": postcard["PK"], "SK": postcard["SK"]},
                     UpdateExpression="SET current_lat = :lat, current_lon = :lon, updated_at = :timestamp",
                     ExpressionAttributeValues={
-                        ":lat": Decimal(str(float(new_lat))),
-                        ":lon": Decimal(str(float(new_lon))),
-                        ":timestamp": datetime.now(timezone.utc).isoformat(),
+                        ":lat": {"N": repr(float(new_lat))},
+                        ":lon": {"N": repr(float(new_lon))},
+                        ":timestamp": {"S": updated_at},
                     },
                 )
 
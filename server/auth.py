@@ -1,14 +1,14 @@
+import hashlib
 import os
+import time
 import jwt
-import requests
-from typing import Dict
+from typing import Any, Dict
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer
-from functools import lru_cache
-from dotenv import load_dotenv
 
-# 環境変数を確実に読み込む
-load_dotenv()
+from database.cache import TTLCache
+from jwks import JWKSProvider, file_source, url_source
+from profiling import timed
 
 security = HTTPBearer()
 
@@ -23,20 +23,21 @@ if not COGNITO_USER_POOL_ID:
 # JWKSエンドポイント
 JWKS_URL = f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}/.well-known/jwks.json"
 
+# COGNITO_JWKS_FILE を指定するとローカルの JWKS ファイルを使う（オフラインのテスト用）
+COGNITO_JWKS_FILE = os.getenv("COGNITO_JWKS_FILE")
 
-@lru_cache(maxsize=1)
-def get_jwks() -> Dict:
-    """Cognito JWKSを取得してキャッシュ"""
-    try:
-        response = requests.get(JWKS_URL)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print(f"Failed to fetch JWKS: {e}")
-        return {"keys": []}
+# 起動時に取得し、以降はバックグラウンドで定期更新する（main.py の lifespan で開始）
+jwks_provider = JWKSProvider(
+    file_source(COGNITO_JWKS_FILE) if COGNITO_JWKS_FILE else url_source(JWKS_URL)
+)
+
+# 検証済みトークンのクレームを、トークンの有効期限 (exp) まで保持する
+token_cache = TTLCache(
+    int(os.getenv("TOKEN_CACHE_MAXSIZE", "10000")), ttl=0, name="token"
+)
 
 
-def get_signing_key(token: str) -> str:
+def get_signing_key(token: str) -> Any:
     """JWTトークンから署名キーを取得"""
     try:
         # JWT ヘッダーからkidを取得
@@ -48,23 +49,31 @@ def get_signing_key(token: str) -> str:
                 status_code=401, detail="Invalid token: no kid in header"
             )
 
-        # JWKSからマッチするキーを見つける
-        jwks = get_jwks()
-        for key in jwks.get("keys", []):
-            if key.get("kid") == kid:
-                # RSA公開キーを構築
-                from jwt.algorithms import RSAAlgorithm
-
-                return RSAAlgorithm.from_jwk(key)
-
-        raise HTTPException(status_code=401, detail="Invalid token: kid not found")
+        # kid で構築済みの公開キーを引く（未知の kid なら JWKS を再取得）
+        signing_key = jwks_provider.get_key(kid)
+        if signing_key is None:
+            raise HTTPException(status_code=401, detail="Invalid token: kid not found")
+        return signing_key
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=401, detail=f"Token validation error: {str(e)}")
 
 
 def verify_cognito_token(token: str) -> Dict:
     """Cognito JWTトークンを検証"""
+    # 同じトークンは有効期限まで RS256 の署名検証を省略する
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    return token_cache.get_or_load(
+        digest,
+        lambda: decode_cognito_token(token),
+        ttl=lambda payload: payload.get("exp", 0) - time.time(),
+    )
+
+
+def decode_cognito_token(token: str) -> Dict:
+    """Cognito JWTトークンの署名とクレームを検証してデコード"""
     try:
         # 署名キーを取得
         signing_key = get_signing_key(token)
@@ -86,6 +95,11 @@ def verify_cognito_token(token: str) -> Dict:
         raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
 
 
+def auth_stats() -> Dict[str, Any]:
+    """トークンキャッシュのヒット率や JWKS の取得状況などの統計"""
+    return {"token_cache": token_cache.stats(), "jwks": jwks_provider.stats()}
+
+
 def get_current_user(token: str = Depends(security)) -> Dict[str, str]:
     """現在のユーザー情報を取得"""
 
@@ -101,7 +115,8 @@ def get_current_user(token: str = Depends(security)) -> Dict[str, str]:
         jwt_token = token.credentials
 
         # Cognito JWTトークンを検証
-        payload = verify_cognito_token(jwt_token)
+        with timed("auth"):
+            payload = verify_cognito_token(jwt_token)
 
         # Cognitoのペイロードから必要な情報を抽出
         return {
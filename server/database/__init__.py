@@ -1,15 +1,51 @@
+from .base import UnprocessedKeysError
 from .client import DynamoDBClient
 from .users import UserOperations
-from .postcards import PostcardOperations
-from .collections import CollectionOperations
+from .postcards import (
+    PostcardOperations,
+    PATH_POINT_FIELDS,
+    POSTCARD_FIELD_ATTRIBUTES,
+)
+from .collections import (
+    CollectionOperations,
+    COLLECTION_FIELDS,
+    LIKE_OK,
+    LIKE_ALREADY_LIKED,
+    LIKE_NOT_FOUND,
+    COLLECT_OK,
+    COLLECT_NOT_FOUND,
+    COLLECT_ALREADY_COLLECTED,
+    COLLECT_ALREADY_IN_COLLECTION,
+)
+from .aio import (
+    AsyncDynamoDBClient,
+    AsyncUserOperations,
+    AsyncPostcardOperations,
+    AsyncCollectionOperations,
+)
 
 # Create global instance
-db = DynamoDBClient()
+db = AsyncDynamoDBClient()
 
 __all__ = [
     "db",
     "DynamoDBClient",
+    "UnprocessedKeysError",
     "UserOperations",
     "PostcardOperations",
     "CollectionOperations",
+    "AsyncDynamoDBClient",
+    "AsyncUserOperations",
+    "AsyncPostcardOperations",
+    "AsyncCollectionOperations",
+    "LIKE_OK",
+    "LIKE_ALREADY_LIKED",
+    "LIKE_NOT_FOUND",
+    "COLLECT_OK",
+    "COLLECT_NOT_FOUND",
+    "COLLECT_ALREADY_COLLECTED",
+    "COLLECT_ALREADY_IN_COLLECTION",
+    "PATH_POINT_FIELDS",
+    "POSTCARD_FIELD_ATTRIBUTES",
+    "COLLECTION_FIELDS",
 ]
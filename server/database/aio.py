@@ -0,0 +1,342 @@
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, List, Optional
+
+from .client import DynamoDBClient
+from .postcards import ACTIVE_SNAPSHOT_KEY
+
+# boto3 は同期 I/O のため、専用スレッドプールで実行してイベントループを塞がない
+THREAD_POOL_SIZE = int(
+    os.getenv(
+        "DYNAMODB_THREAD_POOL_SIZE", os.getenv("DYNAMODB_MAX_POOL_CONNECTIONS", "50")
+    )
+)
+
+
+class AsyncOperations:
+    """Base class that runs synchronous operations in a thread pool"""
+
+    def __init__(self, operations, executor: ThreadPoolExecutor):
+        self.operations = operations
+        self.executor = executor
+
+    async def _run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        # リクエストごとの計測（contextvars）をスレッドプール側に引き継ぐ
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self.executor, partial(context.run, func, *args, **kwargs)
+        )
+
+
+class AsyncUserOperations(AsyncOperations):
+    """Async user-related DynamoDB operations"""
+
+    async def create_user(
+        self, user_id: str, username: str, email: str, profile_image_url: str
+    ) -> bool:
+        return await self._run(
+            self.operations.create_user, user_id, username, email, profile_image_url
+        )
+
+    async def get_user(self, user_id: str):
+        # キャッシュヒット時はスレッドプールを経由しない
+        cached = self.operations.client.user_cache.get(user_id)
+        if cached is not None:
+            return cached
+        return await self._run(self.operations.get_user, user_id)
+
+    async def update_user(
+        self, user_id: str, username: str, profile_image_url: str
+    ) -> bool:
+        return await self._run(
+            self.operations.update_user, user_id, username, profile_image_url
+        )
+
+    async def delete_user(self, user_id: str) -> bool:
+        return await self._run(self.operations.delete_user, user_id)
+
+
+class AsyncPostcardOperations(AsyncOperations):
+    """Async postcard-related DynamoDB operations"""
+
+    async def create_postcard(
+        self, author_id: str, image_url: str, text: str, lat: float, lon: float
+    ):
+        return await self._run(
+            self.operations.create_postcard, author_id, image_url, text, lat, lon
+        )
+
+    async def get_postcard(self, postcard_id: str):
+        # キャッシュヒット時はスレッドプールを経由しない
+        cached = self.operations.client.postcard_cache.get(postcard_id)
+        if cached is not None:
+            return cached
+        return await self._run(self.operations.get_postcard, postcard_id)
+
+    async def get_postcards(self, postcard_ids: List[str], attributes=None):
+        return await self._run(self.operations.get_postcards, postcard_ids, attributes)
+
+    async def update_postcard(
+        self, postcard_id: str, image_url: str, text: str
+    ) -> bool:
+        return await self._run(
+            self.operations.update_postcard, postcard_id, image_url, text
+        )
+
+    async def delete_postcard(self, postcard_id: str) -> bool:
+        return await self._run(self.operations.delete_postcard, postcard_id)
+
+    async def add_path_point(
+        self, postcard_id: str, prefecture: str, lat: float, lon: float
+    ) -> bool:
+        return await self._run(
+            self.operations.add_path_point, postcard_id, prefecture, lat, lon
+        )
+
+    async def get_postcard_path(self, postcard_id: str):
+        return await self._run(self.operations.get_postcard_path, postcard_id)
+
+    async def get_path_version(self, postcard_id: str) -> str:
+        return await self._run(self.operations.get_path_version, postcard_id)
+
+    async def get_postcard_path_page(
+        self,
+        postcard_id: str,
+        since: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        tolerance: Optional[float] = None,
+        fields=None,
+    ):
+        return await self._run(
+            self.operations.get_postcard_path_page,
+            postcard_id,
+            since,
+            limit,
+            cursor,
+            tolerance,
+            fields,
+        )
+
+    async def get_nearby_postcards(self, lat: float, lon: float, radius: int = 1000):
+        # 同じセルの候補がキャッシュにあればイベントループ上で順位付けだけ行う
+        cached = self.operations.get_cached_nearby_postcards(lat, lon, radius)
+        if cached is not None:
+            return cached
+        return await self._run(self.operations.get_nearby_postcards, lat, lon, radius)
+
+    async def get_postcards_in_bounds(
+        self, min_lat: float, min_lon: float, max_lat: float, max_lon: float, zoom: int
+    ):
+        return await self._run(
+            self.operations.get_postcards_in_bounds,
+            min_lat,
+            min_lon,
+            max_lat,
+            max_lon,
+            zoom,
+        )
+
+    async def get_active_postcards(self):
+        return await self._run(self.operations.get_active_postcards)
+
+    async def get_active_snapshot(self):
+        cached = self.operations.client.active_cache.get(ACTIVE_SNAPSHOT_KEY)
+        if cached is not None:
+            return cached
+        return await self._run(self.operations.get_active_snapshot)
+
+    async def get_user_postcards(
+        self,
+        author_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields=None,
+        include_path: bool = False,
+    ):
+        return await self._run(
+            self.operations.get_user_postcards,
+            author_id,
+            limit,
+            cursor,
+            fields,
+            include_path,
+        )
+
+
+class AsyncCollectionOperations(AsyncOperations):
+    """Async collection-related DynamoDB operations"""
+
+    async def collect_postcard(self, user_id: str, postcard_id: str) -> str:
+        return await self._run(self.operations.collect_postcard, user_id, postcard_id)
+
+    async def get_user_collection(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields=None,
+    ):
+        return await self._run(
+            self.operations.get_user_collection, user_id, limit, cursor, fields
+        )
+
+    async def like_postcard(self, user_id: str, postcard_id: str) -> str:
+        return await self._run(self.operations.like_postcard, user_id, postcard_id)
+
+    async def get_likes_count(self, postcard) -> int:
+        if not postcard.get("like_shards"):
+            return int(postcard.get("likes_count", 0))
+        return await self._run(self.operations.get_likes_count, postcard)
+
+
+class AsyncDynamoDBClient:
+    """Async DynamoDB client for the FastAPI routes
+
+    Wraps the synchronous :class:`DynamoDBClient` and runs every call in a
+    dedicated thread pool sized to match botocore's connection pool, so
+    concurrent requests no longer wait for each other's round trips.
+    """
+
+    def __init__(
+        self,
+        client: Optional[DynamoDBClient] = None,
+        max_workers: int = THREAD_POOL_SIZE,
+    ):
+        self.sync = client or DynamoDBClient()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="dynamodb"
+        )
+        self.users = AsyncUserOperations(self.sync.users, self.executor)
+        self.postcards = AsyncPostcardOperations(self.sync.postcards, self.executor)
+        self.collections = AsyncCollectionOperations(
+            self.sync.collections, self.executor
+        )
+
+    def cache_stats(self):
+        return self.sync.cache_stats()
+
+    async def connect(self) -> None:
+        """Create the boto3 clients ahead of the first request"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.sync.connect)
+
+    def shutdown(self) -> None:
+        """Stop the worker threads"""
+        self.executor.shutdown(wait=False)
+
+    # User operations
+    async def create_user(
+        self, user_id: str, username: str, email: str, profile_image_url: str
+    ) -> bool:
+        return await self.users.create_user(user_id, username, email, profile_image_url)
+
+    async def get_user(self, user_id: str):
+        return await self.users.get_user(user_id)
+
+    async def update_user(
+        self, user_id: str, username: str, profile_image_url: str
+    ) -> bool:
+        return await self.users.update_user(user_id, username, profile_image_url)
+
+    async def delete_user(self, user_id: str) -> bool:
+        return await self.users.delete_user(user_id)
+
+    # Postcard operations
+    async def create_postcard(
+        self, author_id: str, image_url: str, text: str, lat: float, lon: float
+    ):
+        return await self.postcards.create_postcard(
+            author_id, image_url, text, lat, lon
+        )
+
+    async def get_postcard(self, postcard_id: str):
+        return await self.postcards.get_postcard(postcard_id)
+
+    async def get_postcards(self, postcard_ids: List[str], attributes=None):
+        return await self.postcards.get_postcards(postcard_ids, attributes)
+
+    async def update_postcard(
+        self, postcard_id: str, image_url: str, text: str
+    ) -> bool:
+        return await self.postcards.update_postcard(postcard_id, image_url, text)
+
+    async def delete_postcard(self, postcard_id: str) -> bool:
+        return await self.postcards.delete_postcard(postcard_id)
+
+    async def add_path_point(
+        self, postcard_id: str, prefecture: str, lat: float, lon: float
+    ) -> bool:
+        return await self.postcards.add_path_point(postcard_id, prefecture, lat, lon)
+
+    async def get_postcard_path(self, postcard_id: str):
+        return await self.postcards.get_postcard_path(postcard_id)
+
+    async def get_path_version(self, postcard_id: str) -> str:
+        return await self.postcards.get_path_version(postcard_id)
+
+    async def get_postcard_path_page(
+        self,
+        postcard_id: str,
+        since: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        tolerance: Optional[float] = None,
+        fields=None,
+    ):
+        return await self.postcards.get_postcard_path_page(
+            postcard_id, since, limit, cursor, tolerance, fields
+        )
+
+    async def get_nearby_postcards(self, lat: float, lon: float, radius: int = 1000):
+        return await self.postcards.get_nearby_postcards(lat, lon, radius)
+
+    async def get_postcards_in_bounds(
+        self, min_lat: float, min_lon: float, max_lat: float, max_lon: float, zoom: int
+    ):
+        return await self.postcards.get_postcards_in_bounds(
+            min_lat, min_lon, max_lat, max_lon, zoom
+        )
+
+    async def get_active_postcards(self):
+        return await self.postcards.get_active_postcards()
+
+    async def get_active_snapshot(self):
+        return await self.postcards.get_active_snapshot()
+
+    async def get_user_postcards(
+        self,
+        author_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields=None,
+        include_path: bool = False,
+    ):
+        return await self.postcards.get_user_postcards(
+            author_id, limit, cursor, fields, include_path
+        )
+
+    # Collection operations
+    async def collect_postcard(self, user_id: str, postcard_id: str) -> str:
+        return await self.collections.collect_postcard(user_id, postcard_id)
+
+    async def get_user_collection(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields=None,
+    ):
+        return await self.collections.get_user_collection(
+            user_id, limit, cursor, fields
+        )
+
+    async def like_postcard(self, user_id: str, postcard_id: str) -> str:
+        return await self.collections.like_postcard(user_id, postcard_id)
+
+    async def get_likes_count(self, postcard) -> int:
+        return await self.collections.get_likes_count(postcard)
@@ -1,17 +1,89 @@
+import base64
 import boto3
+import json
 import os
+import threading
+import time
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+from .telemetry import instrument, record_client_error
+from .wire import deserialize_item, serialize_item
+
+# スレッドプールから並列に呼び出されるため、HTTP コネクションプールを広げておく
+MAX_POOL_CONNECTIONS = int(os.getenv("DYNAMODB_MAX_POOL_CONNECTIONS", "50"))
+
+# BatchGetItem は1回に100キーまで。処理されなかったキーは間隔を空けて再試行する
+BATCH_GET_SIZE = 100
+BATCH_GET_RETRIES = 5
+
+
+class UnprocessedKeysError(Exception):
+    """Raised when a listing cannot be completed because of unprocessed keys"""
+
+    def __init__(self, ids: List[str]):
+        super().__init__(f"{len(ids)} items were left unprocessed")
+        self.ids = ids
+
 
 class BaseDynamoDBOperations:
     """Base class for DynamoDB operations"""
 
     def __init__(self):
-        self.dynamodb = boto3.resource("dynamodb")
         self.table_name = os.getenv("DYNAMODB_TABLE_NAME", "postcard-dev-dynamodb")
-        self.table = self.dynamodb.Table(self.table_name)
+        # boto3 のクライアントはサービス定義の読み込みで重いため、初回の使用時に作る
+        self._session = None
+        self._config = Config(max_pool_connections=MAX_POOL_CONNECTIONS)
+        self._raw_client = None
+        self._connect_lock = threading.Lock()
+        # boto3 のリソース（と Table）はスレッドセーフではないため、スレッドごとに持つ
+        self._local = threading.local()
+
+    def connect(self) -> None:
+        """Create the shared session and low-level client (idempotent, thread-safe)"""
+        if self._raw_client is not None:
+            return
+        with self._connect_lock:
+            if self._raw_client is not None:
+                return
+            self._session = boto3.session.Session()
+            # 高頻度の読み書きは Decimal を介さない低レベルクライアントで行う（wire.py）。
+            # 低レベルクライアントはスレッドセーフなので全スレッドで共有する
+            raw_client = self._session.client("dynamodb", config=self._config)
+            # リクエストごとの呼び出し回数・時間・消費キャパシティを記録する
+            instrument(raw_client)
+            # 他のスレッドは _raw_client を見て作成済みと判断するため最後に設定する
+            self._raw_client = raw_client
+
+    def _thread_resource(self):
+        """This thread's boto3 resource and Table, created on first use"""
+        resource = getattr(self._local, "dynamodb", None)
+        if resource is None:
+            self.connect()
+            # Session もスレッドセーフではないため、作成だけはロックの中で行う
+            with self._connect_lock:
+                resource = self._session.resource("dynamodb", config=self._config)
+            instrument(resource.meta.client)
+            self._local.table = resource.Table(self.table_name)
+            self._local.dynamodb = resource
+        return resource
+
+    @property
+    def dynamodb(self):
+        return self._thread_resource()
+
+    @property
+    def table(self):
+        self._thread_resource()
+        return self._local.table
+
+    @property
+    def raw_client(self):
+        self.connect()
+        return self._raw_client
 
     def _generate_id(self) -> str:
         """Generate unique ID"""
@@ -19,11 +91,160 @@ class BaseDynamoDBOperations:
 
     def _get_timestamp(self) -> str:
         """Get current timestamp in ISO format"""
-        return datetime.utcnow().isoformat() + "Z"
+        # マイクロ秒を常に出力し、文字列比較で時系列順に並ぶ固定長にする
+        return datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+    def _normalize_timestamp(self, value: str) -> str:
+        """Normalize an ISO 8601 timestamp to the fixed-width format used in keys"""
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+    def _encode_cursor(
+        self, last_evaluated_key: Optional[Dict[str, Any]]
+    ) -> Optional[str]:
+        """Encode a LastEvaluatedKey as an opaque pagination cursor"""
+        if not last_evaluated_key:
+            return None
+        raw = json.dumps(last_evaluated_key, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    def _decode_cursor(self, cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Decode an opaque pagination cursor (raises ValueError if invalid)"""
+        if not cursor:
+            return None
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {e}") from e
+        if not isinstance(key, dict):
+            raise ValueError("Invalid cursor")
+        return key
+
+    def _decode_list_cursor(
+        self, cursor: Optional[str], partition_key: str, sort_key_prefix: str
+    ) -> Optional[Dict[str, Any]]:
+        """Decode a list cursor, rejecting keys outside the listed range"""
+        start_key = self._decode_cursor(cursor)
+        if start_key is None:
+            return None
+        if (
+            set(start_key) != {"PK", "SK"}
+            or start_key["PK"] != partition_key
+            or not str(start_key["SK"]).startswith(sort_key_prefix)
+        ):
+            raise ValueError("Invalid cursor")
+        return start_key
+
+    def _projection(self, attributes: Iterable[str]) -> Dict[str, Any]:
+        """ProjectionExpression arguments that read only the given attributes"""
+        # 予約語（text, status など）を避けるため全ての属性名を置き換える
+        names = {f"#p{i}": name for i, name in enumerate(dict.fromkeys(attributes))}
+        return {
+            "ProjectionExpression": ", ".join(names),
+            "ExpressionAttributeNames": names,
+        }
+
+    def _batch_get(
+        self,
+        keys: List[Dict[str, Any]],
+        attributes: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Get items by key with BatchGetItem, retrying unprocessed keys
+
+        Returns the items read and the keys still unprocessed after
+        ``BATCH_GET_RETRIES`` attempts, which are left to the caller.
+        """
+        projection = self._projection(attributes) if attributes else {}
+        items: List[Dict[str, Any]] = []
+        unprocessed: List[Dict[str, Any]] = []
+        for start in range(0, len(keys), BATCH_GET_SIZE):
+            request = {
+                self.table_name: {
+                    "Keys": keys[start : start + BATCH_GET_SIZE],
+                    **projection,
+                }
+            }
+            for attempt in range(BATCH_GET_RETRIES):
+                response = self.dynamodb.batch_get_item(RequestItems=request)
+                items.extend(response["Responses"].get(self.table_name, []))
+                request = response.get("UnprocessedKeys") or {}
+                if not request:
+                    break
+                time.sleep(0.05 * 2**attempt)
+            else:
+                # スロットリングが続いている。残りのキーは呼び出し元に返す
+                unprocessed.extend(request[self.table_name]["Keys"])
+        return items, unprocessed
+
+    def _query_list(
+        self, limit: Optional[int], **kwargs: Any
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Query one list page with the Table resource
+
+        Reads at most ``limit`` items, or follows the pages to the end when
+        ``limit`` is None. Returns the items and the LastEvaluatedKey.
+        """
+        if limit is not None:
+            kwargs["Limit"] = limit
+        items: List[Dict[str, Any]] = []
+        while True:
+            response = self.table.query(**kwargs)
+            items.extend(response["Items"])
+            last_key = response.get("LastEvaluatedKey")
+            if limit is not None or not last_key:
+                return items, last_key
+            kwargs["ExclusiveStartKey"] = last_key
+
+    def _query(self, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        """Query the table with the low-level client, yielding plain items
+
+        Expressions must be strings and ``ExpressionAttributeValues`` plain
+        values. Numbers come back as int/float rather than ``Decimal``, and
+        pages are followed until the query is exhausted.
+        """
+        kwargs["TableName"] = self.table_name
+        if "ExpressionAttributeValues" in kwargs:
+            kwargs["ExpressionAttributeValues"] = serialize_item(
+                kwargs["ExpressionAttributeValues"]
+            )
+        while True:
+            response = self.raw_client.query(**kwargs)
+            for item in response["Items"]:
+                yield deserialize_item(item)
+            if "LastEvaluatedKey" not in response:
+                return
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def _transact_write(self, transact_items: List[Dict[str, Any]]) -> None:
+        """Run TransactWriteItems on the table with the low-level client
+
+        Items, keys and expression values are given as plain Python values
+        (floats included) and serialized by ``wire.serialize_item``.
+        """
+        requests = []
+        for transact_item in transact_items:
+            serialized = {}
+            for action, request in transact_item.items():
+                request = {"TableName": self.table_name, **request}
+                for field in ("Item", "Key", "ExpressionAttributeValues"):
+                    if field in request:
+                        request[field] = serialize_item(request[field])
+                serialized[action] = request
+            requests.append(serialized)
+        self.raw_client.transact_write_items(TransactItems=requests)
+
+    def _cancellation_codes(self, error: ClientError) -> List[str]:
+        """Per-item failure codes of a cancelled transaction ("None" if it passed)"""
+        reasons = error.response.get("CancellationReasons", [])
+        return [reason.get("Code", "None") for reason in reasons]
 
     def _handle_client_error(self, error: ClientError, operation: str = "") -> None:
         """Handle DynamoDB client errors"""
         error_code = error.response["Error"]["Code"]
+        record_client_error(operation, error_code)
         print(
             f"DynamoDB error in {operation}: {error_code} - {error.response['Error']['Message']}"
         )
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+
+class _Flight:
+    """A load in progress that concurrent callers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.stale = False
+
+
+class TTLCache:
+    """Bounded in-process LRU cache with per-entry expiry
+
+    Concurrent misses for the same key are coalesced: only the first caller
+    runs the loader and the others wait for its result (single-flight).
+    ``None`` results are not cached, so a missing item is looked up again.
+    The cache is per process; other workers only see a write once their
+    entry expires, so the TTL bounds cross-worker staleness.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: str = ""):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value or None (only hits are counted)"""
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not None:
+                self.hits += 1
+            return value
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: Union[None, float, Callable[[Any], float]] = None,
+    ) -> Any:
+        """Return the cached value, loading it once on a miss
+
+        ``ttl`` overrides the default time to live; it may be a function of
+        the loaded value (e.g. seconds until a token expires).
+        """
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            self.misses += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+                # 読み込み中に無効化された値はキャッシュしない
+                if flight.error is None and not flight.stale:
+                    if ttl is None:
+                        entry_ttl = self.ttl
+                    elif callable(ttl):
+                        entry_ttl = ttl(flight.value)
+                    else:
+                        entry_ttl = ttl
+                    self._set_locked(key, flight.value, entry_ttl)
+            flight.done.set()
+        return flight.value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, optionally with its own time to live (seconds)"""
+        with self._lock:
+            self._set_locked(key, value, self.ttl if ttl is None else ttl)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a key, including any load of it that is still in flight"""
+        with self._lock:
+            self._entries.pop(key, None)
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.stale = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for flight in self._flights.values():
+                flight.stale = True
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def _get_locked(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_locked(self, key: Hashable, value: Any, ttl: float) -> None:
+        if value is None or ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
@@ -1,18 +1,47 @@
+from typing import Optional
+import os
+
 from .base import BaseDynamoDBOperations
+from .cache import TTLCache
 from .users import UserOperations
 from .postcards import PostcardOperations
 from .collections import CollectionOperations
 
+# プロフィールはほぼ不変なので長め、絵葉書は位置更新の間隔（約5秒）に合わせる
+CACHE_MAXSIZE = int(os.getenv("DYNAMODB_CACHE_MAXSIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+POSTCARD_CACHE_TTL = float(os.getenv("POSTCARD_CACHE_TTL", "5"))
+# 近くの絵葉書の候補は位置更新の1回分だけ共有する
+NEARBY_CACHE_TTL = float(os.getenv("NEARBY_CACHE_TTL", "5"))
+
 
 class DynamoDBClient(BaseDynamoDBOperations):
     """Main DynamoDB client that combines all operations"""
 
     def __init__(self):
         super().__init__()
+        self.user_cache = TTLCache(CACHE_MAXSIZE, USER_CACHE_TTL, name="user")
+        self.postcard_cache = TTLCache(
+            CACHE_MAXSIZE, POSTCARD_CACHE_TTL, name="postcard"
+        )
+        self.like_count_cache = TTLCache(
+            CACHE_MAXSIZE, POSTCARD_CACHE_TTL, name="like_count"
+        )
+        self.active_cache = TTLCache(1, NEARBY_CACHE_TTL, name="active_postcards")
+        self.nearby_cache = TTLCache(CACHE_MAXSIZE, NEARBY_CACHE_TTL, name="nearby")
         self.users = UserOperations(self)
         self.postcards = PostcardOperations(self)
         self.collections = CollectionOperations(self)
 
+    def cache_stats(self):
+        return [
+            self.user_cache.stats(),
+            self.postcard_cache.stats(),
+            self.like_count_cache.stats(),
+            self.active_cache.stats(),
+            self.nearby_cache.stats(),
+        ]
+
     # User operations
     def create_user(
         self, user_id: str, username: str, email: str, profile_image_url: str
@@ -37,6 +66,9 @@ class DynamoDBClient(BaseDynamoDBOperations):
     def get_postcard(self, postcard_id: str):
         return self.postcards.get_postcard(postcard_id)
 
+    def get_postcards(self, postcard_ids, attributes=None):
+        return self.postcards.get_postcards(postcard_ids, attributes)
+
     def update_postcard(self, postcard_id: str, image_url: str, text: str) -> bool:
         return self.postcards.update_postcard(postcard_id, image_url, text)
 
@@ -51,18 +83,65 @@ class DynamoDBClient(BaseDynamoDBOperations):
     def get_postcard_path(self, postcard_id: str):
         return self.postcards.get_postcard_path(postcard_id)
 
+    def get_path_version(self, postcard_id: str) -> str:
+        return self.postcards.get_path_version(postcard_id)
+
+    def get_postcard_path_page(
+        self,
+        postcard_id: str,
+        since: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        tolerance: Optional[float] = None,
+        fields=None,
+    ):
+        return self.postcards.get_postcard_path_page(
+            postcard_id, since, limit, cursor, tolerance, fields
+        )
+
     def get_nearby_postcards(self, lat: float, lon: float, radius: int = 1000):
         return self.postcards.get_nearby_postcards(lat, lon, radius)
 
-    def get_user_postcards(self, author_id: str):
-        return self.postcards.get_user_postcards(author_id)
+    def get_postcards_in_bounds(
+        self, min_lat: float, min_lon: float, max_lat: float, max_lon: float, zoom: int
+    ):
+        return self.postcards.get_postcards_in_bounds(
+            min_lat, min_lon, max_lat, max_lon, zoom
+        )
+
+    def get_active_postcards(self):
+        return self.postcards.get_active_postcards()
+
+    def get_active_snapshot(self):
+        return self.postcards.get_active_snapshot()
+
+    def get_user_postcards(
+        self,
+        author_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields=None,
+        include_path: bool = False,
+    ):
+        return self.postcards.get_user_postcards(
+            author_id, limit, cursor, fields, include_path
+        )
 
     # Collection operations
-    def collect_postcard(self, user_id: str, postcard_id: str) -> bool:
+    def collect_postcard(self, user_id: str, postcard_id: str) -> str:
         return self.collections.collect_postcard(user_id, postcard_id)
 
-    def get_user_collection(self, user_id: str):
-        return self.collections.get_user_collection(user_id)
+    def get_user_collection(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields=None,
+    ):
+        return self.collections.get_user_collection(user_id, limit, cursor, fields)
 
-    def like_postcard(self, user_id: str, postcard_id: str) -> bool:
+    def like_postcard(self, user_id: str, postcard_id: str) -> str:
         return self.collections.like_postcard(user_id, postcard_id)
+
+    def get_likes_count(self, postcard) -> int:
+        return self.collections.get_likes_count(postcard)
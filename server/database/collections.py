@@ -1,7 +1,34 @@
-from typing import List, Dict, Any
+import os
+import random
+from typing import Any, Dict, Optional, Sequence
 from boto3.dynamodb.conditions import Key, Attr
 from botocore.exceptions import ClientError
 
+from .base import UnprocessedKeysError
+
+LIKE_OK = "liked"
+LIKE_ALREADY_LIKED = "already_liked"
+LIKE_NOT_FOUND = "not_found"
+
+COLLECT_OK = "collected"
+COLLECT_NOT_FOUND = "not_found"
+COLLECT_ALREADY_COLLECTED = "already_collected"
+COLLECT_ALREADY_IN_COLLECTION = "already_in_collection"
+
+# いいね数がこの値に達した絵葉書はカウンタを LIKES#<n> に分散する
+LIKE_SHARD_PREFIX = "LIKES#"
+LIKE_SHARD_THRESHOLD = int(os.getenv("LIKE_SHARD_THRESHOLD", "1000"))
+LIKE_SHARD_COUNT = int(os.getenv("LIKE_SHARD_COUNT", "10"))
+
+COLLECTION_FIELDS = (
+    "postcard_id",
+    "image_url",
+    "text",
+    "created_at",
+    "author_id",
+    "likes_count",
+)
+
 
 class CollectionOperations:
     """Collection-related DynamoDB operations"""
@@ -9,103 +36,232 @@ class CollectionOperations:
     def __init__(self, client):
         self.client = client
 
-    def collect_postcard(self, user_id: str, postcard_id: str) -> bool:
-        """Add postcard to user's collection"""
-        try:
-            # First check if postcard exists and is available
-            postcard = self.client.postcards.get_postcard(postcard_id)
-            if not postcard or postcard.get("status") == "collected":
-                return False
-
-            # Add to collection
-            self.client.table.put_item(
-                Item={
-                    "PK": f"USER#{user_id}",
-                    "SK": f"COLLECTION#{postcard_id}",
-                    "user_id": user_id,
-                    "postcard_id": postcard_id,
-                    "collected_at": self.client._get_timestamp(),
-                },
-                ConditionExpression=Attr("PK").not_exists(),
-            )
+    def collect_postcard(self, user_id: str, postcard_id: str) -> str:
+        """Add postcard to user's collection in a single transaction
 
-            # Update postcard status
-            self.client.table.update_item(
-                Key={"PK": f"POSTCARD#{postcard_id}", "SK": "METADATA"},
-                UpdateExpression="SET #status = :status, updated_at = :updated_at",
-                ExpressionAttributeNames={"#status": "status"},
-                ExpressionAttributeValues={
-                    ":status": "collected",
-                    ":updated_at": self.client._get_timestamp(),
-                },
+        The postcard is flipped to ``collected`` only if it exists and has not
+        been collected yet, so two users racing cannot both collect it.
+        Returns COLLECT_OK, COLLECT_NOT_FOUND, COLLECT_ALREADY_COLLECTED or
+        COLLECT_ALREADY_IN_COLLECTION.
+        """
+        timestamp = self.client._get_timestamp()
+        try:
+            self.client._transact_write(
+                [
+                    {
+                        "Update": {
+                            "Key": {"PK": f"POSTCARD#{postcard_id}", "SK": "METADATA"},
+                            # 回収済みになった絵葉書は旅行中インデックスから外す
+                            "UpdateExpression": (
+                                "SET #status = :collected, updated_at = :updated_at "
+                                "REMOVE #index_pk, #index_sk"
+                            ),
+                            "ConditionExpression": (
+                                "attribute_exists(PK) AND #status <> :collected"
+                            ),
+                            "ExpressionAttributeNames": {
+                                "#status": "status",
+                                "#index_pk": "GSI-1-PK",
+                                "#index_sk": "GSI-1-SK",
+                            },
+                            "ExpressionAttributeValues": {
+                                ":collected": "collected",
+                                ":updated_at": timestamp,
+                            },
+                            "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+                        }
+                    },
+                    {
+                        "Put": {
+                            "Item": {
+                                "PK": f"USER#{user_id}",
+                                "SK": f"COLLECTION#{postcard_id}",
+                                "user_id": user_id,
+                                "postcard_id": postcard_id,
+                                "collected_at": timestamp,
+                            },
+                            "ConditionExpression": "attribute_not_exists(PK)",
+                        }
+                    },
+                ]
             )
-
-            return True
         except ClientError as e:
-            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
-                return False
+            if e.response["Error"]["Code"] == "TransactionCanceledException":
+                self.client.postcard_cache.invalidate(postcard_id)
+                reasons = e.response.get("CancellationReasons", [])
+                codes = self.client._cancellation_codes(e)
+                if codes[:1] == ["ConditionalCheckFailed"]:
+                    # ALL_OLD で返る旧アイテムの有無で「存在しない」と「回収済み」を区別する
+                    if reasons[0].get("Item"):
+                        return COLLECT_ALREADY_COLLECTED
+                    return COLLECT_NOT_FOUND
+                if codes[1:2] == ["ConditionalCheckFailed"]:
+                    return COLLECT_ALREADY_IN_COLLECTION
             self.client._handle_client_error(e, "collect_postcard")
 
-    def get_user_collection(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get user's postcard collection"""
+        self.client.postcard_cache.invalidate(postcard_id)
+        return COLLECT_OK
+
+    def get_user_collection(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """Get one page of user's postcard collection
+
+        Without ``limit`` the page holds all the remaining postcards.
+        The collected postcards are read with one BatchGetItem projecting
+        only the attributes behind ``fields``.
+        """
+        fields = list(fields or COLLECTION_FIELDS)
+        postcards = self.client.postcards
+        start_key = self.client._decode_list_cursor(
+            cursor, f"USER#{user_id}", "COLLECTION#"
+        )
+        query_kwargs = {
+            "KeyConditionExpression": Key("PK").eq(f"USER#{user_id}")
+            & Key("SK").begins_with("COLLECTION#"),
+            "ProjectionExpression": "postcard_id, collected_at",
+        }
+        if start_key:
+            query_kwargs["ExclusiveStartKey"] = start_key
+
         try:
-            response = self.client.table.query(
-                KeyConditionExpression=Key("PK").eq(f"USER#{user_id}")
-                & Key("SK").begins_with("COLLECTION#")
+            collected, last_key = self.client._query_list(limit, **query_kwargs)
+            items, unprocessed = postcards.get_postcards(
+                [item["postcard_id"] for item in collected],
+                postcards.field_attributes(fields),
             )
+            # 一部が欠けたページを返すとカーソルで読み飛ばされるため、失敗として返す
+            if unprocessed:
+                raise UnprocessedKeysError(unprocessed)
 
             collection_items = []
-            for item in response["Items"]:
-                postcard_id = item["postcard_id"]
-                postcard = self.client.postcards.get_postcard(postcard_id)
+            for item in collected:
+                postcard = items.get(item["postcard_id"])
                 if postcard:
                     collection_items.append(
                         {
-                            "postcard_id": postcard_id,
-                            "image_url": postcard["image_url"],
-                            "text": postcard["text"],
-                            "created_at": postcard["created_at"],
-                            "author_id": postcard["author_id"],
-                            "likes_count": postcard["likes_count"],
+                            **postcards.to_listed_postcard(postcard, fields),
                             "collected_at": item["collected_at"],
                         }
                     )
 
-            return collection_items
+            return {
+                "postcards": collection_items,
+                "next_cursor": self.client._encode_cursor(last_key),
+            }
         except ClientError as e:
             self.client._handle_client_error(e, "get_user_collection")
-            return []
+            return {"postcards": [], "next_cursor": None}
 
-    def like_postcard(self, user_id: str, postcard_id: str) -> bool:
-        """Like a postcard"""
-        try:
-            # Check if already liked
-            existing_like = self.client.table.get_item(
-                Key={"PK": f"USER#{user_id}", "SK": f"LIKE#{postcard_id}"}
-            )
+    def like_postcard(self, user_id: str, postcard_id: str) -> str:
+        """Like a postcard in a single transaction
 
-            if existing_like.get("Item"):
-                return False  # Already liked
+        Returns LIKE_OK, LIKE_ALREADY_LIKED or LIKE_NOT_FOUND. The like record
+        is written only if it does not exist yet, together with the counter
+        increment, so a like is counted exactly once.
+        """
+        postcard = self.client.postcards.get_postcard(postcard_id)
+        if not postcard:
+            return LIKE_NOT_FOUND
 
-            # Add like record
-            self.client.table.put_item(
-                Item={
+        shards = int(postcard.get("like_shards", 0))
+        if not shards and int(postcard.get("likes_count", 0)) >= LIKE_SHARD_THRESHOLD:
+            shards = self.enable_like_sharding(postcard_id)
+
+        like_record = {
+            "Put": {
+                "Item": {
                     "PK": f"USER#{user_id}",
                     "SK": f"LIKE#{postcard_id}",
                     "user_id": user_id,
                     "postcard_id": postcard_id,
                     "liked_at": self.client._get_timestamp(),
+                },
+                "ConditionExpression": "attribute_not_exists(PK)",
+            }
+        }
+        if shards:
+            # 人気の絵葉書はカウンタを分散し、METADATA への書き込み競合を避ける
+            counter = {
+                "Update": {
+                    "Key": {
+                        "PK": f"POSTCARD#{postcard_id}",
+                        "SK": f"{LIKE_SHARD_PREFIX}{random.randrange(shards):03d}",
+                    },
+                    "UpdateExpression": "ADD likes_count :inc",
+                    "ExpressionAttributeValues": {":inc": 1},
                 }
-            )
+            }
+        else:
+            counter = {
+                "Update": {
+                    "Key": {"PK": f"POSTCARD#{postcard_id}", "SK": "METADATA"},
+                    "UpdateExpression": "ADD likes_count :inc",
+                    "ConditionExpression": "attribute_exists(PK)",
+                    "ExpressionAttributeValues": {":inc": 1},
+                }
+            }
+
+        try:
+            self.client._transact_write([like_record, counter])
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "TransactionCanceledException":
+                codes = self.client._cancellation_codes(e)
+                if codes[:1] == ["ConditionalCheckFailed"]:
+                    return LIKE_ALREADY_LIKED
+                if codes[1:2] == ["ConditionalCheckFailed"]:
+                    self.client.postcard_cache.invalidate(postcard_id)
+                    return LIKE_NOT_FOUND
+            self.client._handle_client_error(e, "like_postcard")
 
-            # Increment likes count
-            self.client.table.update_item(
+        if shards:
+            self.client.like_count_cache.invalidate(postcard_id)
+        else:
+            self.client.postcard_cache.invalidate(postcard_id)
+        return LIKE_OK
+
+    def enable_like_sharding(
+        self, postcard_id: str, shards: int = LIKE_SHARD_COUNT
+    ) -> int:
+        """Switch a postcard's like counter to sharded mode"""
+        try:
+            response = self.client.table.update_item(
                 Key={"PK": f"POSTCARD#{postcard_id}", "SK": "METADATA"},
-                UpdateExpression="ADD likes_count :inc",
-                ExpressionAttributeValues={":inc": 1},
+                UpdateExpression="SET like_shards = if_not_exists(like_shards, :shards)",
+                ConditionExpression=Attr("PK").exists(),
+                ExpressionAttributeValues={":shards": shards},
+                ReturnValues="UPDATED_NEW",
             )
+            self.client.postcard_cache.invalidate(postcard_id)
+            return int(response["Attributes"]["like_shards"])
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return 0
+            self.client._handle_client_error(e, "enable_like_sharding")
+
+    def get_likes_count(self, postcard: Dict[str, Any]) -> int:
+        """Get the displayed like count, summing counter shards if enabled"""
+        likes_count = int(postcard.get("likes_count", 0))
+        if not postcard.get("like_shards"):
+            return likes_count
 
-            return True
+        postcard_id = postcard["postcard_id"]
+        return likes_count + self.client.like_count_cache.get_or_load(
+            postcard_id, lambda: self._sum_like_shards(postcard_id)
+        )
+
+    def _sum_like_shards(self, postcard_id: str) -> int:
+        try:
+            response = self.client.table.query(
+                KeyConditionExpression=Key("PK").eq(f"POSTCARD#{postcard_id}")
+                & Key("SK").begins_with(LIKE_SHARD_PREFIX),
+                ProjectionExpression="likes_count",
+            )
+            return sum(int(item.get("likes_count", 0)) for item in response["Items"])
         except ClientError as e:
-            self.client._handle_client_error(e, "like_postcard")
-            return False
+            self.client._handle_client_error(e, "get_likes_count")
+            return 0
@@ -0,0 +1,130 @@
+"""Compact encoding helpers for postcard travel paths
+
+Path chunks store coordinates and arrival times as delta-encoded integers
+using the Google Encoded Polyline variable-length format. Encoding one
+more value only needs the previous value, so a chunk can be appended to
+without decoding it, and decoding is done on whole strings with NumPy.
+"""
+
+from datetime import datetime, timedelta
+from typing import Iterable
+
+import numpy as np
+
+# 緯度経度は 1e-5 度（約1m）単位の整数として保存する
+COORD_SCALE = 100_000
+
+EARTH_RADIUS_M = 6_371_000.0
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+_EPOCH = datetime(1970, 1, 1)
+
+
+def timestamp_to_micros(timestamp: str) -> int:
+    """Convert a fixed-width UTC timestamp to microseconds since the epoch"""
+    parsed = datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    return (parsed - _EPOCH) // timedelta(microseconds=1)
+
+
+def micros_to_timestamp(micros: int) -> str:
+    """Convert microseconds since the epoch to a fixed-width UTC timestamp"""
+    return (_EPOCH + timedelta(microseconds=int(micros))).strftime(TIMESTAMP_FORMAT)
+
+
+def encode_value(value: int) -> str:
+    """Encode one signed integer in polyline format"""
+    value = ~(value << 1) if value < 0 else value << 1
+    chars = []
+    while value >= 0x20:
+        chars.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    chars.append(chr(value + 63))
+    return "".join(chars)
+
+
+def encode_deltas(values: Iterable[int], previous: int = 0) -> str:
+    """Delta-encode a sequence of integers, starting from ``previous``"""
+    encoded = []
+    for value in values:
+        encoded.append(encode_value(value - previous))
+        previous = value
+    return "".join(encoded)
+
+
+def decode_values(encoded: str) -> np.ndarray:
+    """Decode a polyline string into its raw (non-accumulated) integers"""
+    if not encoded:
+        return np.zeros(0, dtype=np.int64)
+
+    chunks = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64)
+    chunks -= 63
+    ends = np.flatnonzero(chunks < 0x20)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+
+    # 各文字が属する値の中での位置（5ビット単位のシフト量）
+    lengths = ends - starts + 1
+    positions = np.arange(len(chunks)) - np.repeat(starts, lengths)
+    shifted = (chunks & 0x1F) << (5 * positions)
+    raw = np.add.reduceat(shifted, starts)
+
+    return np.where(raw & 1, ~(raw >> 1), raw >> 1)
+
+
+def decode_deltas(encoded: str) -> np.ndarray:
+    """Decode a delta-encoded polyline string back into absolute integers"""
+    return np.cumsum(decode_values(encoded))
+
+
+def encode_coords(lat_e5: int, lon_e5: int, prev_lat_e5: int, prev_lon_e5: int) -> str:
+    """Encode one coordinate pair relative to the previous one"""
+    return encode_value(lat_e5 - prev_lat_e5) + encode_value(lon_e5 - prev_lon_e5)
+
+
+def decode_coords(encoded: str) -> np.ndarray:
+    """Decode an interleaved lat/lon polyline into an (n, 2) array of degrees"""
+    deltas = decode_values(encoded).reshape(-1, 2)
+    return np.cumsum(deltas, axis=0) / COORD_SCALE
+
+
+def simplify(lat: np.ndarray, lon: np.ndarray, tolerance_m: float) -> np.ndarray:
+    """Douglas-Peucker simplification, returning indices of the kept points
+
+    Distances are measured in meters on a local equirectangular projection,
+    which is accurate enough at the scale of a single journey. Each split
+    step computes the distances of a whole segment with NumPy.
+    """
+    n = len(lat)
+    if n <= 2 or tolerance_m <= 0:
+        return np.arange(n)
+
+    lat0 = np.radians(np.mean(lat))
+    x = np.radians(lon) * np.cos(lat0) * EARTH_RADIUS_M
+    y = np.radians(lat) * EARTH_RADIUS_M
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        dx = x[end] - x[start]
+        dy = y[end] - y[start]
+        px = x[start + 1 : end] - x[start]
+        py = y[start + 1 : end] - y[start]
+        seg_len = np.hypot(dx, dy)
+        if seg_len == 0:
+            distances = np.hypot(px, py)
+        else:
+            distances = np.abs(dx * py - dy * px) / seg_len
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance_m:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return np.flatnonzero(keep)
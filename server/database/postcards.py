@@ -1,7 +1,120 @@
-from typing import Optional, Dict, Any, List
+import itertools
+import os
+from typing import Optional, Dict, Any, Iterator, List, Sequence, Tuple
 from boto3.dynamodb.conditions import Key, Attr
 from botocore.exceptions import ClientError
-from decimal import Decimal
+
+import numpy as np
+
+from .base import UnprocessedKeysError
+from .polyline import (
+    COORD_SCALE,
+    decode_coords,
+    decode_deltas,
+    encode_coords,
+    encode_deltas,
+    encode_value,
+    micros_to_timestamp,
+    simplify,
+    timestamp_to_micros,
+)
+from .spatial import (
+    MAP_CLUSTER_THRESHOLD,
+    ActiveSnapshot,
+    build_snapshot,
+    cell_candidates,
+    cluster,
+    cluster_grid_size,
+    haversine,
+    in_bounds,
+    nearby_cell_key,
+)
+from .wire import serialize_item
+
+# 旅の軌跡は PATHCHUNK#<最初の到着時刻> のチャンク単位でまとめて保存する
+PATH_CHUNK_PREFIX = "PATHCHUNK#"
+PATH_CHUNK_END = "PATHCHUNK$"
+PATH_CHUNK_SIZE = int(os.getenv("PATH_CHUNK_SIZE", "500"))
+PATH_APPEND_RETRIES = 3
+
+# 回収されていない絵葉書だけが持つ疎な GSI キー（回収時に削除する）
+ACTIVE_INDEX_NAME = "GSI-1"
+ACTIVE_INDEX_PK = "POSTCARD#ACTIVE"
+ACTIVE_SNAPSHOT_KEY = "active"
+
+NEARBY_LIMIT = 10
+
+# 投稿者ごとの一覧は USER#<投稿者> / POSTCARD#<作成日時>#<ID> のポインタで引く
+AUTHOR_POINTER_PREFIX = "POSTCARD#"
+
+# 一覧の各フィールドを組み立てるのに必要な属性（ProjectionExpression に使う）
+POSTCARD_FIELD_ATTRIBUTES = {
+    "postcard_id": ("postcard_id",),
+    "image_url": ("image_url",),
+    "text": ("text",),
+    "created_at": ("created_at",),
+    "author_id": ("author_id",),
+    "likes_count": ("likes_count", "like_shards"),
+    "status": ("status",),
+    "current_position": ("current_lat", "current_lon"),
+}
+
+# 経由地の各フィールドを組み立てるのに必要なチャンクの属性
+PATH_POINT_FIELDS = ("prefecture", "lat", "lon", "arrival_time")
+PATH_FIELD_ATTRIBUTES = {
+    "prefecture": ("prefectures",),
+    "lat": ("coords",),
+    "lon": ("coords",),
+    "arrival_time": (),
+}
+
+
+def author_pointer_key(author_id: str, created_at: str, postcard_id: str):
+    return {
+        "PK": f"USER#{author_id}",
+        "SK": f"{AUTHOR_POINTER_PREFIX}{created_at}#{postcard_id}",
+    }
+
+
+def author_pointer(author_id: str, created_at: str, postcard_id: str):
+    """Item that lists a postcard under its author, newest last by sort key"""
+    return {
+        **author_pointer_key(author_id, created_at, postcard_id),
+        "postcard_id": postcard_id,
+        "created_at": created_at,
+    }
+
+
+def to_nearby_postcard(item: Dict[str, Any], distance: float) -> Dict[str, Any]:
+    """Shape a postcard item as a nearby postcard seen from ``distance`` meters"""
+    return {
+        "postcard_id": item["postcard_id"],
+        "image_url": item["image_url"],
+        "text": item["text"],
+        "current_position": {
+            "lat": float(item["current_lat"]),
+            "lon": float(item["current_lon"]),
+        },
+        "next_destination": {
+            "lat": float(item["current_lat"]) + 0.01,
+            "lon": float(item["current_lon"]) + 0.01,
+        },
+        "last_updated_at": item["updated_at"],
+        "distance_meters": round(distance),
+    }
+
+
+def to_map_postcard(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a postcard item as a marker on the map"""
+    return {
+        "postcard_id": item["postcard_id"],
+        "image_url": item["image_url"],
+        "current_position": {
+            "lat": float(item["current_lat"]),
+            "lon": float(item["current_lon"]),
+        },
+        "last_updated_at": item["updated_at"],
+    }
 
 
 class PostcardOperations:
@@ -9,6 +122,7 @@ class PostcardOperations:
 
     def __init__(self, client):
         self.client = client
+        self._snapshot_versions = itertools.count(1)
 
     def create_postcard(
         self, author_id: str, image_url: str, text: str, lat: float, lon: float
@@ -18,21 +132,35 @@ class PostcardOperations:
         timestamp = self.client._get_timestamp()
 
         try:
-            self.client.table.put_item(
-                Item={
-                    "PK": f"POSTCARD#{postcard_id}",
-                    "SK": "METADATA",
-                    "postcard_id": postcard_id,
-                    "author_id": author_id,
-                    "image_url": image_url,
-                    "text": text,
-                    "created_at": timestamp,
-                    "updated_at": timestamp,
-                    "likes_count": 0,
-                    "status": "traveling",  # traveling, stopped, collected
-                    "current_lat": Decimal(str(lat)),
-                    "current_lon": Decimal(str(lon)),
-                }
+            # 本体と投稿者ごとの一覧用ポインタを同時に書き込む
+            self.client._transact_write(
+                [
+                    {
+                        "Put": {
+                            "Item": {
+                                "PK": f"POSTCARD#{postcard_id}",
+                                "SK": "METADATA",
+                                "postcard_id": postcard_id,
+                                "author_id": author_id,
+                                "image_url": image_url,
+                                "text": text,
+                                "created_at": timestamp,
+                                "updated_at": timestamp,
+                                "likes_count": 0,
+                                "status": "traveling",  # traveling, stopped, collected
+                                "current_lat": float(lat),
+                                "current_lon": float(lon),
+                                "GSI-1-PK": ACTIVE_INDEX_PK,
+                                "GSI-1-SK": postcard_id,
+                            }
+                        }
+                    },
+                    {
+                        "Put": {
+                            "Item": author_pointer(author_id, timestamp, postcard_id)
+                        }
+                    },
+                ]
             )
 
             # 初期位置を旅の軌跡として記録
@@ -47,7 +175,12 @@ class PostcardOperations:
             return {"postcard_id": "", "created_at": ""}
 
     def get_postcard(self, postcard_id: str) -> Optional[Dict[str, Any]]:
-        """Get postcard details"""
+        """Get postcard details (read through the postcard cache)"""
+        return self.client.postcard_cache.get_or_load(
+            postcard_id, lambda: self._get_postcard_item(postcard_id)
+        )
+
+    def _get_postcard_item(self, postcard_id: str) -> Optional[Dict[str, Any]]:
         try:
             response = self.client.table.get_item(
                 Key={"PK": f"POSTCARD#{postcard_id}", "SK": "METADATA"}
@@ -57,6 +190,45 @@ class PostcardOperations:
             self.client._handle_client_error(e, "get_postcard")
             return None
 
+    def get_postcards(
+        self, postcard_ids: List[str], attributes: Optional[Sequence[str]] = None
+    ) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """Get several postcards by id (cache first, the rest with BatchGetItem)
+
+        Returns the found postcards keyed by id, and the ids DynamoDB left
+        unprocessed (throttled) after the retries. Ids that do not exist are
+        in neither. With ``attributes`` only those are read, and the partial
+        items are not cached.
+        """
+        postcards: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for postcard_id in dict.fromkeys(postcard_ids):
+            cached = self.client.postcard_cache.get(postcard_id)
+            if cached is not None:
+                postcards[postcard_id] = cached
+            else:
+                missing.append(postcard_id)
+
+        if missing:
+            try:
+                items, unprocessed_keys = self.client._batch_get(
+                    [
+                        {"PK": f"POSTCARD#{postcard_id}", "SK": "METADATA"}
+                        for postcard_id in missing
+                    ],
+                    attributes,
+                )
+            except ClientError as e:
+                self.client._handle_client_error(e, "get_postcards")
+                return postcards, []
+            for item in items:
+                postcards[item["postcard_id"]] = item
+                if not attributes:
+                    self.client.postcard_cache.set(item["postcard_id"], item)
+            unprocessed = [key["PK"].split("#", 1)[1] for key in unprocessed_keys]
+            return postcards, unprocessed
+        return postcards, []
+
     def update_postcard(self, postcard_id: str, image_url: str, text: str) -> bool:
         """Update postcard content"""
         try:
@@ -73,6 +245,7 @@ class PostcardOperations:
                 },
                 ConditionExpression=Attr("PK").exists(),
             )
+            self.client.postcard_cache.invalidate(postcard_id)
             return True
         except ClientError as e:
             if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
@@ -80,167 +253,605 @@ class PostcardOperations:
             self.client._handle_client_error(e, "update_postcard")
 
     def delete_postcard(self, postcard_id: str) -> bool:
-        """Delete postcard"""
+        """Delete postcard together with its author pointer"""
+        postcard = self.get_postcard(postcard_id)
+        if not postcard:
+            return False
+
         try:
-            self.client.table.delete_item(
-                Key={"PK": f"POSTCARD#{postcard_id}", "SK": "METADATA"},
-                ConditionExpression=Attr("PK").exists(),
+            self.client._transact_write(
+                [
+                    {
+                        "Delete": {
+                            "Key": {"PK": f"POSTCARD#{postcard_id}", "SK": "METADATA"},
+                            "ConditionExpression": "attribute_exists(PK)",
+                        }
+                    },
+                    {
+                        "Delete": {
+                            "Key": author_pointer_key(
+                                postcard["author_id"],
+                                postcard["created_at"],
+                                postcard_id,
+                            )
+                        }
+                    },
+                ]
             )
+            self.client.postcard_cache.invalidate(postcard_id)
             return True
         except ClientError as e:
-            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            if e.response["Error"]["Code"] == "TransactionCanceledException":
+                self.client.postcard_cache.invalidate(postcard_id)
                 return False
             self.client._handle_client_error(e, "delete_postcard")
 
     def add_path_point(
         self, postcard_id: str, prefecture: str, lat: float, lon: float
     ) -> bool:
-        """Add a path point to postcard's journey"""
+        """Append a path point to the postcard's latest path chunk"""
+        arrival_time = self.client._get_timestamp()
+        time_us = timestamp_to_micros(arrival_time)
+        lat_e5 = round(lat * COORD_SCALE)
+        lon_e5 = round(lon * COORD_SCALE)
+
         try:
-            point_id = self.client._generate_id()
-            self.client.table.put_item(
-                Item={
-                    "PK": f"POSTCARD#{postcard_id}",
-                    "SK": f"PATH#{point_id}",
-                    "postcard_id": postcard_id,
-                    "prefecture": prefecture,
-                    "lat": Decimal(str(lat)),
-                    "lon": Decimal(str(lon)),
-                    "arrival_time": self.client._get_timestamp(),
-                }
-            )
-            return True
+            # 楽観的ロック: 最新チャンクの件数が変わっていたら読み直して再試行
+            for _ in range(PATH_APPEND_RETRIES):
+                latest = self._get_latest_path_chunk(postcard_id)
+                try:
+                    if latest is None or int(latest["n"]) >= PATH_CHUNK_SIZE:
+                        self._put_path_chunk(
+                            postcard_id,
+                            [prefecture],
+                            [lat_e5],
+                            [lon_e5],
+                            [time_us],
+                        )
+                    else:
+                        self._append_to_path_chunk(
+                            latest, prefecture, lat_e5, lon_e5, time_us
+                        )
+                    return True
+                except ClientError as e:
+                    if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                        raise
+            return False
         except ClientError as e:
             self.client._handle_client_error(e, "add_path_point")
             return False
 
-    def get_postcard_path(self, postcard_id: str) -> List[Dict[str, Any]]:
-        """Get postcard's travel path"""
+    def _get_latest_path_chunk(self, postcard_id: str) -> Optional[Dict[str, Any]]:
+        """Get the newest path chunk, which is the one new points are appended to"""
+        return next(
+            self.client._query(
+                KeyConditionExpression="PK = :pk AND begins_with(SK, :prefix)",
+                ExpressionAttributeValues={
+                    ":pk": f"POSTCARD#{postcard_id}",
+                    ":prefix": PATH_CHUNK_PREFIX,
+                },
+                ScanIndexForward=False,
+                Limit=1,
+            ),
+            None,
+        )
+
+    def get_path_version(self, postcard_id: str) -> str:
+        """Identify the current state of a path by its newest chunk and size
+
+        Points are only ever appended to the newest chunk, so its sort key
+        and point count change whenever the path does.
+        """
         try:
-            response = self.client.table.query(
-                KeyConditionExpression=Key("PK").eq(f"POSTCARD#{postcard_id}")
-                & Key("SK").begins_with("PATH#"),
-                ScanIndexForward=True,  # Sort by SK ascending
+            latest = next(
+                self.client._query(
+                    KeyConditionExpression="PK = :pk AND begins_with(SK, :prefix)",
+                    ExpressionAttributeValues={
+                        ":pk": f"POSTCARD#{postcard_id}",
+                        ":prefix": PATH_CHUNK_PREFIX,
+                    },
+                    ScanIndexForward=False,
+                    Limit=1,
+                    ProjectionExpression="SK, n",
+                ),
+                None,
             )
+        except ClientError as e:
+            self.client._handle_client_error(e, "get_path_version")
+            return ""
+        return f"{latest['SK']}:{latest['n']}" if latest else ""
 
-            path_points = []
-            for item in response["Items"]:
-                path_points.append(
-                    {
-                        "prefecture": item["prefecture"],
-                        "lat": float(item["lat"]),
-                        "lon": float(item["lon"]),
-                        "arrival_time": item["arrival_time"],
-                    }
-                )
+    def _put_path_chunk(
+        self,
+        postcard_id: str,
+        prefectures: List[str],
+        lat_e5: List[int],
+        lon_e5: List[int],
+        times_us: List[int],
+        replace_n: Optional[int] = None,
+    ) -> None:
+        """Create a new path chunk holding the given points
 
-            return path_points
+        With ``replace_n``, an existing chunk with the same sort key is
+        overwritten as long as it still holds that many points.
+        """
+        first_time = micros_to_timestamp(times_us[0])
+        coords = "".join(
+            encode_coords(lat, lon, prev_lat, prev_lon)
+            for lat, lon, prev_lat, prev_lon in zip(
+                lat_e5, lon_e5, [0] + lat_e5[:-1], [0] + lon_e5[:-1]
+            )
+        )
+        self.client.raw_client.put_item(
+            TableName=self.client.table_name,
+            Item=serialize_item(
+                {
+                    "PK": f"POSTCARD#{postcard_id}",
+                    "SK": f"{PATH_CHUNK_PREFIX}{first_time}",
+                    "postcard_id": postcard_id,
+                    "n": len(times_us),
+                    "coords": coords,
+                    "times": encode_deltas(times_us),
+                    "prefectures": prefectures,
+                    "first_time": first_time,
+                    "last_time": micros_to_timestamp(times_us[-1]),
+                    "last_lat_e5": lat_e5[-1],
+                    "last_lon_e5": lon_e5[-1],
+                    "last_time_us": times_us[-1],
+                }
+            ),
+            **(
+                {
+                    "ConditionExpression": "attribute_not_exists(SK) OR n = :n",
+                    "ExpressionAttributeValues": serialize_item({":n": replace_n}),
+                }
+                if replace_n is not None
+                else {"ConditionExpression": "attribute_not_exists(SK)"}
+            ),
+        )
+
+    def _append_to_path_chunk(
+        self,
+        chunk: Dict[str, Any],
+        prefecture: str,
+        lat_e5: int,
+        lon_e5: int,
+        time_us: int,
+    ) -> None:
+        """Append one point to an existing chunk if nobody else appended first"""
+        last_time_us = int(chunk["last_time_us"])
+        # 時刻が逆行した場合でも差分が負にならないよう直前の時刻に揃える
+        time_us = max(time_us, last_time_us)
+        self.client.raw_client.update_item(
+            TableName=self.client.table_name,
+            Key=serialize_item({"PK": chunk["PK"], "SK": chunk["SK"]}),
+            UpdateExpression=(
+                "SET coords = :coords, #times = :times, "
+                "prefectures = list_append(prefectures, :prefecture), "
+                "n = :new_n, last_time = :last_time, last_lat_e5 = :lat, "
+                "last_lon_e5 = :lon, last_time_us = :time_us"
+            ),
+            ConditionExpression="n = :n",
+            ExpressionAttributeNames={"#times": "times"},
+            ExpressionAttributeValues=serialize_item(
+                {
+                    ":n": chunk["n"],
+                    ":coords": chunk["coords"]
+                    + encode_coords(
+                        lat_e5,
+                        lon_e5,
+                        int(chunk["last_lat_e5"]),
+                        int(chunk["last_lon_e5"]),
+                    ),
+                    ":times": chunk["times"] + encode_value(time_us - last_time_us),
+                    ":prefecture": [prefecture],
+                    ":new_n": int(chunk["n"]) + 1,
+                    ":last_time": micros_to_timestamp(time_us),
+                    ":lat": lat_e5,
+                    ":lon": lon_e5,
+                    ":time_us": time_us,
+                }
+            ),
+        )
+
+    def get_postcard_path(self, postcard_id: str) -> List[Dict[str, Any]]:
+        """Get postcard's whole travel path in chronological order"""
+        return self.get_postcard_path_page(postcard_id)["path"]
+
+    def get_postcard_path_page(
+        self,
+        postcard_id: str,
+        since: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        tolerance: Optional[float] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """Get one page of postcard's travel path
+
+        Only points that arrived strictly after ``since`` are returned, so
+        clients can fetch new points incrementally. ``next_cursor`` is set
+        when more points remain. ``tolerance`` (meters) applies
+        Douglas-Peucker simplification to the returned page. ``fields``
+        limits the point fields, and chunk attributes behind the others are
+        not read.
+        """
+        fields = [
+            field
+            for field in PATH_POINT_FIELDS
+            if field in (fields or PATH_POINT_FIELDS)
+        ]
+        # 到着時刻は since と cursor の判定に、座標は簡略化に常に必要
+        attributes = ["SK", "times"]
+        for field in fields:
+            attributes.extend(PATH_FIELD_ATTRIBUTES[field])
+        if tolerance:
+            attributes.append("coords")
+
+        start_sk, skip = self._decode_path_cursor(cursor)
+        since_us = None
+        if since:
+            since = self.client._normalize_timestamp(since)
+            since_us = timestamp_to_micros(since)
+
+        try:
+            if since and start_sk is None:
+                start_sk = self._find_path_chunk_at(postcard_id, since)
+
+            prefectures: List[str] = []
+            coords: List[np.ndarray] = []
+            times: List[np.ndarray] = []
+            count = 0
+            next_cursor = None
+
+            for chunk in self._iter_path_chunks(
+                postcard_id, start_sk, limit, attributes
+            ):
+                offset = skip if chunk["SK"] == start_sk else 0
+                if limit is not None and count >= limit:
+                    next_cursor = {"sk": chunk["SK"], "i": offset}
+                    break
+
+                chunk_times = decode_deltas(chunk["times"])
+                indices = np.arange(offset, len(chunk_times))
+                if since_us is not None:
+                    indices = indices[chunk_times[indices] > since_us]
+                if limit is not None and len(indices) > limit - count:
+                    next_cursor = {"sk": chunk["SK"], "i": int(indices[limit - count])}
+                    indices = indices[: limit - count]
+
+                if "prefectures" in chunk:
+                    chunk_prefectures = chunk["prefectures"]
+                    prefectures.extend(chunk_prefectures[i] for i in indices)
+                if "coords" in chunk:
+                    coords.append(decode_coords(chunk["coords"])[indices])
+                times.append(chunk_times[indices])
+                count += len(indices)
+                if next_cursor:
+                    break
+
+            return {
+                "path": self._build_path_points(
+                    prefectures, coords, times, tolerance, fields
+                ),
+                "next_cursor": self.client._encode_cursor(next_cursor),
+            }
         except ClientError as e:
             self.client._handle_client_error(e, "get_postcard_path")
+            return {"path": [], "next_cursor": None}
+
+    def _decode_path_cursor(self, cursor: Optional[str]) -> Tuple[Optional[str], int]:
+        """Decode a path cursor into (chunk sort key, index within chunk)"""
+        position = self.client._decode_cursor(cursor)
+        if position is None:
+            return None, 0
+        try:
+            start_sk = str(position["sk"])
+            skip = int(position["i"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+        if not start_sk.startswith(PATH_CHUNK_PREFIX) or skip < 0:
+            raise ValueError("Invalid cursor")
+        return start_sk, skip
+
+    def _find_path_chunk_at(self, postcard_id: str, timestamp: str) -> Optional[str]:
+        """Find the sort key of the chunk that contains the given time"""
+        chunk = next(
+            self.client._query(
+                KeyConditionExpression="PK = :pk AND SK BETWEEN :start AND :end",
+                ExpressionAttributeValues={
+                    ":pk": f"POSTCARD#{postcard_id}",
+                    ":start": PATH_CHUNK_PREFIX,
+                    ":end": f"{PATH_CHUNK_PREFIX}{timestamp}$",
+                },
+                ScanIndexForward=False,
+                Limit=1,
+                ProjectionExpression="SK",
+            ),
+            None,
+        )
+        return chunk["SK"] if chunk else None
+
+    def _iter_path_chunks(
+        self,
+        postcard_id: str,
+        start_sk: Optional[str],
+        limit: Optional[int],
+        attributes: Optional[Sequence[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate path chunks in chronological order, starting at start_sk"""
+        values = {":pk": f"POSTCARD#{postcard_id}"}
+        if start_sk:
+            sort_key_condition = "SK BETWEEN :start AND :end"
+            values.update({":start": start_sk, ":end": PATH_CHUNK_END})
+        else:
+            sort_key_condition = "begins_with(SK, :prefix)"
+            values[":prefix"] = PATH_CHUNK_PREFIX
+
+        query_kwargs = {
+            "KeyConditionExpression": f"PK = :pk AND {sort_key_condition}",
+            "ExpressionAttributeValues": values,
+            "ScanIndexForward": True,
+        }
+        if attributes:
+            query_kwargs.update(self.client._projection(attributes))
+        if limit is not None:
+            # 必要な件数を満たすチャンク数だけ読む
+            query_kwargs["Limit"] = limit // PATH_CHUNK_SIZE + 2
+
+        return self.client._query(**query_kwargs)
+
+    @staticmethod
+    def _build_path_points(
+        prefectures: List[str],
+        coords: List[np.ndarray],
+        times: List[np.ndarray],
+        tolerance: Optional[float],
+        fields: Sequence[str] = PATH_POINT_FIELDS,
+    ) -> List[Dict[str, Any]]:
+        """Convert decoded chunk arrays to the API path point shape"""
+        if not times:
             return []
 
+        all_times = np.concatenate(times)
+        indices = range(len(all_times))
+        columns: Dict[str, Any] = {"prefecture": prefectures}
+        if coords:
+            all_coords = np.round(np.concatenate(coords), 5)
+            if tolerance:
+                indices = simplify(all_coords[:, 0], all_coords[:, 1], tolerance)
+            columns["lat"] = all_coords[:, 0].tolist()
+            columns["lon"] = all_coords[:, 1].tolist()
+
+        points = []
+        for i in indices:
+            point = {}
+            for field in fields:
+                if field == "arrival_time":
+                    point[field] = micros_to_timestamp(all_times[i])
+                else:
+                    point[field] = columns[field][i]
+            points.append(point)
+        return points
+
     def get_nearby_postcards(
         self, lat: float, lon: float, radius: int = 1000
     ) -> List[Dict[str, Any]]:
-        """Get postcards near a location with actual distance calculation"""
-        import math
+        """Get active postcards within ``radius`` meters, nearest first
 
-        def calculate_distance(
-            lat1: float, lon1: float, lat2: float, lon2: float
-        ) -> float:
-            """Calculate distance between two points using Haversine formula (returns meters)"""
-            R = 6371000  # Earth's radius in meters
+        Queries are snapped to a grid cell and radius bucket whose candidate
+        set is computed once per tick and shared; only the distance ranking
+        runs per request.
+        """
+        try:
+            snapshot = self.get_active_snapshot()
+        except ClientError as e:
+            self.client._handle_client_error(e, "get_nearby_postcards")
+            return []
 
-            lat1_rad = math.radians(lat1)
-            lat2_rad = math.radians(lat2)
-            delta_lat = math.radians(lat2 - lat1)
-            delta_lon = math.radians(lon2 - lon1)
+        key = (snapshot.version, *nearby_cell_key(lat, lon, radius))
+        candidates = self.client.nearby_cache.get_or_load(
+            key, lambda: self._get_cell_candidates(snapshot, key[1:])
+        )
+        return self._rank_nearby(candidates, lat, lon, radius)
 
-            a = math.sin(delta_lat / 2) * math.sin(delta_lat / 2) + math.cos(
-                lat1_rad
-            ) * math.cos(lat2_rad) * math.sin(delta_lon / 2) * math.sin(delta_lon / 2)
-            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    def get_cached_nearby_postcards(
+        self, lat: float, lon: float, radius: int = 1000
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Answer a nearby query from the cache only (None on a miss)"""
+        snapshot = self.client.active_cache.get(ACTIVE_SNAPSHOT_KEY)
+        if snapshot is None:
+            return None
+        key = (snapshot.version, *nearby_cell_key(lat, lon, radius))
+        candidates = self.client.nearby_cache.get(key)
+        if candidates is None:
+            return None
+        return self._rank_nearby(candidates, lat, lon, radius)
 
-            return R * c
+    def get_postcards_in_bounds(
+        self,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        zoom: int,
+    ) -> Dict[str, Any]:
+        """Get the active postcards inside a bounding box for a map view
 
+        Up to ``MAP_CLUSTER_THRESHOLD`` postcards are returned individually;
+        beyond that they are grouped on a grid sized for the zoom level and
+        capped per side, so the response stays bounded at any zoom.
+        """
         try:
-            response = self.client.table.scan(
-                FilterExpression=Attr("SK").eq("METADATA")
-                & (Attr("status").eq("traveling") | Attr("status").eq("stopped"))
+            snapshot = self.get_active_snapshot()
+        except ClientError as e:
+            self.client._handle_client_error(e, "get_postcards_in_bounds")
+            return {"postcards": [], "clusters": [], "total": 0}
+
+        indices = in_bounds(snapshot, min_lat, min_lon, max_lat, max_lon)
+        if len(indices) <= MAP_CLUSTER_THRESHOLD:
+            singles, clusters = indices, []
+        else:
+            cell_deg = cluster_grid_size(min_lat, min_lon, max_lat, max_lon, zoom)
+            singles, clusters = cluster(
+                snapshot.lat[indices], snapshot.lon[indices], cell_deg
             )
+            singles = indices[singles]
 
-            nearby_postcards = []
-            for item in response["Items"]:
-                # 実際の距離計算
-                if "current_lat" in item and "current_lon" in item:
-                    distance = calculate_distance(
-                        lat, lon, float(item["current_lat"]), float(item["current_lon"])
-                    )
-
-                    # 指定した半径内のみを返す
-                    if distance <= radius:
-                        nearby_postcards.append(
-                            {
-                                "postcard_id": item["postcard_id"],
-                                "image_url": item["image_url"],
-                                "text": item["text"],
-                                "current_position": {
-                                    "lat": float(item["current_lat"]),
-                                    "lon": float(item["current_lon"]),
-                                },
-                                "next_destination": {
-                                    "lat": float(item["current_lat"]) + 0.01,
-                                    "lon": float(item["current_lon"]) + 0.01,
-                                },
-                                "last_updated_at": item["updated_at"],
-                                "distance_meters": round(distance),
-                            }
-                        )
+        return {
+            "postcards": [to_map_postcard(snapshot.items[i]) for i in singles],
+            "clusters": clusters,
+            "total": len(indices),
+        }
 
-            # 距離の近い順にソート
-            nearby_postcards.sort(key=lambda x: x["distance_meters"])
-            return nearby_postcards[:10]  # Limit results
+    def get_active_snapshot(self) -> ActiveSnapshot:
+        """Positions of all active postcards, loaded at most once per tick"""
+        return self.client.active_cache.get_or_load(
+            ACTIVE_SNAPSHOT_KEY,
+            lambda: build_snapshot(
+                next(self._snapshot_versions), self.get_active_postcards()
+            ),
+        )
 
+    def _get_cell_candidates(
+        self, snapshot: ActiveSnapshot, cell_key: Tuple[int, int, int]
+    ) -> ActiveSnapshot:
+        indices = cell_candidates(snapshot, cell_key)
+        return ActiveSnapshot(
+            snapshot.version,
+            [snapshot.items[i] for i in indices],
+            snapshot.lat[indices],
+            snapshot.lon[indices],
+        )
+
+    def _rank_nearby(
+        self, candidates: ActiveSnapshot, lat: float, lon: float, radius: float
+    ) -> List[Dict[str, Any]]:
+        distances = haversine(lat, lon, candidates.lat, candidates.lon)
+        inside = np.flatnonzero(distances <= radius)
+        # 距離の近い順に上位のみを返す
+        nearest = inside[np.argsort(distances[inside], kind="stable")][:NEARBY_LIMIT]
+        return [to_nearby_postcard(candidates.items[i], distances[i]) for i in nearest]
+
+    def get_active_postcards(self) -> List[Dict[str, Any]]:
+        """Get every postcard that has not been collected yet
+
+        Queries the sparse active index instead of scanning the table and
+        only projects the attributes needed to place postcards on the map.
+        Coordinates are returned as floats.
+        """
+        projection = self.client._projection(
+            [
+                "postcard_id",
+                "image_url",
+                "text",
+                "status",
+                "current_lat",
+                "current_lon",
+                "updated_at",
+            ]
+        )
+        projection["ExpressionAttributeNames"]["#index_pk"] = "GSI-1-PK"
+        try:
+            return list(
+                self.client._query(
+                    IndexName=ACTIVE_INDEX_NAME,
+                    KeyConditionExpression="#index_pk = :index_pk",
+                    ExpressionAttributeValues={":index_pk": ACTIVE_INDEX_PK},
+                    **projection,
+                )
+            )
         except ClientError as e:
-            self.client._handle_client_error(e, "get_nearby_postcards")
+            self.client._handle_client_error(e, "get_active_postcards")
             return []
 
-    def get_user_postcards(self, author_id: str) -> List[Dict[str, Any]]:
-        """Get all postcards created by a specific user"""
+    def get_user_postcards(
+        self,
+        author_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        include_path: bool = False,
+    ) -> Dict[str, Any]:
+        """Get one page of the postcards created by a user, newest first
+
+        Without ``limit`` the page holds all the remaining postcards.
+        Postcards are listed through the author's pointer items, then read
+        with BatchGetItem projecting only the attributes behind ``fields``.
+        Paths are only loaded when ``include_path`` is set.
+        """
+        fields = list(fields or POSTCARD_FIELD_ATTRIBUTES)
+        start_key = self.client._decode_list_cursor(
+            cursor, f"USER#{author_id}", AUTHOR_POINTER_PREFIX
+        )
+        query_kwargs = {
+            "KeyConditionExpression": Key("PK").eq(f"USER#{author_id}")
+            & Key("SK").begins_with(AUTHOR_POINTER_PREFIX),
+            "ScanIndexForward": False,
+            "ProjectionExpression": "postcard_id",
+        }
+        if start_key:
+            query_kwargs["ExclusiveStartKey"] = start_key
+
         try:
-            response = self.client.table.scan(
-                FilterExpression=Attr("SK").eq("METADATA")
-                & Attr("author_id").eq(author_id)
+            pointers, last_key = self.client._query_list(limit, **query_kwargs)
+            postcard_ids = [item["postcard_id"] for item in pointers]
+            items, unprocessed = self.get_postcards(
+                postcard_ids, self.field_attributes(fields)
             )
+            # 一部が欠けたページを返すとカーソルで読み飛ばされるため、失敗として返す
+            if unprocessed:
+                raise UnprocessedKeysError(unprocessed)
 
             user_postcards = []
-            for item in response["Items"]:
-                # Get the travel path for each postcard
-                path = self.get_postcard_path(item["postcard_id"])
-
-                user_postcards.append(
-                    {
-                        "postcard_id": item["postcard_id"],
-                        "image_url": item["image_url"],
-                        "text": item["text"],
-                        "created_at": item["created_at"],
-                        "author_id": item["author_id"],
-                        "likes_count": item.get("likes_count", 0),
-                        "status": item.get("status", "traveling"),
-                        "current_position": {
-                            "lat": float(item.get("current_lat", 0)),
-                            "lon": float(item.get("current_lon", 0)),
-                        }
-                        if item.get("current_lat") and item.get("current_lon")
-                        else None,
-                        "path": path,
-                    }
-                )
+            for postcard_id in postcard_ids:
+                item = items.get(postcard_id)
+                if item is None:
+                    continue
+                user_postcard = self.to_listed_postcard(item, fields)
+                if include_path:
+                    user_postcard["path"] = self.get_postcard_path(postcard_id)
+                user_postcards.append(user_postcard)
 
-            # Sort by creation date (newest first)
-            user_postcards.sort(key=lambda x: x["created_at"], reverse=True)
-            return user_postcards
+            return {
+                "postcards": user_postcards,
+                "next_cursor": self.client._encode_cursor(last_key),
+            }
 
         except ClientError as e:
             self.client._handle_client_error(e, "get_user_postcards")
-            return []
+            return {"postcards": [], "next_cursor": None}
+
+    @staticmethod
+    def field_attributes(fields: Sequence[str]) -> List[str]:
+        """Attributes to project to build the given list fields"""
+        attributes = ["postcard_id"]
+        for field in fields:
+            attributes.extend(POSTCARD_FIELD_ATTRIBUTES[field])
+        return attributes
+
+    def to_listed_postcard(
+        self, item: Dict[str, Any], fields: Sequence[str]
+    ) -> Dict[str, Any]:
+        """Shape a (possibly projected) postcard item with only ``fields``
+
+        ``postcard_id`` is always included so the items stay identifiable.
+        """
+        listed: Dict[str, Any] = {"postcard_id": item["postcard_id"]}
+        for field in fields:
+            if field == "likes_count":
+                listed[field] = self.client.collections.get_likes_count(item)
+            elif field == "status":
+                listed[field] = item.get("status", "traveling")
+            elif field == "current_position":
+                listed[field] = (
+                    {
+                        "lat": float(item["current_lat"]),
+                        "lon": float(item["current_lon"]),
+                    }
+                    if item.get("current_lat") and item.get("current_lon")
+                    else None
+                )
+            else:
+                listed[field] = item[field]
+        return listed
@@ -0,0 +1,188 @@
+"""Spatial helpers for queries over the active postcards
+
+The positions of all active postcards are loaded once per tick into an
+:class:`ActiveSnapshot` holding NumPy arrays, and spatial queries run on
+those arrays instead of on DynamoDB items one by one.
+"""
+
+import math
+import os
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from .polyline import EARTH_RADIUS_M
+
+# 緯度1度あたりの距離（Haversine と同じ地球半径で計算）
+METERS_PER_DEGREE = EARTH_RADIUS_M * math.pi / 180
+
+# 近くの絵葉書の検索半径はこの段階に切り上げてキャッシュを共有する
+NEARBY_RADIUS_BUCKETS = (250, 500, 1000, 2000, 5000, 10000, 20000, 50000)
+
+# 範囲内の絵葉書がこの件数を超えたらグリッドでまとめて返す
+MAP_CLUSTER_THRESHOLD = int(os.getenv("MAP_CLUSTER_THRESHOLD", "200"))
+# 256px のタイル1枚あたりのクラスタ用グリッドの分割数（約32px四方）
+MAP_CLUSTER_CELLS_PER_TILE = 8
+# 表示範囲が広すぎてもグリッドは1辺あたりこの数までに抑える
+MAP_MAX_GRID = 32
+
+
+class ActiveSnapshot(NamedTuple):
+    """Positions of the active postcards at one tick"""
+
+    version: int
+    items: List[Dict[str, Any]]
+    lat: np.ndarray
+    lon: np.ndarray
+
+
+def build_snapshot(version: int, items: List[Dict[str, Any]]) -> ActiveSnapshot:
+    """Build a snapshot from items, skipping those without a position"""
+    items = [
+        item
+        for item in items
+        if item.get("current_lat") is not None and item.get("current_lon") is not None
+    ]
+    lat = np.array([float(item["current_lat"]) for item in items], dtype=np.float64)
+    lon = np.array([float(item["current_lon"]) for item in items], dtype=np.float64)
+    return ActiveSnapshot(version, items, lat, lon)
+
+
+def haversine(lat0: float, lon0: float, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Distances in meters from one point to arrays of points (degrees)"""
+    lat0_rad = math.radians(lat0)
+    lat_rad = np.radians(lat)
+    a = (
+        np.sin((lat_rad - lat0_rad) / 2) ** 2
+        + math.cos(lat0_rad) * np.cos(lat_rad) * np.sin(np.radians(lon - lon0) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def nearby_cell_key(lat: float, lon: float, radius: float) -> Tuple[int, int, int]:
+    """Snap a nearby query to (radius bucket, grid row, grid column)
+
+    The grid cell is as large as the bucket radius, so every query whose
+    position falls in the same cell and whose radius fits the bucket can
+    share one candidate set.
+    """
+    bucket = next((b for b in NEARBY_RADIUS_BUCKETS if radius <= b), math.ceil(radius))
+    cell_deg = bucket / METERS_PER_DEGREE
+    return bucket, math.floor(lat / cell_deg), math.floor(lon / cell_deg)
+
+
+def cell_candidates(snapshot: ActiveSnapshot, key: Tuple[int, int, int]) -> np.ndarray:
+    """Indices of the postcards within the bucket radius of a grid cell
+
+    The cell is expanded by the bucket radius on every side, which makes
+    the result a superset of what any query snapped to the cell can see.
+    """
+    bucket, row, col = key
+    cell_deg = bucket / METERS_PER_DEGREE
+    lat_min = row * cell_deg - cell_deg
+    lat_max = (row + 1) * cell_deg + cell_deg
+
+    # 経度方向の余白は、セルの中で最も高緯度の位置に合わせて広げる
+    max_abs_lat = min(max(abs(lat_min), abs(lat_max)), 89.9)
+    lon_margin = cell_deg / math.cos(math.radians(max_abs_lat))
+    lon_min = col * cell_deg - lon_margin
+    lon_max = (col + 1) * cell_deg + lon_margin
+
+    mask = (
+        (snapshot.lat >= lat_min)
+        & (snapshot.lat <= lat_max)
+        & (snapshot.lon >= lon_min)
+        & (snapshot.lon <= lon_max)
+    )
+    return np.flatnonzero(mask)
+
+
+def in_bounds(
+    snapshot: ActiveSnapshot,
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+) -> np.ndarray:
+    """Indices of the postcards inside a bounding box"""
+    mask = (
+        (snapshot.lat >= min_lat)
+        & (snapshot.lat <= max_lat)
+        & (snapshot.lon >= min_lon)
+        & (snapshot.lon <= max_lon)
+    )
+    return np.flatnonzero(mask)
+
+
+def cluster_grid_size(
+    min_lat: float, min_lon: float, max_lat: float, max_lon: float, zoom: int
+) -> float:
+    """Grid cell size in degrees for clustering a bounding box at a zoom level"""
+    return max(
+        360.0 / (2**zoom * MAP_CLUSTER_CELLS_PER_TILE),
+        (max_lat - min_lat) / MAP_MAX_GRID,
+        (max_lon - min_lon) / MAP_MAX_GRID,
+    )
+
+
+def cluster(
+    lat: np.ndarray, lon: np.ndarray, cell_deg: float
+) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    """Group points into grid cells of ``cell_deg`` degrees
+
+    Cells are aligned to a global grid, so neighbouring queries at the same
+    zoom cluster identically. Returns the indices of points that are alone
+    in their cell and the clusters (centroid and count) of the others.
+    """
+    if len(lat) == 0:
+        return np.zeros(0, dtype=np.int64), []
+
+    row = np.floor(lat / cell_deg).astype(np.int64)
+    col = np.floor(lon / cell_deg).astype(np.int64)
+    cells, inverse, counts = np.unique(
+        row * (1 << 32) + col, return_inverse=True, return_counts=True
+    )
+    sum_lat = np.bincount(inverse, weights=lat, minlength=len(cells))
+    sum_lon = np.bincount(inverse, weights=lon, minlength=len(cells))
+
+    singles = np.flatnonzero(counts[inverse] == 1)
+    grouped = np.flatnonzero(counts > 1)
+    clusters = [
+        {
+            "position": {
+                "lat": float(sum_lat[i] / counts[i]),
+                "lon": float(sum_lon[i] / counts[i]),
+            },
+            "count": int(counts[i]),
+        }
+        for i in grouped
+    ]
+    return singles, clusters
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) of a Web Mercator z/x/y tile"""
+    n = 2**z
+
+    def tile_lat(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return (
+        tile_lat(y + 1),
+        x / n * 360.0 - 180.0,
+        tile_lat(y),
+        (x + 1) / n * 360.0 - 180.0,
+    )
+
+
+def tile_pixels(
+    lat: np.ndarray, lon: np.ndarray, z: int, x: int, y: int, extent: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Project points to integer coordinates inside a tile (0..extent-1)"""
+    n = 2**z
+    lat_rad = np.radians(np.clip(lat, -85.05112878, 85.05112878))
+    world_x = (lon + 180.0) / 360.0
+    world_y = (1 - np.log(np.tan(lat_rad) + 1 / np.cos(lat_rad)) / math.pi) / 2
+    px = np.floor((world_x * n - x) * extent).astype(np.int64)
+    py = np.floor((world_y * n - y) * extent).astype(np.int64)
+    return np.clip(px, 0, extent - 1), np.clip(py, 0, extent - 1)
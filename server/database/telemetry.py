@@ -0,0 +1,136 @@
+"""Accounting and metrics of DynamoDB calls
+
+botocore emits events around every API call. ``instrument`` hooks them on
+a client: every call is observed in the process-wide Prometheus metrics,
+and calls made while handling a request are also added to the
+``CallStats`` of the current context (set by the profiling middleware).
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Counter, Histogram
+
+# 現在のリクエストの DynamoDB 呼び出しの集計（リクエスト外では None）
+current_call_stats: ContextVar[Optional["CallStats"]] = ContextVar(
+    "dynamodb_call_stats", default=None
+)
+
+_START_KEY = "telemetry_call_start"
+
+# スロットリングとして数えるエラーコード（botocore が再試行した分も含む）
+THROTTLE_ERROR_CODES = frozenset(
+    {
+        "ProvisionedThroughputExceededException",
+        "ThrottlingException",
+        "RequestLimitExceeded",
+    }
+)
+
+DYNAMODB_REQUEST_DURATION = Histogram(
+    "dynamodb_request_duration_seconds",
+    "Latency of DynamoDB API calls, including botocore retries",
+    ["operation"],
+    buckets=(0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DYNAMODB_THROTTLED_REQUESTS = Counter(
+    "dynamodb_throttled_requests",
+    "DynamoDB API attempts rejected by throttling",
+    ["operation"],
+)
+DYNAMODB_ERRORS = Counter(
+    "dynamodb_errors",
+    "DynamoDB errors that reached the database layer, by method and error code",
+    ["operation", "code"],
+)
+
+
+def record_client_error(operation: str, code: str) -> None:
+    """Count an error handled by ``_handle_client_error``"""
+    DYNAMODB_ERRORS.labels(operation, code).inc()
+
+
+class CallStats:
+    """Count, latency and consumed capacity of DynamoDB calls by operation"""
+
+    def __init__(self):
+        self.operations: Dict[str, List[float]] = {}
+        self.capacity_units = 0.0
+        # スレッドプール上の並列な呼び出しから記録される
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, seconds: float, capacity_units: float) -> None:
+        with self._lock:
+            totals = self.operations.setdefault(operation, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+            self.capacity_units += capacity_units
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            operations = {
+                operation: {"count": int(count), "ms": round(seconds * 1000, 3)}
+                for operation, (count, seconds) in sorted(self.operations.items())
+            }
+            capacity_units = self.capacity_units
+        return {
+            "count": sum(op["count"] for op in operations.values()),
+            "ms": round(sum(op["ms"] for op in operations.values()), 3),
+            "capacity_units": round(capacity_units, 3),
+            "operations": operations,
+        }
+
+
+def consumed_capacity_units(parsed: Dict[str, Any]) -> float:
+    """Sum CapacityUnits of a response (a dict, or a list for batches)"""
+    consumed = parsed.get("ConsumedCapacity")
+    if not consumed:
+        return 0.0
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return sum(float(entry.get("CapacityUnits", 0)) for entry in consumed)
+
+
+def _request_capacity(params: Dict[str, Any], model, **kwargs) -> None:
+    if current_call_stats.get() is None:
+        return
+    if "ReturnConsumedCapacity" in model.input_shape.members:
+        params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+
+def _start_call(model, context: Dict[str, Any], **kwargs) -> None:
+    context[_START_KEY] = (model.name, time.perf_counter())
+
+
+def _end_call(context: Dict[str, Any], parsed=None, **kwargs) -> None:
+    started = context.pop(_START_KEY, None)
+    if started is None:
+        return
+    operation, start_time = started
+    seconds = time.perf_counter() - start_time
+    # 接続エラーなどで応答が無かった呼び出し（after-call-error）も時間は記録する
+    DYNAMODB_REQUEST_DURATION.labels(operation).observe(seconds)
+    stats = current_call_stats.get()
+    if stats is not None:
+        stats.record(operation, seconds, consumed_capacity_units(parsed or {}))
+
+
+def _count_throttle(response, operation, **kwargs) -> None:
+    # 再試行の判定ごとに呼ばれるため、再試行で成功した試行も数えられる
+    if not response:
+        return
+    code = response[1].get("Error", {}).get("Code")
+    if code in THROTTLE_ERROR_CODES:
+        DYNAMODB_THROTTLED_REQUESTS.labels(operation.name).inc()
+
+
+def instrument(client) -> None:
+    """Observe the calls of a low-level DynamoDB client (or a resource's client)"""
+    events = client.meta.events
+    events.register("before-parameter-build.dynamodb", _request_capacity)
+    events.register("before-call.dynamodb", _start_call)
+    events.register("after-call.dynamodb", _end_call)
+    events.register("after-call-error.dynamodb", _end_call)
+    events.register("needs-retry.dynamodb", _count_throttle)
@@ -34,7 +34,12 @@ class UserOperations:
             self.client._handle_client_error(e, "create_user")
 
     def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get user profile"""
+        """Get user profile (read through the profile cache)"""
+        return self.client.user_cache.get_or_load(
+            user_id, lambda: self._get_user_item(user_id)
+        )
+
+    def _get_user_item(self, user_id: str) -> Optional[Dict[str, Any]]:
         try:
             response = self.client.table.get_item(
                 Key={"PK": f"USER#{user_id}", "SK": "PROFILE"}
@@ -57,6 +62,7 @@ class UserOperations:
                 },
                 ConditionExpression=Attr("PK").exists(),
             )
+            self.client.user_cache.invalidate(user_id)
             return True
         except ClientError as e:
             if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
@@ -70,6 +76,7 @@ class UserOperations:
                 Key={"PK": f"USER#{user_id}", "SK": "PROFILE"},
                 ConditionExpression=Attr("PK").exists(),
             )
+            self.client.user_cache.invalidate(user_id)
             return True
         except ClientError as e:
             if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
@@ -0,0 +1,80 @@
+"""Conversion between the DynamoDB wire format and plain Python values
+
+The boto3 resource layer turns every number into a ``Decimal`` and only
+accepts ``Decimal`` back, so coordinates went float -> str -> Decimal on
+every write and Decimal -> float on every read. The high-volume paths use
+the low-level client instead, whose items are the raw wire format
+(``{"N": "35.68"}``); these helpers parse numbers straight to ``int`` or
+``float`` and serialize plain values without going through ``Decimal``.
+"""
+
+import math
+from decimal import Decimal
+from typing import Any, Dict, Mapping
+
+
+def parse_number(raw: str) -> Any:
+    """Parse a wire-format number as int when integral, otherwise float"""
+    if "." in raw or "e" in raw or "E" in raw:
+        return float(raw)
+    return int(raw)
+
+
+def deserialize(value: Mapping[str, Any]) -> Any:
+    """Convert one wire-format attribute value to a plain Python value"""
+    ((type_, raw),) = value.items()
+    if type_ == "S":
+        return raw
+    if type_ == "N":
+        return parse_number(raw)
+    if type_ == "L":
+        return [deserialize(v) for v in raw]
+    if type_ == "M":
+        return {k: deserialize(v) for k, v in raw.items()}
+    if type_ == "BOOL":
+        return raw
+    if type_ == "NULL":
+        return None
+    if type_ == "SS":
+        return set(raw)
+    if type_ == "NS":
+        return {parse_number(v) for v in raw}
+    if type_ == "B":
+        return raw
+    raise TypeError(f"Unsupported DynamoDB type: {type_}")
+
+
+def deserialize_item(item: Mapping[str, Any]) -> Dict[str, Any]:
+    """Convert a wire-format item to a dict of plain Python values"""
+    return {key: deserialize(value) for key, value in item.items()}
+
+
+def serialize(value: Any) -> Dict[str, Any]:
+    """Convert a plain Python value to a wire-format attribute value"""
+    if isinstance(value, str):
+        return {"S": value}
+    # bool は int のサブクラスなので先に判定する
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, int):
+        return {"N": str(value)}
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise TypeError(f"Non-finite number is not supported: {value}")
+        return {"N": repr(value)}
+    if isinstance(value, Decimal):
+        return {"N": str(value)}
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, (list, tuple)):
+        return {"L": [serialize(v) for v in value]}
+    if isinstance(value, dict):
+        return {"M": serialize_item(value)}
+    if isinstance(value, bytes):
+        return {"B": value}
+    raise TypeError(f"Unsupported type for DynamoDB: {type(value).__name__}")
+
+
+def serialize_item(item: Mapping[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Convert a dict of plain Python values to a wire-format item"""
+    return {key: serialize(value) for key, value in item.items()}
@@ -0,0 +1,172 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import orjson
+from fastapi import Response
+
+from database.polyline import COORD_SCALE, timestamp_to_micros
+
+try:
+    import msgpack
+except ImportError:  # 任意の依存（server[msgpack]）。無ければ JSON で応答する
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+# 座標の多いレスポンスを列形式・整数差分で返すコンパクト形式
+COMPACT_JSON_MEDIA_TYPE = "application/vnd.postcard.compact+json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_ALIASES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+COMPACT_FORMAT_VERSION = 1
+
+# OpenAPI の 200 応答に追加するメディアタイプ
+COMPACT_CONTENT = {COMPACT_JSON_MEDIA_TYPE: {}, MSGPACK_MEDIA_TYPE: {}}
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick the response media type from an Accept header (JSON by default)"""
+    best, best_q = JSON_MEDIA_TYPE, 0.0
+    for entry in (accept or "").split(","):
+        media, *params = [part.strip() for part in entry.split(";")]
+        media = media.lower()
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media in MSGPACK_ALIASES and msgpack is not None:
+            candidate = MSGPACK_MEDIA_TYPE
+        elif media == COMPACT_JSON_MEDIA_TYPE:
+            candidate = COMPACT_JSON_MEDIA_TYPE
+        elif media in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            candidate = JSON_MEDIA_TYPE
+        else:
+            continue
+        # 同じ q 値なら先に書かれた方を優先する
+        if q > best_q:
+            best, best_q = candidate, q
+    return best
+
+
+def is_compact(media_type: str) -> bool:
+    return media_type != JSON_MEDIA_TYPE
+
+
+def render(
+    content: Any, media_type: str, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Encode content as the negotiated media type
+
+    Bypasses FastAPI's response model validation, so ``content`` must
+    already have the documented shape.
+    """
+    if media_type == MSGPACK_MEDIA_TYPE:
+        body = msgpack.packb(content, use_bin_type=True)
+    else:
+        body = orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return Response(
+        body, media_type=media_type, headers={"Vary": "Accept", **(headers or {})}
+    )
+
+
+def delta_coords(values: Sequence[float]) -> List[int]:
+    """Scale degrees to 1e-5 int32 units and delta-encode them
+
+    The first value is absolute and every following value is the
+    difference from the previous one, so a client restores the degrees
+    with a cumulative sum divided by ``coord_scale``.
+    """
+    scaled = np.round(np.asarray(values, dtype=np.float64) * COORD_SCALE)
+    return np.diff(scaled.astype(np.int32), prepend=np.int32(0)).tolist()
+
+
+def delta_times(timestamps: Sequence[str]) -> List[int]:
+    """Convert timestamps to delta-encoded microseconds since the epoch"""
+    micros = np.array([timestamp_to_micros(t) for t in timestamps], dtype=np.int64)
+    return np.diff(micros, prepend=np.int64(0)).tolist()
+
+
+def compact_nearby(postcards: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Columnar form of a nearby postcard list"""
+    return {
+        "format": COMPACT_FORMAT_VERSION,
+        "coord_scale": COORD_SCALE,
+        "count": len(postcards),
+        "postcard_id": [p["postcard_id"] for p in postcards],
+        "image_url": [p["image_url"] for p in postcards],
+        "text": [p["text"] for p in postcards],
+        "lat": delta_coords([p["current_position"]["lat"] for p in postcards]),
+        "lon": delta_coords([p["current_position"]["lon"] for p in postcards]),
+        "next_lat": delta_coords([p["next_destination"]["lat"] for p in postcards]),
+        "next_lon": delta_coords([p["next_destination"]["lon"] for p in postcards]),
+        "last_updated_at": [p["last_updated_at"] for p in postcards],
+    }
+
+
+def compact_path(path: List[Dict[str, Any]], fields: Sequence[str]) -> Dict[str, Any]:
+    """Columnar form of path points, with only the selected fields"""
+    columns: Dict[str, Any] = {"count": len(path)}
+    if "prefecture" in fields:
+        columns["prefecture"] = [point["prefecture"] for point in path]
+    if "lat" in fields:
+        columns["lat"] = delta_coords([point["lat"] for point in path])
+    if "lon" in fields:
+        columns["lon"] = delta_coords([point["lon"] for point in path])
+    if "arrival_time" in fields:
+        columns["arrival_time_us"] = delta_times(
+            [point["arrival_time"] for point in path]
+        )
+    return columns
+
+
+def compact_path_page(
+    postcard_id: str,
+    path: List[Dict[str, Any]],
+    next_cursor: Optional[str],
+    fields: Sequence[str],
+) -> Dict[str, Any]:
+    """Columnar form of one page of a travel path"""
+    return {
+        "format": COMPACT_FORMAT_VERSION,
+        "coord_scale": COORD_SCALE,
+        "postcard_id": postcard_id,
+        "next_cursor": next_cursor,
+        "path": compact_path(path, fields),
+    }
+
+
+def compact_user_postcards(
+    postcards: List[Dict[str, Any]],
+    next_cursor: Optional[str],
+    fields: Sequence[str],
+    path_fields: Sequence[str],
+) -> Dict[str, Any]:
+    """Columnar form of a listed postcard page
+
+    Positions of unrelated postcards gain nothing from deltas, so they are
+    absolute 1e-5 integers (null when unknown). Each path is columnar.
+    """
+    columns: Dict[str, Any] = {
+        "format": COMPACT_FORMAT_VERSION,
+        "coord_scale": COORD_SCALE,
+        "count": len(postcards),
+        "next_cursor": next_cursor,
+        "postcard_id": [p["postcard_id"] for p in postcards],
+    }
+    for field in fields:
+        if field == "postcard_id":
+            continue
+        if field == "current_position":
+            positions = [p["current_position"] for p in postcards]
+            columns["lat"] = [
+                round(pos["lat"] * COORD_SCALE) if pos else None for pos in positions
+            ]
+            columns["lon"] = [
+                round(pos["lon"] * COORD_SCALE) if pos else None for pos in positions
+            ]
+        else:
+            columns[field] = [p[field] for p in postcards]
+    if postcards and "path" in postcards[0]:
+        columns["path"] = [compact_path(p["path"], path_fields) for p in postcards]
+    return columns
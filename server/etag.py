@@ -0,0 +1,50 @@
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Response
+
+# ユーザーごとの内容はブラウザにのみ保存し、毎回 ETag で再検証させる
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from the values a response is derived from"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, bytes):
+            digest.update(part)
+        else:
+            digest.update(str(part).encode("utf-8"))
+        # 区切り文字で ("ab", "c") と ("a", "bc") を区別する
+        digest.update(b"\x00")
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def set_etag(
+    response: Response, etag: str, cache_control: str = PRIVATE_CACHE_CONTROL
+) -> None:
+    """Attach an ETag and its Cache-Control to a response"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(etag: str, cache_control: str = PRIVATE_CACHE_CONTROL) -> Response:
+    """An empty 304 response for a matching If-None-Match"""
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": cache_control}
+    )
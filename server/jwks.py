@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from jwt.algorithms import RSAAlgorithm
+
+JWKSSource = Callable[[], Dict]
+
+# JWKS の定期更新間隔・取得タイムアウト・未知の kid による再取得の最短間隔（秒）
+JWKS_REFRESH_INTERVAL = float(os.getenv("JWKS_REFRESH_INTERVAL", "3600"))
+JWKS_FETCH_TIMEOUT = float(os.getenv("JWKS_FETCH_TIMEOUT", "5"))
+JWKS_MIN_REFRESH_INTERVAL = float(os.getenv("JWKS_MIN_REFRESH_INTERVAL", "30"))
+
+
+def url_source(url: str, timeout: float = JWKS_FETCH_TIMEOUT) -> JWKSSource:
+    """JWKS source that fetches a URL (e.g. the Cognito jwks.json)"""
+
+    def fetch() -> Dict:
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    return fetch
+
+
+def file_source(path: str) -> JWKSSource:
+    """JWKS source that reads a local JSON file (offline tests, local dev)"""
+
+    def fetch() -> Dict:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    return fetch
+
+
+class JWKSProvider:
+    """Holds the signing keys of a JWKS and keeps them fresh
+
+    Keys are fetched at startup and refreshed in the background. A failed
+    refresh keeps serving the last good keys (stale-while-revalidate). A
+    token with an unknown ``kid`` triggers a refresh, at most once per
+    ``min_refresh_interval``, so key rotation is picked up without restarts.
+    """
+
+    def __init__(
+        self,
+        source: JWKSSource,
+        refresh_interval: float = JWKS_REFRESH_INTERVAL,
+        min_refresh_interval: float = JWKS_MIN_REFRESH_INTERVAL,
+    ):
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.keys: Dict[str, Any] = {}
+        self.fetched_at: Optional[float] = None
+        self.refresh_count = 0
+        self.failure_count = 0
+        self.last_error: Optional[str] = None
+        self._last_attempt = 0.0
+        self._refresh_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def refresh(self) -> bool:
+        """Fetch the JWKS and swap in the new keys (blocking)"""
+        with self._refresh_lock:
+            return self._refresh_locked()
+
+    def get_key(self, kid: str) -> Optional[Any]:
+        """Look up a signing key, refreshing once if the kid is unknown"""
+        key = self.keys.get(kid)
+        if key is not None:
+            return key
+
+        with self._refresh_lock:
+            # 待っている間に他のスレッドが更新していれば再取得しない
+            if kid not in self.keys and (
+                time.monotonic() - self._last_attempt >= self.min_refresh_interval
+            ):
+                self._refresh_locked()
+        return self.keys.get(kid)
+
+    def _refresh_locked(self) -> bool:
+        self._last_attempt = time.monotonic()
+        try:
+            jwks = self.source()
+            keys = {
+                key["kid"]: RSAAlgorithm.from_jwk(key)
+                for key in jwks.get("keys", [])
+                if key.get("kid")
+            }
+        except Exception as e:
+            # 取得に失敗しても直前のキーを使い続ける
+            self.failure_count += 1
+            self.last_error = str(e)
+            print(f"Failed to fetch JWKS: {e}")
+            return False
+
+        self.keys = keys
+        self.fetched_at = time.time()
+        self.refresh_count += 1
+        self.last_error = None
+        return True
+
+    async def start(self) -> None:
+        """Fetch the keys once and start the background refresh loop"""
+        await asyncio.to_thread(self.refresh)
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            # 失敗時は短い間隔で再試行する
+            interval = (
+                self.refresh_interval
+                if self.last_error is None
+                else min(self.refresh_interval, self.min_refresh_interval)
+            )
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.refresh)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self.keys),
+            "fetched_at": self.fetched_at,
+            "refresh_count": self.refresh_count,
+            "failure_count": self.failure_count,
+            "last_error": self.last_error,
+        }
@@ -1,13 +1,39 @@
-from dotenv import load_dotenv
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+from contextlib import asynccontextmanager
 
-from routers import collection, postcards, users
+from dotenv import load_dotenv
 
-# 環境変数を読み込み
+# 環境変数を読み込み（各モジュールは import 時に設定を読むため、それより先に1度だけ）
 load_dotenv()
 
+from fastapi import FastAPI  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+from fastapi.responses import ORJSONResponse  # noqa: E402
+
+import metrics  # noqa: E402
+from auth import jwks_provider  # noqa: E402
+from database import db  # noqa: E402
+from profiling import ProfilingMiddleware  # noqa: E402
+from routers import collection, postcards, users  # noqa: E402
+from routers.postcards import nearby_hub  # noqa: E402
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 最初のリクエストを待たずに JWKS の取得と boto3 クライアントの作成を並行して行う
+    # （JWKS は以降も定期的に更新する）。import 時には AWS の設定を必要としない
+    await asyncio.gather(jwks_provider.start(), db.connect())
+    metrics.start()
+    yield
+    await nearby_hub.stop()
+    await jwks_provider.stop()
+    await metrics.stop()
+
+
 app = FastAPI(
+    lifespan=lifespan,
+    # 既定の JSON エンコーダーより高速な orjson でレスポンスを書き出す
+    default_response_class=ORJSONResponse,
     title="Postcard API",
     description="デジタル絵葉書のリレーアプリケーションAPI",
     version="1.0.0",
@@ -43,8 +69,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+# 外側で、リクエストごとの所要時間と DynamoDB 呼び出しを計測する
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Include routers
 app.include_router(users.router)
 app.include_router(postcards.router)
@@ -54,3 +85,9 @@ app.include_router(collection.router)
 @app.get("/")
 def read_root():
     return {"message": "Hello from FastAPI!"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus metrics of the server (all workers in multiprocess mode)"""
+    return metrics.render_metrics()
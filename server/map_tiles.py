@@ -0,0 +1,121 @@
+import json
+import os
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from database.cache import TTLCache
+from database.spatial import (
+    MAP_CLUSTER_THRESHOLD,
+    ActiveSnapshot,
+    cluster,
+    cluster_grid_size,
+    in_bounds,
+    tile_bounds,
+    tile_pixels,
+)
+from etag import make_etag
+
+# タイル内の座標は 0..MAP_TILE_EXTENT-1 の整数で表す（ベクタタイルと同じ方式）
+MAP_TILE_EXTENT = 4096
+MAP_TILE_FORMAT = 1
+# 位置更新の間隔（約5秒）だけブラウザにキャッシュさせる
+MAP_TILE_MAX_AGE = int(os.getenv("MAP_TILE_MAX_AGE", "5"))
+
+# 中身が変わらない限り、tick をまたいでも描画済みのタイルを使い回す
+tile_cache = TTLCache(
+    int(os.getenv("MAP_TILE_CACHE_MAXSIZE", "4096")),
+    float(os.getenv("MAP_TILE_CACHE_TTL", "300")),
+    name="tile",
+)
+
+
+class Tile(NamedTuple):
+    version: int
+    etag: str
+    body: bytes
+
+
+def get_cached_tile(snapshot: ActiveSnapshot, z: int, x: int, y: int) -> Optional[Tile]:
+    """The tile already rendered for this snapshot, if any (no position scan)"""
+    cached = tile_cache.get((z, x, y))
+    if cached is not None and cached.version == snapshot.version:
+        return cached
+    return None
+
+
+def get_tile(snapshot: ActiveSnapshot, z: int, x: int, y: int) -> Tile:
+    """Return a rendered tile, re-rendering only if its contents changed
+
+    Within one snapshot a tile is looked up without touching the positions.
+    On a new snapshot the postcards inside the tile are hashed; the ETag is
+    that hash, so an unchanged tile keeps its ETag and body across ticks.
+    The scan and rendering are CPU-bound; call this off the event loop.
+    """
+    cached = tile_cache.get((z, x, y))
+    if cached is not None and cached.version == snapshot.version:
+        return cached
+
+    indices = in_bounds(snapshot, *tile_bounds(z, x, y))
+    lat = snapshot.lat[indices]
+    lon = snapshot.lon[indices]
+    etag = make_etag(
+        MAP_TILE_FORMAT,
+        z,
+        x,
+        y,
+        "\n".join(snapshot.items[i]["postcard_id"] for i in indices),
+        lat.tobytes(),
+        lon.tobytes(),
+    )
+
+    if cached is not None and cached.etag == etag:
+        tile = cached._replace(version=snapshot.version)
+    else:
+        body = render_tile(snapshot, indices, z, x, y)
+        tile = Tile(snapshot.version, etag, body)
+    tile_cache.set((z, x, y), tile)
+    return tile
+
+
+def render_tile(
+    snapshot: ActiveSnapshot, indices: np.ndarray, z: int, x: int, y: int
+) -> bytes:
+    """Encode the postcards and clusters of a tile as columnar JSON"""
+    if len(indices) <= MAP_CLUSTER_THRESHOLD:
+        singles, clusters = np.arange(len(indices)), []
+    else:
+        cell_deg = cluster_grid_size(*tile_bounds(z, x, y), z)
+        singles, clusters = cluster(
+            snapshot.lat[indices], snapshot.lon[indices], cell_deg
+        )
+
+    points = indices[singles]
+    px, py = tile_pixels(
+        snapshot.lat[points], snapshot.lon[points], z, x, y, MAP_TILE_EXTENT
+    )
+    cx, cy = tile_pixels(
+        np.array([c["position"]["lat"] for c in clusters], dtype=np.float64),
+        np.array([c["position"]["lon"] for c in clusters], dtype=np.float64),
+        z,
+        x,
+        y,
+        MAP_TILE_EXTENT,
+    )
+    tile = {
+        "z": z,
+        "x": x,
+        "y": y,
+        "extent": MAP_TILE_EXTENT,
+        "postcards": {
+            "ids": [snapshot.items[i]["postcard_id"] for i in points],
+            "x": px.tolist(),
+            "y": py.tolist(),
+        },
+        "clusters": {
+            "x": cx.tolist(),
+            "y": cy.tolist(),
+            "count": [c["count"] for c in clusters],
+        },
+    }
+    return json.dumps(tile, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,178 @@
+"""Prometheus metrics served at /metrics
+
+Request latency and in-flight requests are recorded by ``MetricsMiddleware``;
+DynamoDB call latency, throttling and errors by ``database.telemetry``.
+Cache, token cache, JWKS and nearby stream statistics live in each worker
+and are copied into gauges when scraped (and periodically in the
+background, so that every worker's values are current).
+
+With several workers, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty
+directory before starting them; every worker then writes its metrics
+there and a scrape of any worker returns the sum over all of them.
+"""
+
+import asyncio
+import os
+import time
+from typing import Optional
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from auth import jwks_provider, token_cache
+from database import db
+from map_tiles import tile_cache
+from profiling import route_template
+from routers.postcards import nearby_hub
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+# 各ワーカーのキャッシュなどの統計をゲージに書き写す間隔（秒）
+METRICS_REFRESH_INTERVAL = float(os.getenv("METRICS_REFRESH_INTERVAL", "15"))
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to handle a request, by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HTTP_REQUESTS = Counter(
+    "http_requests",
+    "Handled requests, by route template and status code",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+# ヒット率は rate(cache_hits) / (rate(cache_hits) + rate(cache_misses)) で求める
+CACHE_HITS = Gauge(
+    "cache_hits", "Cache hits since start", ["cache"], multiprocess_mode="livesum"
+)
+CACHE_MISSES = Gauge(
+    "cache_misses", "Cache misses since start", ["cache"], multiprocess_mode="livesum"
+)
+CACHE_ENTRIES = Gauge(
+    "cache_entries", "Entries held in a cache", ["cache"], multiprocess_mode="livesum"
+)
+JWKS_KEYS = Gauge("jwks_keys", "Signing keys held", multiprocess_mode="livemin")
+JWKS_FETCHED_AT = Gauge(
+    "jwks_last_refresh_timestamp_seconds",
+    "Time the signing keys were last fetched",
+    multiprocess_mode="livemin",
+)
+JWKS_REFRESHES = Gauge(
+    "jwks_refreshes", "JWKS refreshes since start", multiprocess_mode="livesum"
+)
+JWKS_REFRESH_FAILURES = Gauge(
+    "jwks_refresh_failures",
+    "Failed JWKS refreshes since start",
+    multiprocess_mode="livesum",
+)
+NEARBY_STREAM_SUBSCRIBERS = Gauge(
+    "nearby_stream_subscribers",
+    "Open nearby postcard streams",
+    multiprocess_mode="livesum",
+)
+
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def update_stats() -> None:
+    """Copy this worker's in-memory statistics into the gauges"""
+    for stats in [*db.cache_stats(), token_cache.stats(), tile_cache.stats()]:
+        CACHE_HITS.labels(stats["name"]).set(stats["hits"])
+        CACHE_MISSES.labels(stats["name"]).set(stats["misses"])
+        CACHE_ENTRIES.labels(stats["name"]).set(stats["size"])
+
+    jwks = jwks_provider.stats()
+    JWKS_KEYS.set(jwks["keys"])
+    JWKS_FETCHED_AT.set(jwks["fetched_at"] or 0)
+    JWKS_REFRESHES.set(jwks["refresh_count"])
+    JWKS_REFRESH_FAILURES.set(jwks["failure_count"])
+    NEARBY_STREAM_SUBSCRIBERS.set(nearby_hub.stats()["subscribers"])
+
+
+def render_metrics() -> Response:
+    """Metrics in the Prometheus text format (summed over workers if multiprocess)"""
+    update_stats()
+    registry = REGISTRY
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+async def _refresh_loop() -> None:
+    while True:
+        await asyncio.sleep(METRICS_REFRESH_INTERVAL)
+        try:
+            update_stats()
+        except Exception as e:
+            print(f"Failed to update metrics: {e}")
+
+
+def start() -> None:
+    """Keep the gauges of this worker current when other workers are scraped"""
+    global _refresh_task
+    if MULTIPROCESS and _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_loop())
+
+
+async def stop() -> None:
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+    if MULTIPROCESS:
+        # 終了したワーカーの live* ゲージを集計から外す
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """Observe request latency by route template and count in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            route = route_template(scope)
+            HTTP_REQUEST_DURATION.labels(method, route).observe(
+                time.perf_counter() - started
+            )
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
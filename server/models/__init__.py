@@ -16,12 +16,21 @@ from .postcard import (
     PostcardDetail,
     UserPostcard,
     UserPostcardsResponse,
+    PostcardBatchRequest,
+    BatchPostcard,
+    PostcardBatchResponse,
 )
 from .travel import (
     PathPoint,
     PostcardPathResponse,
     Position,
     NearbyPostcard,
+    MapPostcard,
+    PostcardCluster,
+    PostcardsInBoundsResponse,
+    TilePostcards,
+    TileClusters,
+    PostcardTile,
 )
 from .collection import (
     CollectResponse,
@@ -48,11 +57,20 @@ __all__ = [
     "PostcardDetail",
     "UserPostcard",
     "UserPostcardsResponse",
+    "PostcardBatchRequest",
+    "BatchPostcard",
+    "PostcardBatchResponse",
     # Travel models
     "PathPoint",
     "PostcardPathResponse",
     "Position",
     "NearbyPostcard",
+    "MapPostcard",
+    "PostcardCluster",
+    "PostcardsInBoundsResponse",
+    "TilePostcards",
+    "TileClusters",
+    "PostcardTile",
     # Collection models
     "CollectResponse",
     "PostcardInCollection",
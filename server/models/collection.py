@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 
 
 class CollectResponse(BaseModel):
@@ -6,12 +7,14 @@ class CollectResponse(BaseModel):
 
 
 class PostcardInCollection(BaseModel):
+    # fields で指定されなかった項目はレスポンスに含まれない
     postcard_id: str
-    image_url: str
-    text: str
-    created_at: str
-    author_id: str
-    likes_count: int
+    image_url: Optional[str] = None
+    text: Optional[str] = None
+    created_at: Optional[str] = None
+    author_id: Optional[str] = None
+    likes_count: Optional[int] = None
+    collected_at: Optional[str] = None
 
 
 class LikeResponse(BaseModel):
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from .travel import PathPoint, Position
 
@@ -43,17 +43,35 @@ class PostcardDetail(BaseModel):
 
 
 class UserPostcard(BaseModel):
+    # fields で指定されなかった項目はレスポンスに含まれない
     postcard_id: str
-    image_url: str
-    text: str
-    created_at: str
-    author_id: str
-    likes_count: int
-    status: str
-    current_position: Optional[Position]
-    path: List[PathPoint]
+    image_url: Optional[str] = None
+    text: Optional[str] = None
+    created_at: Optional[str] = None
+    author_id: Optional[str] = None
+    likes_count: Optional[int] = None
+    status: Optional[str] = None
+    current_position: Optional[Position] = None
+    path: Optional[List[PathPoint]] = None
 
 
 class UserPostcardsResponse(BaseModel):
     postcards: List[UserPostcard]
     count: int
+    next_cursor: Optional[str] = None
+
+
+class PostcardBatchRequest(BaseModel):
+    postcard_ids: List[str] = Field(..., min_length=1, max_length=100)
+    include_path: bool = False
+
+
+class BatchPostcard(PostcardDetail):
+    path: Optional[List[PathPoint]] = None
+
+
+class PostcardBatchResponse(BaseModel):
+    postcards: List[BatchPostcard]
+    missing: List[str]
+    # スロットリングで取得できなかった絵葉書ID（時間をおいて再度取得する）
+    unprocessed: List[str] = []
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 
 class Position(BaseModel):
@@ -8,15 +8,17 @@ class Position(BaseModel):
 
 
 class PathPoint(BaseModel):
-    prefecture: str
-    lat: float
-    lon: float
-    arrival_time: str
+    # fields で指定されなかった項目はレスポンスに含まれない
+    prefecture: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    arrival_time: Optional[str] = None
 
 
 class PostcardPathResponse(BaseModel):
     postcard_id: str
     path: List[PathPoint]
+    next_cursor: Optional[str] = None
 
 
 class NearbyPostcard(BaseModel):
@@ -26,3 +28,42 @@ class NearbyPostcard(BaseModel):
     current_position: Position
     next_destination: Position
     last_updated_at: str
+
+
+class MapPostcard(BaseModel):
+    postcard_id: str
+    image_url: str
+    current_position: Position
+    last_updated_at: str
+
+
+class PostcardCluster(BaseModel):
+    position: Position
+    count: int
+
+
+class PostcardsInBoundsResponse(BaseModel):
+    postcards: List[MapPostcard]
+    clusters: List[PostcardCluster]
+    total: int
+
+
+class TilePostcards(BaseModel):
+    ids: List[str]
+    x: List[int]
+    y: List[int]
+
+
+class TileClusters(BaseModel):
+    x: List[int]
+    y: List[int]
+    count: List[int]
+
+
+class PostcardTile(BaseModel):
+    z: int
+    x: int
+    y: int
+    extent: int
+    postcards: TilePostcards
+    clusters: TileClusters
@@ -0,0 +1,210 @@
+import asyncio
+import contextvars
+import json
+import os
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+from database.postcards import to_nearby_postcard
+from database.spatial import ActiveSnapshot, haversine
+
+# 位置更新 Lambda の実行間隔に合わせて、ワーカーごとに1回だけ取得する
+NEARBY_STREAM_TICK = float(os.getenv("NEARBY_STREAM_TICK", "5"))
+NEARBY_STREAM_MAX_SUBSCRIBERS = int(os.getenv("NEARBY_STREAM_MAX_SUBSCRIBERS", "1000"))
+NEARBY_STREAM_QUEUE_SIZE = int(os.getenv("NEARBY_STREAM_QUEUE_SIZE", "8"))
+NEARBY_STREAM_HEARTBEAT = float(os.getenv("NEARBY_STREAM_HEARTBEAT", "15"))
+
+
+class SubscriberLimitError(Exception):
+    """Raised when a worker already serves the maximum number of streams"""
+
+
+class Subscriber:
+    """One connected client watching the postcards around a position"""
+
+    def __init__(self, lat: float, lon: float, radius: float, queue_size: int):
+        self.lat = lat
+        self.lon = lon
+        self.radius = radius
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # クライアントに送信済みの絵葉書 ID → (緯度, 経度)
+        self.visible: Optional[Dict[str, tuple]] = None
+
+    def push(self, event: Dict[str, Any], snapshot: List[Dict[str, Any]]) -> None:
+        """Queue an event; a client that falls behind gets a fresh snapshot
+
+        Diffs only make sense on top of the previous ones, so instead of
+        dropping a single event the backlog is discarded and replaced by
+        the full current state.
+        """
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "snapshot", "postcards": snapshot})
+
+
+class NearbyHub:
+    """Shares one poll of the active postcards among all streams of a worker
+
+    Every tick the hub loads the active postcards once, then computes for
+    each subscriber which postcards entered, moved within, left or were
+    collected inside its radius, and pushes only that diff.
+    """
+
+    def __init__(
+        self,
+        db,
+        tick: float = NEARBY_STREAM_TICK,
+        max_subscribers: int = NEARBY_STREAM_MAX_SUBSCRIBERS,
+        queue_size: int = NEARBY_STREAM_QUEUE_SIZE,
+    ):
+        self.db = db
+        self.tick = tick
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscriber] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot: Optional[ActiveSnapshot] = None
+        self._active_ids: Set[str] = set()
+
+    def has_capacity(self) -> bool:
+        return len(self.subscribers) < self.max_subscribers
+
+    def subscribe(self, lat: float, lon: float, radius: float) -> Subscriber:
+        if not self.has_capacity():
+            raise SubscriberLimitError()
+
+        subscriber = Subscriber(lat, lon, radius, self.queue_size)
+        self.subscribers.add(subscriber)
+        if self._task is None or self._task.done():
+            # 最初の購読リクエストの計測に取得処理が含まれないよう空のコンテキストで動かす
+            self._task = asyncio.create_task(
+                self._poll_loop(), context=contextvars.Context()
+            )
+        elif self._snapshot is not None:
+            # 新しい購読者には直近の取得結果から初期状態をすぐに送る
+            self._publish_to(subscriber, self._snapshot, self._active_ids)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.discard(subscriber)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self.subscribers),
+            "max_subscribers": self.max_subscribers,
+        }
+
+    async def _poll_loop(self) -> None:
+        # 購読者がいなくなったらポーリングを止める
+        while self.subscribers:
+            try:
+                # /nearby と同じ tick ごとのスナップショットを共有する
+                self.publish(await self.db.get_active_snapshot())
+            except Exception as e:
+                print(f"Failed to poll nearby postcards: {e}")
+            await asyncio.sleep(self.tick)
+        self._task = None
+        self._snapshot = None
+
+    def publish(self, snapshot: ActiveSnapshot) -> None:
+        """Push the diff against ``snapshot`` to every subscriber"""
+        self._snapshot = snapshot
+        self._active_ids = {item["postcard_id"] for item in snapshot.items}
+        for subscriber in list(self.subscribers):
+            self._publish_to(subscriber, snapshot, self._active_ids)
+
+    def _publish_to(
+        self, subscriber: Subscriber, snapshot: ActiveSnapshot, active: Set[str]
+    ) -> None:
+        # 購読者の位置から全件の距離をまとめて計算する
+        distances = haversine(
+            subscriber.lat, subscriber.lon, snapshot.lat, snapshot.lon
+        )
+        inside = np.flatnonzero(distances <= subscriber.radius)
+
+        current = {
+            snapshot.items[i]["postcard_id"]: to_nearby_postcard(
+                snapshot.items[i], distances[i]
+            )
+            for i in inside
+        }
+        snapshot = sorted(current.values(), key=lambda p: p["distance_meters"])
+        positions = {
+            postcard_id: (
+                postcard["current_position"]["lat"],
+                postcard["current_position"]["lon"],
+            )
+            for postcard_id, postcard in current.items()
+        }
+
+        previous = subscriber.visible
+        subscriber.visible = positions
+        if previous is None:
+            subscriber.push({"type": "snapshot", "postcards": snapshot}, snapshot)
+            return
+
+        events = {
+            "entered": [p for i, p in current.items() if i not in previous],
+            "moved": [
+                p
+                for i, p in current.items()
+                if i in previous and previous[i] != positions[i]
+            ],
+            "left": [
+                {"postcard_id": i} for i in previous if i not in current and i in active
+            ],
+            "collected": [{"postcard_id": i} for i in previous if i not in active],
+        }
+        for event_type, postcards in events.items():
+            if postcards:
+                subscriber.push({"type": event_type, "postcards": postcards}, snapshot)
+
+
+async def event_stream(
+    hub: NearbyHub,
+    lat: float,
+    lon: float,
+    radius: float,
+    heartbeat: float = NEARBY_STREAM_HEARTBEAT,
+):
+    """Subscribe to the hub and format the events as Server-Sent Events
+
+    The subscription is made here rather than in the route handler, so it
+    only exists while the body is being streamed and the ``finally`` below
+    always releases it (a client that disconnects before the body starts
+    never takes a slot).
+    """
+    try:
+        subscriber = hub.subscribe(lat, lon, radius)
+    except SubscriberLimitError:
+        # ルートでの確認から送信開始までの間に上限に達した場合
+        yield 'event: error\ndata: "too many subscribers"\n\n'
+        return
+
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscriber.queue.get(), timeout=heartbeat
+                )
+            except asyncio.TimeoutError:
+                # プロキシに切断されないよう、変化がなくても定期的にコメントを送る
+                yield ": ping\n\n"
+                continue
+            data = json.dumps(event["postcards"], ensure_ascii=False)
+            yield f"event: {event['type']}\ndata: {data}\n\n"
+    finally:
+        hub.unsubscribe(subscriber)
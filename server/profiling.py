@@ -0,0 +1,199 @@
+import cProfile
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from starlette.datastructures import MutableHeaders
+
+from database.telemetry import CallStats, current_call_stats
+
+# 0 にするとリクエストごとの計測（Server-Timing とログ出力）を止める
+REQUEST_PROFILING = os.getenv("REQUEST_PROFILING", "1") == "1"
+# cProfile で記録するリクエストの割合（0 〜 1）。記録は PROFILE_OUTPUT_DIR に保存する
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", "/tmp/postcard-profiles")
+
+# 現在のリクエストの計測（リクエスト外では None）
+current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "request_profile", default=None
+)
+
+# cProfile は同時に1つしか有効にできないため、記録中は他のリクエストを対象にしない
+_profiler_lock = threading.Lock()
+
+
+class RequestProfile:
+    """Timings and DynamoDB calls of one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.calls = CallStats()
+        self.timings: Dict[str, float] = {}
+
+    def add_timing(self, name: str, seconds: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Format the timings as a Server-Timing header value"""
+        calls = self.calls.as_dict()
+        metrics = [f"total;dur={self.elapsed() * 1000:.1f}"]
+        for name, seconds in self.timings.items():
+            metrics.append(f"{name};dur={seconds * 1000:.1f}")
+        metrics.append(
+            f'db;dur={calls["ms"]:.1f};desc="{calls["count"]} calls, '
+            f'{calls["capacity_units"]:g} CU"'
+        )
+        for operation, totals in calls["operations"].items():
+            metrics.append(
+                f'db-{operation};dur={totals["ms"]:.1f};desc="{totals["count"]} calls"'
+            )
+        return ", ".join(metrics)
+
+
+@contextmanager
+def timed(name: str):
+    """Add the time spent in the block to the current request's timings"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile = current_profile.get()
+        if profile is not None:
+            profile.add_timing(name, time.perf_counter() - started)
+
+
+def route_template(scope) -> str:
+    """The matched route's path template (e.g. /api/postcards/{postcard_id})"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class ProfilingMiddleware:
+    """Record per-request timings and DynamoDB calls
+
+    Adds a Server-Timing header (total, auth, DynamoDB time by operation
+    and consumed capacity) and prints one JSON log line per request. A
+    ``PROFILE_SAMPLE_RATE`` share of requests is also run under cProfile;
+    the profiler sees the event loop thread only, so DynamoDB calls in the
+    thread pool appear as time spent awaiting them.
+
+    cProfile records everything the event loop runs, not just one request,
+    so a request is only sampled when no other request (open streams
+    included) is in flight. Requests that start while it is recorded are
+    still mixed into the profile; the log line then has
+    ``"profile_mixed": true``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        # 処理中のリクエスト数と、記録中の cProfile に他のリクエストが混ざったか
+        # （どちらもイベントループのスレッドからのみ更新する）
+        self.in_flight = 0
+        self.profiling = False
+        self.profile_mixed = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not REQUEST_PROFILING:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        profile_token = current_profile.set(profile)
+        calls_token = current_call_stats.set(profile.calls)
+        self.in_flight += 1
+        if self.profiling:
+            self.profile_mixed = True
+        profiler = self._start_profiler()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", profile.server_timing()
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            self.in_flight -= 1
+            profile_path = profile_mixed = None
+            if profiler is not None:
+                profile_path = self._save_profile(profiler, scope)
+                profile_mixed = self.profile_mixed
+            current_call_stats.reset(calls_token)
+            current_profile.reset(profile_token)
+            self._log(scope, status_code, profile, profile_path, profile_mixed)
+
+    def _start_profiler(self) -> Optional[cProfile.Profile]:
+        if PROFILE_SAMPLE_RATE <= 0 or random.random() >= PROFILE_SAMPLE_RATE:
+            return None
+        # 他のリクエストの処理中に記録すると、その処理まで含まれてしまう
+        if self.in_flight > 1:
+            return None
+        if not _profiler_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # 他のプロファイラが有効な場合は記録しない
+            _profiler_lock.release()
+            return None
+        self.profiling = True
+        self.profile_mixed = False
+        return profiler
+
+    def _save_profile(self, profiler: cProfile.Profile, scope) -> Optional[str]:
+        self.profiling = False
+        try:
+            profiler.disable()
+            os.makedirs(PROFILE_OUTPUT_DIR, exist_ok=True)
+            name = route_template(scope).strip("/").replace("/", "_") or "root"
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+            path = os.path.join(
+                PROFILE_OUTPUT_DIR, f"{stamp}-{scope['method']}-{name}.prof"
+            )
+            profiler.dump_stats(path)
+            return path
+        except OSError as e:
+            print(f"Failed to save profile: {e}")
+            return None
+        finally:
+            _profiler_lock.release()
+
+    @staticmethod
+    def _log(
+        scope,
+        status_code: int,
+        profile: RequestProfile,
+        profile_path: Optional[str],
+        profile_mixed: Optional[bool],
+    ) -> None:
+        record = {
+            "event": "request",
+            "method": scope["method"],
+            "route": route_template(scope),
+            "status": status_code,
+            "duration_ms": round(profile.elapsed() * 1000, 3),
+            "timings_ms": {
+                name: round(seconds * 1000, 3)
+                for name, seconds in profile.timings.items()
+            },
+            "dynamodb": profile.calls.as_dict(),
+        }
+        if profile_path:
+            record["profile"] = profile_path
+            record["profile_mixed"] = profile_mixed
+        print(json.dumps(record, ensure_ascii=False), flush=True)
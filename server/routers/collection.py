@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
 from models import PostcardInCollection, ErrorResponse
-from database import db
+from database import db, COLLECTION_FIELDS, UnprocessedKeysError
 from auth import get_current_user
+from routers.postcards import parse_fields, throttled_error
 
 router = APIRouter(prefix="/api/users/me", tags=["collection"])
 
@@ -10,31 +11,50 @@ router = APIRouter(prefix="/api/users/me", tags=["collection"])
 @router.get(
     "/collection",
     response_model=List[PostcardInCollection],
+    response_model_exclude_unset=True,
     summary="自身のコレクション取得",
-    description="ログイン中のユーザーが拾った絵葉書のコレクション一覧を取得します。",
+    description="ログイン中のユーザーが拾った絵葉書のコレクション一覧を取得します。`limit` を指定しない場合は全件を返します。`limit` を指定して続きがある場合はレスポンスヘッダー `X-Next-Cursor` の値を `cursor` に指定して続きを取得します。`fields` を指定すると指定した項目のみを返します。",
     responses={
+        400: {
+            "model": ErrorResponse,
+            "description": "cursor または fields が不正な場合",
+        },
         401: {
             "model": ErrorResponse,
             "description": "認証トークンがない、または無効な場合",
-        }
+        },
+        503: {
+            "model": ErrorResponse,
+            "description": "混雑により一覧を取得できなかった場合（Retry-After 秒後に再試行）",
+        },
     },
 )
-async def get_my_collection(current_user: dict = Depends(get_current_user)):
+async def get_my_collection(
+    response: Response,
+    limit: Optional[int] = Query(
+        None, ge=1, le=100, description="1回で取得する絵葉書の最大件数（省略時は全件）"
+    ),
+    cursor: Optional[str] = Query(None, description="前回のレスポンスの X-Next-Cursor"),
+    fields: Optional[str] = Query(
+        None,
+        description="含める項目（カンマ区切り: " + ", ".join(COLLECTION_FIELDS) + "）",
+    ),
+    current_user: dict = Depends(get_current_user),
+):
     user_id = current_user["user_id"]
-    collection = db.get_user_collection(user_id)
+    selected_fields = parse_fields(fields, COLLECTION_FIELDS)
 
-    # Convert to PostcardInCollection format
-    result = []
-    for item in collection:
-        result.append(
-            PostcardInCollection(
-                postcard_id=item["postcard_id"],
-                image_url=item["image_url"],
-                text=item["text"],
-                created_at=item["created_at"],
-                author_id=item["author_id"],
-                likes_count=item["likes_count"],
-            )
+    try:
+        page = await db.get_user_collection(
+            user_id, limit=limit, cursor=cursor, fields=selected_fields
         )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="cursor が不正です。")
+    except UnprocessedKeysError:
+        raise throttled_error()
+
+    # 一覧の形式を変えないよう、続きのカーソルはヘッダーで返す
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
 
-    return result
+    return [PostcardInCollection(**item) for item in page["postcards"]]
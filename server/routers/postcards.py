@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, Header, Path, Query, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from models import (
     PostcardCreateRequest,
@@ -8,17 +10,100 @@ from models import (
     PostcardDeleteResponse,
     PostcardPathResponse,
     NearbyPostcard,
+    PostcardsInBoundsResponse,
+    PostcardTile,
     CollectResponse,
     PostcardDetail,
+    PostcardBatchRequest,
+    PostcardBatchResponse,
     LikeResponse,
     UserPostcardsResponse,
     ErrorResponse,
 )
-from database import db
+from database import (
+    db,
+    PATH_POINT_FIELDS,
+    POSTCARD_FIELD_ATTRIBUTES,
+    LIKE_ALREADY_LIKED,
+    LIKE_NOT_FOUND,
+    COLLECT_OK,
+    COLLECT_NOT_FOUND,
+    COLLECT_ALREADY_COLLECTED,
+    COLLECT_ALREADY_IN_COLLECTION,
+    UnprocessedKeysError,
+)
 from auth import get_current_user
+from encoding import (
+    COMPACT_CONTENT,
+    compact_nearby,
+    compact_path_page,
+    compact_user_postcards,
+    is_compact,
+    negotiate,
+    render,
+)
+from etag import etag_matches, make_etag, not_modified, set_etag
+from map_tiles import MAP_TILE_MAX_AGE, get_cached_tile, get_tile
+from nearby_stream import NearbyHub, event_stream
 
 router = APIRouter(prefix="/api/postcards", tags=["postcards"])
 
+# 近くの絵葉書の配信はワーカーごとに1つのハブで位置を取得して共有する
+nearby_hub = NearbyHub(db)
+
+# DynamoDB のスロットリングで一覧を読み切れなかった場合に再試行を促す秒数
+THROTTLED_RETRY_AFTER = 1
+
+
+def parse_fields(fields: Optional[str], allowed) -> Optional[List[str]]:
+    """Parse a comma-separated ``fields`` parameter (400 on unknown names)"""
+    if not fields:
+        return None
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"fields に指定できない項目があります: {', '.join(unknown)}",
+        )
+    return selected
+
+
+def throttled_error() -> HTTPException:
+    """503 asking the client to retry a request DynamoDB throttled"""
+    return HTTPException(
+        status_code=503,
+        detail="混み合っています。しばらくしてから再度お試しください。",
+        headers={"Retry-After": str(THROTTLED_RETRY_AFTER)},
+    )
+
+
+def to_postcard_detail(postcard: dict, likes_count: int, path, user_id: str) -> dict:
+    """Shape a postcard item as the detail response seen by ``user_id``"""
+    return {
+        "postcard_id": postcard["postcard_id"],
+        "image_url": postcard["image_url"],
+        "text": postcard["text"],
+        "created_at": postcard["created_at"],
+        "author_id": postcard["author_id"],
+        "likes_count": likes_count,
+        "path": path,
+        "is_own": postcard["author_id"] == user_id,
+        "current_position": {
+            "lat": float(postcard["current_lat"]),
+            "lon": float(postcard["current_lon"]),
+        }
+        if postcard.get("current_lat") and postcard.get("current_lon")
+        else None,
+    }
+
+
+COLLECT_ERROR_DETAILS = {
+    COLLECT_NOT_FOUND: "指定した絵葉書IDが見つかりません。",
+    COLLECT_ALREADY_COLLECTED: "この絵葉書はすでに拾われています。",
+    COLLECT_ALREADY_IN_COLLECTION: "この絵葉書はすでにコレクションに追加されています。",
+}
+
 
 @router.post(
     "",
@@ -40,15 +125,16 @@ async def create_postcard(
 ):
     author_id = current_user["user_id"]
 
-    # 認証済みユーザーの詳細情報をDBから取得
-    author = db.get_user(author_id)
+    # プロフィールを先に確認する（キャッシュされた読み取り）。書き込んでから
+    # 取り消すと、軌跡のチャンクが残り、絵葉書が一時的に他の利用者に見えてしまう
+    author = await db.get_user(author_id)
     if not author:
         raise HTTPException(
             status_code=404,
             detail="ユーザープロフィールが見つかりません。ユーザープロフィールを先に作成してください。",
         )
 
-    result = db.create_postcard(
+    result = await db.create_postcard(
         author_id=author_id,
         image_url=postcard_data.image_url,
         text=postcard_data.text,
@@ -61,6 +147,58 @@ async def create_postcard(
     )
 
 
+@router.post(
+    "/batch",
+    response_model=PostcardBatchResponse,
+    tags=["collection"],
+    summary="絵葉書の一括取得",
+    description="指定した複数の絵葉書（最大100件）の詳細情報をまとめて取得します。地図やコレクション画面で多数の絵葉書を表示する際に利用します。旅の軌跡は `include_path` を指定した場合のみ含まれます。見つからなかった絵葉書IDは `missing` に、混雑により取得できなかった絵葉書IDは `unprocessed` に含まれます（`unprocessed` は時間をおいて再度取得してください）。",
+    responses={
+        401: {
+            "model": ErrorResponse,
+            "description": "認証トークンがない、または無効な場合",
+        },
+        422: {
+            "model": ErrorResponse,
+            "description": "絵葉書IDの指定が不正、または件数が多すぎる場合",
+        },
+    },
+)
+async def get_postcards_batch(
+    request: PostcardBatchRequest, current_user: dict = Depends(get_current_user)
+):
+    postcard_ids = list(dict.fromkeys(request.postcard_ids))
+
+    # キャッシュにない絵葉書は BatchGetItem でまとめて取得する
+    postcards, unprocessed = await db.get_postcards(postcard_ids)
+    found = [postcard_id for postcard_id in postcard_ids if postcard_id in postcards]
+
+    likes_counts = await asyncio.gather(
+        *(db.get_likes_count(postcards[postcard_id]) for postcard_id in found)
+    )
+    if request.include_path:
+        paths = await asyncio.gather(
+            *(db.get_postcard_path(postcard_id) for postcard_id in found)
+        )
+    else:
+        paths = [None] * len(found)
+
+    return PostcardBatchResponse(
+        postcards=[
+            to_postcard_detail(
+                postcards[postcard_id], likes_count, path, current_user["user_id"]
+            )
+            for postcard_id, likes_count, path in zip(found, likes_counts, paths)
+        ],
+        missing=[
+            postcard_id
+            for postcard_id in postcard_ids
+            if postcard_id not in postcards and postcard_id not in unprocessed
+        ],
+        unprocessed=unprocessed,
+    )
+
+
 @router.put(
     "/{postcard_id}",
     response_model=PostcardUpdateResponse,
@@ -88,7 +226,7 @@ async def update_postcard(
     current_user: dict = Depends(get_current_user),
 ):
     # Check if postcard exists and user owns it
-    postcard = db.get_postcard(postcard_id)
+    postcard = await db.get_postcard(postcard_id)
     if not postcard:
         raise HTTPException(
             status_code=404, detail="指定した絵葉書IDが見つからない場合"
@@ -99,7 +237,7 @@ async def update_postcard(
             status_code=403, detail="他のユーザーの絵葉書を更新しようとした場合"
         )
 
-    success = db.update_postcard(
+    success = await db.update_postcard(
         postcard_id=postcard_id,
         image_url=postcard_data.image_url,
         text=postcard_data.text,
@@ -137,7 +275,7 @@ async def delete_postcard(
     postcard_id: str, current_user: dict = Depends(get_current_user)
 ):
     # Check if postcard exists and user owns it
-    postcard = db.get_postcard(postcard_id)
+    postcard = await db.get_postcard(postcard_id)
     if not postcard:
         raise HTTPException(
             status_code=404, detail="指定した絵葉書IDが見つからない場合"
@@ -148,7 +286,7 @@ async def delete_postcard(
             status_code=403, detail="他のユーザーの絵葉書を削除しようとした場合"
         )
 
-    success = db.delete_postcard(postcard_id)
+    success = await db.delete_postcard(postcard_id)
     if not success:
         raise HTTPException(status_code=400, detail="絵葉書の削除に失敗しました。")
 
@@ -160,10 +298,17 @@ async def delete_postcard(
 @router.get(
     "/{postcard_id}/path",
     response_model=PostcardPathResponse,
+    response_model_exclude_unset=True,
     tags=["travel"],
     summary="絵葉書の旅の軌跡取得",
-    description="指定した絵葉書がこれまでに辿った旅の軌跡（経由地）を取得します。",
+    description="指定した絵葉書がこれまでに辿った旅の軌跡（経由地）を到着時刻の古い順に取得します。`since` を指定するとその時刻より後に到着した経由地のみを返すため、差分だけを取得できます。`next_cursor` が返された場合は `cursor` に指定して続きを取得します。`tolerance` を指定すると、その誤差（メートル）以内で経由地を間引いて返します。`fields`（例: `lat,lon`）を指定すると、経由地の指定した項目のみを返します。`Accept: application/vnd.postcard.compact+json`（または `application/msgpack`）を指定すると、経由地を項目ごとの配列で返し、座標は 1e-5 度単位の整数、到着時刻はマイクロ秒の整数で、それぞれ直前の値との差分になります。レスポンスには `ETag` が付き、軌跡が変わっていなければ `If-None-Match` に対して 304 を返します。",
     responses={
+        200: {"content": COMPACT_CONTENT},
+        304: {"description": "軌跡が変わっていない場合"},
+        400: {
+            "model": ErrorResponse,
+            "description": "since、cursor または fields が不正な場合",
+        },
         401: {
             "model": ErrorResponse,
             "description": "認証トークンがない、または無効な場合",
@@ -175,17 +320,81 @@ async def delete_postcard(
     },
 )
 async def get_postcard_path(
-    postcard_id: str, _current_user: dict = Depends(get_current_user)
+    postcard_id: str,
+    since: Optional[str] = Query(
+        None, description="この時刻（ISO 8601）より後に到着した経由地のみを取得"
+    ),
+    limit: Optional[int] = Query(
+        None, ge=1, le=1000, description="1回で取得する経由地の最大件数"
+    ),
+    cursor: Optional[str] = Query(None, description="前回のレスポンスの next_cursor"),
+    tolerance: Optional[float] = Query(
+        None, gt=0, description="軌跡を簡略化する際の許容誤差（メートル）"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="経由地に含める項目（カンマ区切り: prefecture, lat, lon, arrival_time）",
+    ),
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    _current_user: dict = Depends(get_current_user),
 ):
-    # Check if postcard exists
-    postcard = db.get_postcard(postcard_id)
+    selected_fields = parse_fields(fields, PATH_POINT_FIELDS)
+    media_type = negotiate(accept)
+
+    # 存在確認と軌跡の更新状況の確認を並行して実行する
+    postcard, path_version = await asyncio.gather(
+        db.get_postcard(postcard_id), db.get_path_version(postcard_id)
+    )
     if not postcard:
         raise HTTPException(
             status_code=404, detail="指定した絵葉書IDが見つからない場合"
         )
 
-    path = db.get_postcard_path(postcard_id)
-    return PostcardPathResponse(postcard_id=postcard_id, path=path)
+    # 軌跡が変わっていなければ経由地を読み込まずに 304 を返す
+    etag = make_etag(
+        postcard_id,
+        path_version,
+        since,
+        limit,
+        cursor,
+        tolerance,
+        selected_fields,
+        media_type,
+    )
+    if etag_matches(if_none_match, etag):
+        response = not_modified(etag)
+        response.headers["Vary"] = "Accept"
+        return response
+
+    try:
+        page = await db.get_postcard_path_page(
+            postcard_id,
+            since=since,
+            limit=limit,
+            cursor=cursor,
+            tolerance=tolerance,
+            fields=selected_fields,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since または cursor が不正です。")
+
+    if is_compact(media_type):
+        content = compact_path_page(
+            postcard_id,
+            page["path"],
+            page["next_cursor"],
+            selected_fields or PATH_POINT_FIELDS,
+        )
+    else:
+        content = {
+            "postcard_id": postcard_id,
+            "path": page["path"],
+            "next_cursor": page["next_cursor"],
+        }
+    response = render(content, media_type)
+    set_etag(response, etag)
+    return response
 
 
 @router.get(
@@ -193,8 +402,9 @@ async def get_postcard_path(
     response_model=List[NearbyPostcard],
     tags=["tracking"],
     summary="近くの絵葉書取得",
-    description="クライアントの現在地付近を通過中の、リレー中の絵葉書を取得します。このAPIは、クライアント側で定期的に呼び出されることを想定しています。",
+    description="クライアントの現在地付近を通過中の、リレー中の絵葉書を取得します。このAPIは、クライアント側で定期的に呼び出されることを想定しています。`Accept: application/vnd.postcard.compact+json`（または `application/msgpack`）を指定すると、項目ごとの配列で返し、座標は 1e-5 度単位の整数で直前の値との差分になります。",
     responses={
+        200: {"content": COMPACT_CONTENT},
         400: {
             "model": ErrorResponse,
             "description": "lat または lon が欠けている、または不正な場合",
@@ -209,10 +419,136 @@ async def get_nearby_postcards(
     lat: float = Query(..., description="クライアントの現在地の緯度"),
     lon: float = Query(..., description="クライアントの現在地の経度"),
     radius: Optional[int] = Query(1000, description="検索範囲（半径、メートル単位）"),
+    accept: Optional[str] = Header(None),
+    _current_user: dict = Depends(get_current_user),
+):
+    media_type = negotiate(accept)
+    nearby_postcards = await db.get_nearby_postcards(lat, lon, radius)
+    if is_compact(media_type):
+        return render(compact_nearby(nearby_postcards), media_type)
+    # レスポンスモデルにない項目（distance_meters）は含めない
+    return render(
+        [
+            {field: postcard[field] for field in NearbyPostcard.model_fields}
+            for postcard in nearby_postcards
+        ],
+        media_type,
+    )
+
+
+@router.get(
+    "/nearby/stream",
+    tags=["tracking"],
+    summary="近くの絵葉書の変化を購読",
+    description="クライアントの現在地付近の絵葉書の変化を Server-Sent Events で受け取ります。接続直後に範囲内の全件を `snapshot` イベントで送り、以降は位置が更新されるたびに差分のみを `entered`（範囲内に入った）、`moved`（範囲内で移動した）、`left`（範囲外に出た）、`collected`（拾われた）イベントで送ります。受信が遅れた場合は差分の代わりに `snapshot` が送られます。現在地が変わった場合は接続し直してください。接続の開始までに同時接続数が上限に達した場合は `error` イベントを送って切断します。",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        401: {
+            "model": ErrorResponse,
+            "description": "認証トークンがない、または無効な場合",
+        },
+        503: {
+            "model": ErrorResponse,
+            "description": "同時接続数の上限に達している場合",
+        },
+    },
+)
+async def stream_nearby_postcards(
+    lat: float = Query(..., description="クライアントの現在地の緯度"),
+    lon: float = Query(..., description="クライアントの現在地の経度"),
+    radius: Optional[int] = Query(1000, description="検索範囲（半径、メートル単位）"),
+    _current_user: dict = Depends(get_current_user),
+):
+    # 購読の登録と解除は event_stream の中で行う（送信が始まらなければ枠を使わない）
+    if not nearby_hub.has_capacity():
+        raise HTTPException(
+            status_code=503,
+            detail="接続数が上限に達しています。しばらくしてから再度お試しください。",
+        )
+
+    return StreamingResponse(
+        event_stream(nearby_hub, lat, lon, radius),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/in-bounds",
+    response_model=PostcardsInBoundsResponse,
+    tags=["tracking"],
+    summary="表示範囲内の絵葉書取得",
+    description="地図の表示範囲（緯度経度の矩形）内にある、リレー中の絵葉書を取得します。範囲内の件数が多い場合は、ズームレベルに応じたグリッドでまとめ、件数と重心を `clusters` として返します。まとめられなかった絵葉書は `postcards` に個別に含まれます。`total` は範囲内の全件数です。",
+    responses={
+        400: {
+            "model": ErrorResponse,
+            "description": "表示範囲が不正な場合",
+        },
+        401: {
+            "model": ErrorResponse,
+            "description": "認証トークンがない、または無効な場合",
+        },
+    },
+)
+async def get_postcards_in_bounds(
+    min_lat: float = Query(..., ge=-90, le=90, description="表示範囲の南端の緯度"),
+    min_lon: float = Query(..., ge=-180, le=180, description="表示範囲の西端の経度"),
+    max_lat: float = Query(..., ge=-90, le=90, description="表示範囲の北端の緯度"),
+    max_lon: float = Query(..., ge=-180, le=180, description="表示範囲の東端の経度"),
+    zoom: int = Query(..., ge=0, le=22, description="地図のズームレベル"),
+    _current_user: dict = Depends(get_current_user),
+):
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="表示範囲が不正です。")
+
+    return await db.get_postcards_in_bounds(min_lat, min_lon, max_lat, max_lon, zoom)
+
+
+@router.get(
+    "/tiles/{z}/{x}/{y}",
+    tags=["tracking"],
+    summary="地図タイル内の絵葉書取得",
+    description="Web メルカトルの z/x/y タイル内にある、リレー中の絵葉書の位置を取得します。座標はタイル内の整数座標（0 〜 extent-1）で、絵葉書とクラスタをそれぞれ列ごとの配列で返します。レスポンスには `ETag` と `Cache-Control`（利用者のブラウザのみにキャッシュさせる `private`）が付き、内容が変わっていなければ `If-None-Match` に対して 304 を返します。",
+    responses={
+        200: {"model": PostcardTile},
+        304: {"description": "タイルの内容が変わっていない場合"},
+        401: {
+            "model": ErrorResponse,
+            "description": "認証トークンがない、または無効な場合",
+        },
+        404: {
+            "model": ErrorResponse,
+            "description": "タイル座標が範囲外の場合",
+        },
+    },
+)
+async def get_postcard_tile(
+    z: int = Path(..., ge=0, le=22, description="ズームレベル"),
+    x: int = Path(..., ge=0, description="タイルの列"),
+    y: int = Path(..., ge=0, description="タイルの行"),
+    if_none_match: Optional[str] = Header(None),
     _current_user: dict = Depends(get_current_user),
 ):
-    nearby_postcards = db.get_nearby_postcards(lat, lon, radius)
-    return nearby_postcards
+    if x >= 2**z or y >= 2**z:
+        raise HTTPException(status_code=404, detail="タイル座標が範囲外です。")
+
+    snapshot = await db.get_active_snapshot()
+    # 描画済みならイベントループ上で返し、範囲の走査と描画はスレッドで行う
+    tile = get_cached_tile(snapshot, z, x, y) or await asyncio.to_thread(
+        get_tile, snapshot, z, x, y
+    )
+    # 認証が必要なため共有キャッシュ（CDN やプロキシ）には保存させない
+    headers = {
+        "ETag": tile.etag,
+        "Cache-Control": f"private, max-age={MAP_TILE_MAX_AGE}",
+        "Vary": "Authorization",
+    }
+    if etag_matches(if_none_match, tile.etag):
+        response = not_modified(tile.etag, headers["Cache-Control"])
+        response.headers["Vary"] = headers["Vary"]
+        return response
+    return Response(tile.body, media_type="application/json", headers=headers)
 
 
 @router.post(
@@ -237,11 +573,14 @@ async def collect_postcard(
 ):
     user_id = current_user["user_id"]
 
-    success = db.collect_postcard(user_id, postcard_id)
-    if not success:
+    result = await db.collect_postcard(user_id, postcard_id)
+    if result != COLLECT_OK:
         raise HTTPException(
             status_code=404,
-            detail="指定した絵葉書IDが見つからない、またはすでに拾われている場合",
+            detail=COLLECT_ERROR_DETAILS.get(
+                result,
+                "指定した絵葉書IDが見つからない、またはすでに拾われている場合",
+            ),
         )
 
     return CollectResponse(message="絵葉書をコレクションに追加しました。")
@@ -250,23 +589,77 @@ async def collect_postcard(
 @router.get(
     "/my",
     response_model=UserPostcardsResponse,
+    response_model_exclude_unset=True,
     tags=["user"],
     summary="自分の投稿した絵葉書取得",
-    description="ログイン中のユーザーが投稿した全ての絵葉書を取得します。作成日時の新しい順に並びます。",
+    description="ログイン中のユーザーが投稿した絵葉書を作成日時の新しい順に取得します。`limit` を指定しない場合は全件を返します。`limit` を指定して `next_cursor` が返された場合は `cursor` に指定して続きを取得します。`fields` を指定すると指定した項目のみを返します。旅の軌跡が不要な場合は `include_path=false` を指定します。`Accept: application/vnd.postcard.compact+json`（または `application/msgpack`）を指定すると、項目ごとの配列で返します。",
     responses={
+        200: {"content": COMPACT_CONTENT},
+        400: {
+            "model": ErrorResponse,
+            "description": "cursor または fields が不正な場合",
+        },
         401: {
             "model": ErrorResponse,
             "description": "認証トークンがない、または無効な場合",
         },
+        503: {
+            "model": ErrorResponse,
+            "description": "混雑により一覧を取得できなかった場合（Retry-After 秒後に再試行）",
+        },
     },
 )
-async def get_my_postcards(current_user: dict = Depends(get_current_user)):
-    """Get all postcards created by the current user"""
+async def get_my_postcards(
+    limit: Optional[int] = Query(
+        None, ge=1, le=100, description="1回で取得する絵葉書の最大件数（省略時は全件）"
+    ),
+    cursor: Optional[str] = Query(None, description="前回のレスポンスの next_cursor"),
+    fields: Optional[str] = Query(
+        None,
+        description="含める項目（カンマ区切り: "
+        + ", ".join(POSTCARD_FIELD_ATTRIBUTES)
+        + "）",
+    ),
+    include_path: bool = Query(True, description="旅の軌跡を含めるか"),
+    accept: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+):
+    """Get one page of postcards created by the current user"""
     user_id = current_user["user_id"]
-
-    postcards_data = db.get_user_postcards(user_id)
-
-    return UserPostcardsResponse(postcards=postcards_data, count=len(postcards_data))
+    selected_fields = parse_fields(fields, POSTCARD_FIELD_ATTRIBUTES)
+
+    try:
+        page = await db.get_user_postcards(
+            user_id,
+            limit=limit,
+            cursor=cursor,
+            fields=selected_fields,
+            include_path=include_path,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="cursor が不正です。")
+    except UnprocessedKeysError:
+        raise throttled_error()
+
+    media_type = negotiate(accept)
+    if is_compact(media_type):
+        return render(
+            compact_user_postcards(
+                page["postcards"],
+                page["next_cursor"],
+                selected_fields or POSTCARD_FIELD_ATTRIBUTES,
+                PATH_POINT_FIELDS,
+            ),
+            media_type,
+        )
+    return render(
+        {
+            "postcards": page["postcards"],
+            "count": len(page["postcards"]),
+            "next_cursor": page["next_cursor"],
+        },
+        media_type,
+    )
 
 
 @router.get(
@@ -274,8 +667,9 @@ async def get_my_postcards(current_user: dict = Depends(get_current_user)):
     response_model=PostcardDetail,
     tags=["collection"],
     summary="絵葉書詳細取得",
-    description="指定した絵葉書の詳細情報を取得します。コレクションから詳細画面を表示する際に利用します。",
+    description="指定した絵葉書の詳細情報を取得します。コレクションから詳細画面を表示する際に利用します。レスポンスには `ETag` が付き、内容が変わっていなければ `If-None-Match` に対して 304 を返します。",
     responses={
+        304: {"description": "絵葉書の内容が変わっていない場合"},
         401: {
             "model": ErrorResponse,
             "description": "認証トークンがない、または無効な場合",
@@ -287,31 +681,39 @@ async def get_my_postcards(current_user: dict = Depends(get_current_user)):
     },
 )
 async def get_postcard_detail(
-    postcard_id: str, current_user: dict = Depends(get_current_user)
+    postcard_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
 ):
-    postcard = db.get_postcard(postcard_id)
+    postcard, path_version = await asyncio.gather(
+        db.get_postcard(postcard_id), db.get_path_version(postcard_id)
+    )
     if not postcard:
         raise HTTPException(
             status_code=404, detail="指定した絵葉書IDが見つからない場合"
         )
 
-    path = db.get_postcard_path(postcard_id)
+    likes_count = await db.get_likes_count(postcard)
+    is_own = postcard["author_id"] == current_user["user_id"]
+
+    # メタデータと軌跡の更新状況が同じなら、軌跡を読み込まずに 304 を返す
+    etag = make_etag(
+        postcard_id,
+        postcard.get("updated_at"),
+        postcard.get("status"),
+        likes_count,
+        path_version,
+        is_own,
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    path = await db.get_postcard_path(postcard_id)
 
+    set_etag(response, etag)
     return PostcardDetail(
-        postcard_id=postcard["postcard_id"],
-        image_url=postcard["image_url"],
-        text=postcard["text"],
-        created_at=postcard["created_at"],
-        author_id=postcard["author_id"],
-        likes_count=postcard["likes_count"],
-        path=path,
-        is_own=postcard["author_id"] == current_user["user_id"],
-        current_position={
-            "lat": float(postcard["current_lat"]),
-            "lon": float(postcard["current_lon"]),
-        }
-        if postcard.get("current_lat") and postcard.get("current_lon")
-        else None,
+        **to_postcard_detail(postcard, likes_count, path, current_user["user_id"])
     )
 
 
@@ -341,15 +743,12 @@ async def like_postcard(
 ):
     user_id = current_user["user_id"]
 
-    # Check if postcard exists
-    postcard = db.get_postcard(postcard_id)
-    if not postcard:
+    result = await db.like_postcard(user_id, postcard_id)
+    if result == LIKE_NOT_FOUND:
         raise HTTPException(
             status_code=404, detail="指定した絵葉書IDが見つからない場合"
         )
-
-    success = db.like_postcard(user_id, postcard_id)
-    if not success:
+    if result == LIKE_ALREADY_LIKED:
         raise HTTPException(
             status_code=409,
             detail="すでにいいね済みの絵葉書に再度いいねしようとした場合",
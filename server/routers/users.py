@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from models import (
     UserCreateRequest,
     UserCreateResponse,
@@ -11,6 +13,7 @@ from models import (
 )
 from database import db
 from auth import get_current_user
+from etag import etag_matches, make_etag, not_modified, set_etag
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -40,7 +43,7 @@ async def create_user_profile(
     email = current_user["email"]
 
     # Create user profile in database
-    success = db.create_user(
+    success = await db.create_user(
         user_id=user_id,
         username=user_data.username,
         email=email,
@@ -61,8 +64,9 @@ async def create_user_profile(
     "/me",
     response_model=UserProfile,
     summary="自身のユーザー情報取得",
-    description="認証済みユーザー自身の情報を取得します。",
+    description="認証済みユーザー自身の情報を取得します。レスポンスには `ETag` が付き、内容が変わっていなければ `If-None-Match` に対して 304 を返します。",
     responses={
+        304: {"description": "ユーザー情報が変わっていない場合"},
         401: {
             "model": ErrorResponse,
             "description": "認証トークンがない、または無効な場合",
@@ -73,15 +77,24 @@ async def create_user_profile(
         },
     },
 )
-async def get_my_profile(current_user: dict = Depends(get_current_user)):
+async def get_my_profile(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+):
     user_id = current_user["user_id"]
 
-    user = db.get_user(user_id)
+    user = await db.get_user(user_id)
     if not user:
         raise HTTPException(
             status_code=404, detail="ユーザープロフィールが見つかりません。"
         )
 
+    etag = make_etag("me", user_id, user.get("updated_at"))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     return UserProfile(
         user_id=user["user_id"],
         username=user["username"],
@@ -94,8 +107,9 @@ async def get_my_profile(current_user: dict = Depends(get_current_user)):
     "/{user_id}",
     response_model=UserPublicProfile,
     summary="他のユーザー情報取得",
-    description="指定した user_id のユーザー情報を取得します。他のユーザーのプロフィール閲覧に利用します。",
+    description="指定した user_id のユーザー情報を取得します。他のユーザーのプロフィール閲覧に利用します。レスポンスには `ETag` が付き、内容が変わっていなければ `If-None-Match` に対して 304 を返します。",
     responses={
+        304: {"description": "ユーザー情報が変わっていない場合"},
         401: {
             "model": ErrorResponse,
             "description": "認証トークンがない、または無効な場合",
@@ -107,14 +121,22 @@ async def get_my_profile(current_user: dict = Depends(get_current_user)):
     },
 )
 async def get_user_profile(
-    user_id: str, _current_user: dict = Depends(get_current_user)
+    user_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    _current_user: dict = Depends(get_current_user),
 ):
-    user = db.get_user(user_id)
+    user = await db.get_user(user_id)
     if not user:
         raise HTTPException(
             status_code=404, detail="指定したユーザーIDが見つかりません。"
         )
 
+    etag = make_etag("public", user_id, user.get("updated_at"))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     return UserPublicProfile(
         user_id=user["user_id"],
         username=user["username"],
@@ -140,7 +162,7 @@ async def update_my_profile(
 ):
     user_id = current_user["user_id"]
 
-    success = db.update_user(
+    success = await db.update_user(
         user_id=user_id,
         username=user_data.username,
         profile_image_url=user_data.profile_image_url,
@@ -169,7 +191,7 @@ async def update_my_profile(
 async def delete_my_profile(current_user: dict = Depends(get_current_user)):
     user_id = current_user["user_id"]
 
-    success = db.delete_user(user_id)
+    success = await db.delete_user(user_id)
     if not success:
         raise HTTPException(
             status_code=404, detail="ユーザープロフィールが見つかりません。"
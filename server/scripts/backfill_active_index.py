@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Backfill the active-postcard index keys
+Postcards created before the index existed have no GSI-1 keys. This script
+adds them to every postcard that has not been collected yet.
+
+Usage:
+    python scripts/backfill_active_index.py [--dry-run]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from boto3.dynamodb.conditions import Attr
+
+# Add parent directory to path to import database
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import DynamoDBClient
+from database.postcards import ACTIVE_INDEX_PK
+
+
+def iter_unindexed_postcards(client: DynamoDBClient):
+    """Scan for uncollected postcards that lack the index keys"""
+    scan_kwargs = {
+        "FilterExpression": Attr("SK").eq("METADATA")
+        & Attr("status").ne("collected")
+        & Attr("GSI-1-PK").not_exists(),
+        "ProjectionExpression": "PK, SK, postcard_id",
+    }
+    while True:
+        response = client.table.scan(**scan_kwargs)
+        yield from response["Items"]
+        if "LastEvaluatedKey" not in response:
+            return
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="変更せずに対象件数のみ表示"
+    )
+    args = parser.parse_args()
+
+    client = DynamoDBClient()
+    count = 0
+    for item in iter_unindexed_postcards(client):
+        if not args.dry_run:
+            client.table.update_item(
+                Key={"PK": item["PK"], "SK": item["SK"]},
+                UpdateExpression="SET #index_pk = :pk, #index_sk = :sk",
+                # 並行して回収された絵葉書には付与しない
+                ConditionExpression=Attr("status").ne("collected"),
+                ExpressionAttributeNames={
+                    "#index_pk": "GSI-1-PK",
+                    "#index_sk": "GSI-1-SK",
+                },
+                ExpressionAttributeValues={
+                    ":pk": ACTIVE_INDEX_PK,
+                    ":sk": item["postcard_id"],
+                },
+            )
+        count += 1
+
+    action = "Would index" if args.dry_run else "Indexed"
+    print(f"{action} {count} postcard(s) in {client.table_name}")
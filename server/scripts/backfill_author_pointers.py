@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Backfill the author pointer items
+Postcards created before /api/postcards/my was paginated have no
+USER#<author> / POSTCARD#<created_at>#<id> pointer. This script writes the
+pointer for every postcard; existing pointers are simply overwritten.
+
+Usage:
+    python scripts/backfill_author_pointers.py [--dry-run]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from boto3.dynamodb.conditions import Attr
+
+# Add parent directory to path to import database
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import DynamoDBClient
+from database.postcards import author_pointer
+
+
+def iter_postcards(client: DynamoDBClient):
+    """Scan for every postcard metadata item"""
+    scan_kwargs = {
+        "FilterExpression": Attr("SK").eq("METADATA")
+        & Attr("PK").begins_with("POSTCARD#"),
+        "ProjectionExpression": "postcard_id, author_id, created_at",
+    }
+    while True:
+        response = client.table.scan(**scan_kwargs)
+        yield from response["Items"]
+        if "LastEvaluatedKey" not in response:
+            return
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="変更せずに対象件数のみ表示"
+    )
+    args = parser.parse_args()
+
+    client = DynamoDBClient()
+    count = 0
+    with client.table.batch_writer() as batch:
+        for item in iter_postcards(client):
+            if not args.dry_run:
+                batch.put_item(
+                    Item=author_pointer(
+                        item["author_id"], item["created_at"], item["postcard_id"]
+                    )
+                )
+            count += 1
+
+    action = "Would write" if args.dry_run else "Wrote"
+    print(f"{action} {count} author pointer(s) in {client.table_name}")
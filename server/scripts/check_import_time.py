@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for the API server
+Imports ``main`` in fresh interpreters under ``python -X importtime`` and
+fails when the fastest run exceeds the budget. AWS settings are removed
+from the environment, so the check also fails if importing the app starts
+creating AWS clients again. Prints the modules with the largest own
+import time to show where a regression came from.
+
+Usage:
+    python scripts/check_import_time.py [--budget-ms 1000] [--runs 5] [--top 15]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Tuple
+
+SERVER_DIR = Path(__file__).parent.parent
+
+# import 時に AWS クライアントを作ると、リージョン未設定で失敗するようにする
+AWS_ENV_VARS = (
+    "AWS_REGION",
+    "AWS_DEFAULT_REGION",
+    "AWS_PROFILE",
+    "AWS_ACCESS_KEY_ID",
+    "AWS_SECRET_ACCESS_KEY",
+    "AWS_SESSION_TOKEN",
+)
+
+
+def measure(module: str) -> Tuple[int, Dict[str, int]]:
+    """Import a module in a new interpreter; return its cumulative and each module's own time (µs)"""
+    env = {k: v for k, v in os.environ.items() if k not in AWS_ENV_VARS}
+    # ~/.aws/config のリージョンも読ませない
+    env["AWS_CONFIG_FILE"] = os.devnull
+    env["AWS_SHARED_CREDENTIALS_FILE"] = os.devnull
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SERVER_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:], file=sys.stderr)
+        raise SystemExit(f"Importing {module} failed without AWS configuration")
+
+    cumulative = 0
+    self_times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        self_times[name.strip()] = int(self_us)
+        if name.strip() == module:
+            cumulative = int(cumulative_us)
+    return cumulative, self_times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.getenv("IMPORT_TIME_BUDGET_MS", "1000")),
+        help="Maximum import time of main in milliseconds",
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Number of imports")
+    parser.add_argument("--top", type=int, default=15, help="Modules to list")
+    args = parser.parse_args()
+
+    # 初回はバイトコードの生成やディスク読み込みを含むため、最速の回で判定する
+    runs = [measure("main") for _ in range(max(args.runs, 1))]
+    best_us, self_times = min(runs, key=lambda run: run[0])
+
+    print(f"{'self [ms]':>10}  module")
+    for name, self_us in sorted(self_times.items(), key=lambda item: -item[1])[
+        : args.top
+    ]:
+        print(f"{self_us / 1000:10.1f}  {name}")
+
+    best_ms = best_us / 1000
+    print(f"import main: {best_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if best_ms > args.budget_ms:
+        sys.exit(1)
@@ -2,6 +2,7 @@
 """
 OpenAPI spec generator for the Postcard API
 Run this script to generate the OpenAPI specification JSON file
+AWS clients are created on first use, so no AWS configuration is needed
 """
 
 import json
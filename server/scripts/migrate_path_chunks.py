@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Migrate per-point path items to chunked path storage
+Legacy path points are stored as one item each (SK = PATH#...). This script
+folds them, together with any chunks already written for the same postcard,
+into PATHCHUNK# items holding up to PATH_CHUNK_SIZE points each.
+Run it while the location updater is paused.
+
+Usage:
+    python scripts/migrate_path_chunks.py [--dry-run]
+"""
+
+import argparse
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+# Add parent directory to path to import database
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import DynamoDBClient
+from database.polyline import COORD_SCALE, timestamp_to_micros
+from database.postcards import PATH_CHUNK_PREFIX, PATH_CHUNK_SIZE
+
+
+def find_legacy_path_items(client: DynamoDBClient) -> dict:
+    """Scan the table for per-point path items, grouped by postcard PK"""
+    legacy = defaultdict(list)
+    scan_kwargs = {"FilterExpression": Attr("SK").begins_with("PATH#")}
+    while True:
+        response = client.table.scan(**scan_kwargs)
+        for item in response["Items"]:
+            legacy[item["PK"]].append(item)
+        if "LastEvaluatedKey" not in response:
+            return legacy
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def migrate_postcard(client: DynamoDBClient, pk: str, legacy_items: list) -> int:
+    """Rewrite one postcard's whole path as chunks and delete the old items
+
+    The new chunks are written and verified before anything is deleted,
+    so an interrupted run loses no points and can simply be run again
+    (points already present in both forms are merged). Superseded chunks
+    are only deleted while they still hold the points that were read, so
+    a point appended by the server meanwhile stops the postcard with an
+    error instead of being lost.
+    """
+    postcard_id = pk[len("POSTCARD#") :]
+
+    existing_chunks = client.table.query(
+        KeyConditionExpression=Key("PK").eq(pk)
+        & Key("SK").begins_with(PATH_CHUNK_PREFIX),
+        ProjectionExpression="PK, SK, n",
+        ConsistentRead=True,
+    )["Items"]
+
+    # 1e-5 度単位に揃えて重複を除く（再実行時は同じ点が旧形式とチャンクの両方にある）
+    points = {
+        (
+            client._normalize_timestamp(item["arrival_time"]),
+            item["prefecture"],
+            round(float(item["lat"]) * COORD_SCALE),
+            round(float(item["lon"]) * COORD_SCALE),
+        )
+        for item in legacy_items
+    }
+    points.update(
+        (
+            p["arrival_time"],
+            p["prefecture"],
+            round(p["lat"] * COORD_SCALE),
+            round(p["lon"] * COORD_SCALE),
+        )
+        for p in client.postcards.get_postcard_path(postcard_id)
+    )
+    points = sorted(points)
+
+    # 1. 新しいチャンクを書く（同じ SK の既存チャンクは、読んだ時点のままなら上書き）
+    existing_n = {item["SK"]: int(item["n"]) for item in existing_chunks}
+    written = {}
+    for start in range(0, len(points), PATH_CHUNK_SIZE):
+        chunk = points[start : start + PATH_CHUNK_SIZE]
+        sk = f"{PATH_CHUNK_PREFIX}{chunk[0][0]}"
+        client.postcards._put_path_chunk(
+            postcard_id,
+            [point[1] for point in chunk],
+            [point[2] for point in chunk],
+            [point[3] for point in chunk],
+            [timestamp_to_micros(point[0]) for point in chunk],
+            replace_n=existing_n.get(sk),
+        )
+        written[sk] = len(chunk)
+
+    # 2. 書いたチャンクを読み直し、点の数が一致することを確かめる
+    for sk, count in written.items():
+        item = client.table.get_item(
+            Key={"PK": pk, "SK": sk}, ProjectionExpression="n", ConsistentRead=True
+        ).get("Item")
+        if item is None or int(item["n"]) != count:
+            raise RuntimeError(f"{pk}: chunk {sk} was not written as expected")
+
+    # 3. 旧形式の項目と、書き直していない古いチャンクを削除する
+    for item in existing_chunks:
+        if item["SK"] in written:
+            continue
+        try:
+            client.table.delete_item(
+                Key={"PK": pk, "SK": item["SK"]},
+                ConditionExpression=Attr("n").eq(item["n"]),
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            raise RuntimeError(
+                f"{pk}: chunk {item['SK']} changed during the migration; run again"
+            ) from e
+    with client.table.batch_writer() as batch:
+        for item in legacy_items:
+            batch.delete_item(Key={"PK": item["PK"], "SK": item["SK"]})
+    return len(points)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="変更せずに対象件数のみ表示"
+    )
+    args = parser.parse_args()
+
+    client = DynamoDBClient()
+    legacy = find_legacy_path_items(client)
+    legacy_count = sum(len(items) for items in legacy.values())
+
+    if args.dry_run:
+        print(
+            f"Would migrate {legacy_count} path point(s) of {len(legacy)} postcard(s) "
+            f"in {client.table_name}"
+        )
+        sys.exit(0)
+
+    failed = migrated = 0
+    for pk, items in legacy.items():
+        try:
+            total = migrate_postcard(client, pk, items)
+        except (ClientError, RuntimeError) as e:
+            # 旧形式の項目は残っているため、再実行すれば続きから移行できる
+            failed += 1
+            print(f"{pk}: migration failed, legacy items kept: {e}")
+            continue
+        migrated += len(items)
+        print(f"{pk}: {len(items)} legacy point(s) -> {total} point(s) in chunks")
+
+    print(f"Migrated {migrated} path point(s) of {len(legacy) - failed} postcard(s)")
+    if failed:
+        print(f"{failed} postcard(s) failed; run the script again to retry them")
+        sys.exit(1)
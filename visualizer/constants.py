@@ -2,3 +2,5 @@
 
 CITY_VISITOR_CSV = "data/city202507.csv"
 CITIES_LOCATION_CSV = "data/cities_location.csv"
+# 結合済みの市区町村データのバイナリキャッシュ（CSV が更新されると作り直す）
+CITIES_CACHE_FILE = "data/cities_cache.bin"
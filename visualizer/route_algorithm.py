@@ -5,23 +5,115 @@
 Logi-Postの絵葉書移動ルート生成アルゴリズム
 """
 
+import argparse
+import contextlib
 import csv
 import codecs
+import hashlib
+import io
+import json
 import math
-import random
+import mmap
+import struct
 import webbrowser
 import http.server
 import socketserver
 import threading
 import os
+import sys
+from bisect import bisect_left, bisect_right, insort
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from constants import CITY_VISITOR_CSV, CITIES_LOCATION_CSV, CITIES_CACHE_FILE
+
+# キャッシュファイルの形式。レイアウトを変えたら上げる
+CACHE_MAGIC = b"PCCITIES"
+CACHE_VERSION = 1
+CACHE_ALIGNMENT = 8
+
+# モンテカルロ集計のルート長（km）のヒストグラム。最後の階級は上限以上をまとめる
+ROUTE_LENGTH_BIN_KM = 50
+ROUTE_LENGTH_BINS = 200
+# 1つのタスクで生成するルート数（集計結果はタスクごとに親プロセスへ返す）
+SIMULATION_CHUNK_SIZE = 10000
+
+
+class TargetIndex:
+    """
+    目的地までの距離順に並べた市区町村の索引
+
+    「現在地より目的地に近い市区町村」は距離順に並べた先頭からの範囲に
+    なる。来訪者数の累積和と合わせて持つことで、候補の範囲も重み付きの
+    選択も二分探索で求められ、市区町村数に比例する処理が無くなる。
+    位置はすべて距離順の添字で扱う。
+    """
+
+    def __init__(self, distances, weights):
+        self.order = np.argsort(distances, kind="stable")
+        # 市区町村の添字 → 距離順の位置
+        rank = np.empty_like(self.order)
+        rank[self.order] = np.arange(self.order.size)
+        self.rank = rank.tolist()
+        # 1回の探索で扱う要素が少ないため、numpy より bisect とリストの方が速い
+        self.sorted_distances = distances[self.order].tolist()
+        self.weights = weights[self.order].tolist()
+        self.cumulative = np.cumsum(weights[self.order]).tolist()
+
+    def sample(self, position, visited, rng):
+        """
+        position より目的地に近い位置から、visited を除いて重み付きで1つ選ぶ
 
-from constants import CITY_VISITOR_CSV, CITIES_LOCATION_CSV
+        Args:
+            position (int): 現在地の位置
+            visited (list): 除外する位置（昇順）
+            rng (numpy.random.Generator): 乱数生成器
+
+        Returns:
+            int: 選んだ位置（候補が無ければ None）
+        """
+        # 候補は現在地より距離が短い先頭 count 件
+        count = bisect_left(self.sorted_distances, self.sorted_distances[position])
+        excluded = visited[: bisect_left(visited, count)]
+        if count == len(excluded):
+            return None
+
+        total_weight = self.cumulative[count - 1] - sum(
+            self.weights[p] for p in excluded
+        )
+        if total_weight == 0:
+            # 重みがない場合は均等に選択：除外した位置を飛ばして数える
+            selected = int(rng.integers(count - len(excluded)))
+            for p in excluded:
+                if p <= selected:
+                    selected += 1
+            return selected
+
+        # 除外した位置の区間 [累積和の始点, 終点) を飛ばすように値をずらし、
+        # 累積和が値を超える最初の位置を選ぶ（重み 0 の位置は選ばれない）
+        value = rng.random() * total_weight
+        for p in excluded:
+            if (self.cumulative[p - 1] if p else 0) <= value:
+                value += self.weights[p]
+        return min(bisect_right(self.cumulative, value, 0, count), count - 1)
 
 
 class RouteGenerator:
-    def __init__(self):
+    def __init__(self, seed=None):
+        """
+        Args:
+            seed (int, optional): 経由地の選択に使う乱数のシード（再現性のため）
+        """
         self.cities_data = []
-        self.load_data()
+        self.rng = np.random.default_rng(seed)
+        # CSV が前回から変わっていなければ、結合済みのキャッシュを読む
+        if not self.load_cache():
+            self.load_data()
+            self.build_columns()
+            if self.cities_data:
+                self.save_cache()
+        self.build_indexes()
 
     def load_data(self):
         """CSVファイルからデータを読み込み、結合処理を行う"""
@@ -118,6 +210,211 @@ class RouteGenerator:
 
         print(f"データ読み込み完了: {len(self.cities_data)}件の市区町村データ")
 
+    def build_columns(self):
+        """cities_data から列形式の配列を作成する（添字は cities_data と同じ）"""
+        self.city_names = [city["city_name"] for city in self.cities_data]
+        self.pref_names = list(
+            dict.fromkeys(city["pref_name"] for city in self.cities_data)
+        )
+        pref_ids = {name: i for i, name in enumerate(self.pref_names)}
+
+        self.lats = np.array(
+            [city["lat"] for city in self.cities_data], dtype=np.float64
+        )
+        self.lons = np.array(
+            [city["lon"] for city in self.cities_data], dtype=np.float64
+        )
+        self.visitor_counts = np.array(
+            [city["visitor_count"] for city in self.cities_data], dtype=np.int64
+        )
+        self.pref_ids = np.array(
+            [pref_ids[city["pref_name"]] for city in self.cities_data],
+            dtype=np.int32,
+        )
+
+    def source_hashes(self):
+        """キャッシュの元になる CSV ファイルの SHA-256"""
+        hashes = {}
+        for path in (CITY_VISITOR_CSV, CITIES_LOCATION_CSV):
+            with open(path, "rb") as f:
+                hashes[os.path.basename(path)] = hashlib.sha256(f.read()).hexdigest()
+        return hashes
+
+    def save_cache(self):
+        """
+        列形式の配列と文字列表をキャッシュファイルに書き出す
+
+        形式: マジック (8 バイト)、ヘッダー長 (uint32 LE)、JSON ヘッダー
+        （バージョン・CSV のハッシュ・各配列の dtype / 要素数 / 位置）、
+        8 バイト境界に揃えた各配列の生データ。文字列は UTF-8 を連結した
+        バイト列と、各文字列の開始位置の配列で持つ。
+        """
+        arrays = {
+            "lat": self.lats,
+            "lon": self.lons,
+            "visitor_count": self.visitor_counts,
+            "pref_id": self.pref_ids,
+        }
+        for name, strings in (
+            ("city_name", self.city_names),
+            ("pref_name", self.pref_names),
+        ):
+            encoded = [string.encode("utf-8") for string in strings]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+            arrays[f"{name}_offsets"] = offsets
+            arrays[f"{name}_bytes"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            layout[name] = {
+                "dtype": array.dtype.str,
+                "count": int(array.size),
+                "offset": offset,
+            }
+            offset += -(-array.nbytes // CACHE_ALIGNMENT) * CACHE_ALIGNMENT
+
+        header = json.dumps(
+            {
+                "version": CACHE_VERSION,
+                "sources": self.source_hashes(),
+                "arrays": layout,
+            }
+        ).encode("utf-8")
+        # 配列の開始位置を 8 バイト境界に揃える
+        prefix_size = len(CACHE_MAGIC) + 4 + len(header)
+        header += b" " * (-prefix_size % CACHE_ALIGNMENT)
+
+        temp_path = CITIES_CACHE_FILE + ".tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(CACHE_MAGIC)
+                f.write(struct.pack("<I", len(header)))
+                f.write(header)
+                for name, array in arrays.items():
+                    data = np.ascontiguousarray(array).tobytes()
+                    f.write(data)
+                    f.write(b"\0" * (-len(data) % CACHE_ALIGNMENT))
+            # 書き込み途中のファイルを他のプロセスが読まないよう、置き換えは最後に行う
+            os.replace(temp_path, CITIES_CACHE_FILE)
+        except OSError as e:
+            print(f"キャッシュの書き込みエラー: {e}")
+
+    def load_cache(self):
+        """
+        キャッシュファイルから列形式の配列と cities_data を復元する
+
+        数値の配列はファイルをメモリマップしたまま参照する。形式の
+        バージョンや CSV のハッシュが一致しない場合は読み込まない。
+
+        Returns:
+            bool: キャッシュを読み込めた場合 True
+        """
+        try:
+            with open(CITIES_CACHE_FILE, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+
+        try:
+            if mapped[: len(CACHE_MAGIC)] != CACHE_MAGIC:
+                return False
+            (header_size,) = struct.unpack_from("<I", mapped, len(CACHE_MAGIC))
+            data_start = len(CACHE_MAGIC) + 4 + header_size
+            header = json.loads(mapped[len(CACHE_MAGIC) + 4 : data_start])
+            if (
+                header["version"] != CACHE_VERSION
+                or header["sources"] != self.source_hashes()
+            ):
+                return False
+
+            arrays = {
+                name: np.frombuffer(
+                    mapped,
+                    dtype=np.dtype(entry["dtype"]),
+                    count=entry["count"],
+                    offset=data_start + entry["offset"],
+                )
+                for name, entry in header["arrays"].items()
+            }
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            print(f"キャッシュの読み込みエラー: {e}")
+            return False
+
+        def strings(name):
+            offsets = arrays[f"{name}_offsets"].tolist()
+            data = arrays[f"{name}_bytes"].tobytes()
+            return [
+                data[start:end].decode("utf-8")
+                for start, end in zip(offsets[:-1], offsets[1:])
+            ]
+
+        self.lats = arrays["lat"]
+        self.lons = arrays["lon"]
+        self.visitor_counts = arrays["visitor_count"]
+        self.pref_ids = arrays["pref_id"]
+        self.city_names = strings("city_name")
+        self.pref_names = strings("pref_name")
+
+        pref_names = [self.pref_names[i] for i in self.pref_ids.tolist()]
+        self.cities_data = [
+            {
+                "pref_name": pref_name,
+                "city_name": city_name,
+                "lat": lat,
+                "lon": lon,
+                "visitor_count": visitor_count,
+            }
+            for pref_name, city_name, lat, lon, visitor_count in zip(
+                pref_names,
+                self.city_names,
+                self.lats.tolist(),
+                self.lons.tolist(),
+                self.visitor_counts.tolist(),
+            )
+        ]
+        print(f"キャッシュからデータを読み込みました: {len(self.cities_data)}件")
+        return True
+
+    def build_indexes(self):
+        """列形式の配列から都道府県などの索引を作成する
+
+        ルート生成の各処理は cities_data を走査せず、列形式の配列
+        （添字は cities_data と同じ）とここで作った索引を参照する。
+        """
+        # 同名の市区町村（府中市など）は同じ ID。訪問済みの判定は名前単位で行う
+        unique_names, name_ids = np.unique(self.city_names, return_inverse=True)
+        self.name_ids = name_ids.astype(np.int32).reshape(-1)
+        # 名前 ID → その名前の市区町村の添字
+        self.name_members = [[] for _ in range(len(unique_names))]
+        for index, name_id in enumerate(self.name_ids.tolist()):
+            self.name_members[name_id].append(index)
+
+        # 都道府県名 → 市区町村の添字
+        self.pref_cities = {
+            name: np.flatnonzero(self.pref_ids == i)
+            for i, name in enumerate(self.pref_names)
+        }
+
+        # 都道府県名 → 代表市区町村の添字（来訪者数が最も多いもの。同数なら先に現れたもの）
+        self.pref_centers = {
+            name: int(indexes[np.argmax(self.visitor_counts[indexes])])
+            for name, indexes in self.pref_cities.items()
+        }
+
+        # 目的地（代表市区町村の添字）→ TargetIndex。目的地は最大47件のため全て保持する
+        self.target_indexes = {}
+
+    def get_target_index(self, end_index):
+        """目的地までの距離順の索引を取得（初回に作成）"""
+        index = self.target_indexes.get(end_index)
+        if index is None:
+            distances = self.get_distances(self.lats[end_index], self.lons[end_index])
+            index = TargetIndex(distances, self.visitor_counts)
+            self.target_indexes[end_index] = index
+        return index
+
     def get_distance(self, lat1, lon1, lat2, lon2):
         """2点間の距離を計算（ハバーサイン公式）"""
         R = 6371  # 地球の半径（km）
@@ -140,20 +437,41 @@ class RouteGenerator:
 
         return R * c
 
-    def get_prefecture_center(self, pref_name):
-        """都道府県の代表市区町村（県庁所在地など）を取得"""
-        pref_cities = [
-            city for city in self.cities_data if city["pref_name"] == pref_name
-        ]
+    def get_distances(self, lat, lon):
+        """指定地点から全市区町村までの距離を計算（ハバーサイン公式、km）"""
+        R = 6371  # 地球の半径（km）
 
-        if not pref_cities:
-            return None
+        lat_rad = np.radians(lat)
+        lats_rad = np.radians(self.lats)
+        dlat = lats_rad - lat_rad
+        dlon = np.radians(self.lons - lon)
 
-        # 来訪者数が最も多い市区町村を選択（県庁所在地の代理）
-        representative_city = max(pref_cities, key=lambda x: x["visitor_count"])
-        return representative_city
+        a = (
+            np.sin(dlat / 2) ** 2
+            + np.cos(lat_rad) * np.cos(lats_rad) * np.sin(dlon / 2) ** 2
+        )
+        return 2 * R * np.arcsin(np.sqrt(a))
 
-    def generate_route(self, start_pref, end_pref, num_stops):
+    def get_prefecture_center(self, pref_name):
+        """都道府県の代表市区町村（県庁所在地など）を取得"""
+        # 来訪者数が最も多い市区町村（県庁所在地の代理）を索引から引く
+        index = self.pref_centers.get(pref_name)
+        if index is None:
+            return None
+        return self.cities_data[index]
+
+    def _route_stop(self, index):
+        """市区町村の添字をルートの経由地オブジェクトに変換する"""
+        city = self.cities_data[index]
+        return {
+            "name": city["city_name"],
+            "lat": city["lat"],
+            "lon": city["lon"],
+            "pref_name": city["pref_name"],
+            "visitor_count": city["visitor_count"],
+        }
+
+    def generate_route(self, start_pref, end_pref, num_stops, rng=None):
         """
         ルート生成メインアルゴリズム
 
@@ -161,106 +479,280 @@ class RouteGenerator:
             start_pref (str): 出発地の都道府県名
             end_pref (str): 目的地の都道府県名
             num_stops (int): 経由地の数
+            rng (numpy.random.Generator, optional): 乱数生成器（省略時は self.rng）
 
         Returns:
             list: 経由する市区町村オブジェクトのリスト
         """
-        route = []
-
         # 1. 初期化：出発地の県庁所在地を取得
-        start_city = self.get_prefecture_center(start_pref)
-        if not start_city:
+        start_index = self.pref_centers.get(start_pref)
+        if start_index is None:
             raise ValueError(f"出発地 '{start_pref}' のデータが見つかりません")
 
-        route.append(
-            {
-                "name": start_city["city_name"],
-                "lat": start_city["lat"],
-                "lon": start_city["lon"],
-                "pref_name": start_city["pref_name"],
-                "visitor_count": start_city["visitor_count"],
-            }
+        # 目的地の県庁所在地を取得
+        end_index = self.pref_centers.get(end_pref)
+        if end_index is None:
+            raise ValueError(f"目的地 '{end_pref}' のデータが見つかりません")
+
+        # 2. 経由地決定
+        stops = self.select_stops(
+            start_index, end_index, num_stops, self.rng if rng is None else rng
         )
+        if len(stops) < num_stops:
+            print(
+                f"経由地 {len(stops) + 1} の候補が見つかりません。ループを終了します。"
+            )
 
-        current_location = start_city
+        # 3. 完了：出発地・経由地・目的地の順に並べる
+        return [self._route_stop(index) for index in [start_index, *stops, end_index]]
 
-        # 目的地の中心緯度経度を計算
-        end_city = self.get_prefecture_center(end_pref)
-        if not end_city:
-            raise ValueError(f"目的地 '{end_pref}' のデータが見つかりません")
+    def select_stops(self, start_index, end_index, num_stops, rng):
+        """
+        経由地を選ぶ（市区町村の添字で扱う）
 
-        target_lat = end_city["lat"]
-        target_lon = end_city["lon"]
+        目的地により近づく、まだ訪れていない市区町村の中から、来訪者数を
+        重みとしてランダムに選ぶことを num_stops 回繰り返す。候補が無く
+        なった時点で打ち切る。
 
-        # 2. 経由地決定ループ
-        for i in range(num_stops):
-            # 現在地から目的地までの距離を計算
-            current_to_target_distance = self.get_distance(
-                current_location["lat"], current_location["lon"], target_lat, target_lon
-            )
+        Args:
+            start_index (int): 出発地の添字
+            end_index (int): 目的地の添字
+            num_stops (int): 経由地の数
+            rng (numpy.random.Generator): 乱数生成器
 
-            # 候補の絞り込み：目的地により近くなる市区町村のみを選択
-            candidates = []
-            for city in self.cities_data:
-                # 既にルートに含まれている場合はスキップ
-                if any(r["name"] == city["city_name"] for r in route):
-                    continue
+        Returns:
+            list: 経由地の添字（出発地・目的地は含まない）
+        """
+        index = self.get_target_index(end_index)
+        name_ids = self.name_ids
+        rank = index.rank
+
+        # 訪問済みの位置（同名の市区町村を含む、昇順）
+        visited = sorted(rank[i] for i in self.name_members[name_ids[start_index]])
+        position = rank[start_index]
+
+        stops = []
+        for _ in range(num_stops):
+            # 目的地により近くなり、まだルートに無い市区町村から来訪者数の重みで選ぶ
+            position = index.sample(position, visited, rng)
+            if position is None:
+                break
 
-                # 候補地から目的地までの距離を計算
-                candidate_to_target_distance = self.get_distance(
-                    city["lat"], city["lon"], target_lat, target_lon
-                )
+            selected = int(index.order[position])
+            stops.append(selected)
+            for i in self.name_members[name_ids[selected]]:
+                insort(visited, rank[i])
 
-                # 目的地に近くなる場合のみ候補に追加
-                if candidate_to_target_distance < current_to_target_distance:
-                    candidates.append(city)
+        return stops
 
-            if not candidates:
-                print(f"経由地 {i+1} の候補が見つかりません。ループを終了します。")
-                break
+    def get_path_lengths(self, paths):
+        """
+        添字の2次元配列で表したルート（1行1ルート）の総距離を計算（km）
 
-            # 確率的選択：来訪者数を重みとしてランダム選択
-            total_weight = sum(city["visitor_count"] for city in candidates)
-            if total_weight == 0:
-                # 重みがない場合は均等に選択
-                selected_city = random.choice(candidates)
-            else:
-                # 重み付きランダム選択
-                rand_value = random.uniform(0, total_weight)
-                cumulative_weight = 0
-                selected_city = candidates[-1]  # フォールバック
-
-                for city in candidates:
-                    cumulative_weight += city["visitor_count"]
-                    if rand_value <= cumulative_weight:
-                        selected_city = city
-                        break
-
-            # ルートに追加
-            route.append(
+        同じ市区町村が続く区間の距離は 0 なので、経由地の少ないルートは
+        目的地の添字で埋めて同じ列数にそろえられる。
+        """
+        R = 6371  # 地球の半径（km）
+
+        lats = np.radians(self.lats[paths])
+        dlat = np.diff(lats, axis=1)
+        dlon = np.diff(np.radians(self.lons[paths]), axis=1)
+
+        a = (
+            np.sin(dlat / 2) ** 2
+            + np.cos(lats[:, :-1]) * np.cos(lats[:, 1:]) * np.sin(dlon / 2) ** 2
+        )
+        return (2 * R * np.arcsin(np.sqrt(a))).sum(axis=1)
+
+
+class RouteStats:
+    """
+    出発地・目的地の組ごとのルート生成結果の集計
+
+    ルートそのものは保持せず、経由地として選ばれた回数、経由地数の分布、
+    ルート長（km）のヒストグラムと合計だけを持つ。タスクごとの集計は
+    merge で足し合わせられる。
+    """
+
+    def __init__(self, num_cities, num_stops):
+        self.routes = 0
+        # 市区町村の添字ごとの、経由地として選ばれた回数
+        self.visit_counts = np.zeros(num_cities, dtype=np.int64)
+        # 実際の経由地数（0 〜 num_stops）ごとのルート数
+        self.stop_counts = np.zeros(num_stops + 1, dtype=np.int64)
+        self.length_counts = np.zeros(ROUTE_LENGTH_BINS, dtype=np.int64)
+        self.length_sum = 0.0
+        self.length_square_sum = 0.0
+        self.length_min = math.inf
+        self.length_max = 0.0
+
+    def add(self, paths, stop_counts, lengths):
+        """
+        ルートをまとめて集計に加える
+
+        Args:
+            paths (numpy.ndarray): 出発地・経由地・目的地の添字（1行1ルート）
+            stop_counts (numpy.ndarray): ルートごとの経由地数
+            lengths (numpy.ndarray): ルートごとの総距離（km）
+        """
+        if len(lengths) == 0:
+            return
+        self.routes += len(lengths)
+        # 経由地は各行の 1 〜 経由地数 列目
+        is_stop = np.arange(paths.shape[1] - 2) < stop_counts[:, None]
+        self.visit_counts += np.bincount(
+            paths[:, 1:-1][is_stop], minlength=self.visit_counts.size
+        )
+        self.stop_counts += np.bincount(stop_counts, minlength=self.stop_counts.size)
+        bins = np.minimum(lengths // ROUTE_LENGTH_BIN_KM, ROUTE_LENGTH_BINS - 1)
+        self.length_counts += np.bincount(
+            bins.astype(np.int64), minlength=ROUTE_LENGTH_BINS
+        )
+        self.length_sum += float(lengths.sum())
+        self.length_square_sum += float(np.square(lengths).sum())
+        self.length_min = min(self.length_min, float(lengths.min()))
+        self.length_max = max(self.length_max, float(lengths.max()))
+
+    def merge(self, other):
+        """他の集計を足し合わせる"""
+        self.routes += other.routes
+        self.visit_counts += other.visit_counts
+        self.stop_counts += other.stop_counts
+        self.length_counts += other.length_counts
+        self.length_sum += other.length_sum
+        self.length_square_sum += other.length_square_sum
+        self.length_min = min(self.length_min, other.length_min)
+        self.length_max = max(self.length_max, other.length_max)
+        return self
+
+    def length_quantile(self, q):
+        """ヒストグラムから求めたルート長の分位点（階級の上端、km）"""
+        if self.routes == 0:
+            return None
+        position = np.searchsorted(np.cumsum(self.length_counts), q * self.routes)
+        return float(min(position + 1, ROUTE_LENGTH_BINS) * ROUTE_LENGTH_BIN_KM)
+
+    def summary(self, city_names, top=10):
+        """集計の要約（平均・標準偏差・分位点と、よく選ばれた経由地）"""
+        if self.routes == 0:
+            return {"routes": 0}
+        mean = self.length_sum / self.routes
+        variance = max(self.length_square_sum / self.routes - mean**2, 0.0)
+        most_visited = np.argsort(-self.visit_counts, kind="stable")[:top]
+        return {
+            "routes": self.routes,
+            "mean_stops": float(
+                np.dot(np.arange(self.stop_counts.size), self.stop_counts) / self.routes
+            ),
+            "length_km": {
+                "mean": mean,
+                "std": math.sqrt(variance),
+                "min": self.length_min,
+                "p50": self.length_quantile(0.5),
+                "p90": self.length_quantile(0.9),
+                "max": self.length_max,
+            },
+            "most_visited": [
                 {
-                    "name": selected_city["city_name"],
-                    "lat": selected_city["lat"],
-                    "lon": selected_city["lon"],
-                    "pref_name": selected_city["pref_name"],
-                    "visitor_count": selected_city["visitor_count"],
+                    "city_name": city_names[i],
+                    "share": int(self.visit_counts[i]) / self.routes,
                 }
-            )
+                for i in most_visited
+                if self.visit_counts[i] > 0
+            ],
+        }
+
+
+# ワーカープロセスごとの RouteGenerator（_init_simulation_worker で作成）
+_worker_generator = None
+
+
+def _init_simulation_worker():
+    global _worker_generator
+    # 各ワーカーの読み込みログは出さない（キャッシュは親プロセスで作成済み）
+    with contextlib.redirect_stdout(io.StringIO()):
+        _worker_generator = RouteGenerator()
+
+
+def _simulate_chunk(start_pref, end_pref, num_routes, num_stops, seed_sequence):
+    """1タスク分のルートを生成して集計する（ワーカープロセスで実行）"""
+    generator = _worker_generator
+    rng = np.random.default_rng(seed_sequence)
+    start_index = generator.pref_centers[start_pref]
+    end_index = generator.pref_centers[end_pref]
+
+    # 経由地が num_stops に満たないルートは目的地の添字で埋める
+    paths = np.full((num_routes, num_stops + 2), end_index, dtype=np.int64)
+    paths[:, 0] = start_index
+    stop_counts = np.zeros(num_routes, dtype=np.int64)
+    for row in range(num_routes):
+        stops = generator.select_stops(start_index, end_index, num_stops, rng)
+        paths[row, 1 : len(stops) + 1] = stops
+        stop_counts[row] = len(stops)
+
+    stats = RouteStats(len(generator.city_names), num_stops)
+    stats.add(paths, stop_counts, generator.get_path_lengths(paths))
+    return stats
+
+
+def simulate_routes(
+    od_pairs,
+    routes_per_pair,
+    num_stops,
+    seed=0,
+    workers=None,
+    chunk_size=SIMULATION_CHUNK_SIZE,
+):
+    """
+    出発地・目的地の組ごとにルートを大量に生成し、集計を逐次返す
+
+    ルートは chunk_size 本ずつのタスクに分けてプロセスプールで生成する。
+    各タスクの乱数は (seed, 組の番号, タスクの番号) から決まるため、
+    ワーカー数や完了順によらず全体の集計は同じになる。タスクの集計は
+    完了した順に返すので、呼び出し側で RouteStats.merge して使う。
+
+    Args:
+        od_pairs (list): (出発地の都道府県名, 目的地の都道府県名) のリスト
+        routes_per_pair (int): 組ごとのルート数
+        num_stops (int): 経由地の数
+        seed (int): 乱数のシード
+        workers (int, optional): ワーカープロセス数（省略時は CPU 数、1 なら同じプロセスで実行）
+        chunk_size (int): 1タスクで生成するルート数
+
+    Yields:
+        tuple: (出発地, 目的地, そのタスクの RouteStats)
+    """
+    global _worker_generator
+    # 不正な都道府県名はワーカーに渡す前に検出し、キャッシュもここで作っておく
+    generator = RouteGenerator()
+    for start_pref, end_pref in od_pairs:
+        if start_pref not in generator.pref_centers:
+            raise ValueError(f"出発地 '{start_pref}' のデータが見つかりません")
+        if end_pref not in generator.pref_centers:
+            raise ValueError(f"目的地 '{end_pref}' のデータが見つかりません")
 
-            current_location = selected_city
+    tasks = []
+    for pair_number, (start_pref, end_pref) in enumerate(od_pairs):
+        for chunk_number, first in enumerate(range(0, routes_per_pair, chunk_size)):
+            seed_sequence = np.random.SeedSequence(
+                seed, spawn_key=(pair_number, chunk_number)
+            )
+            num_routes = min(chunk_size, routes_per_pair - first)
+            tasks.append((start_pref, end_pref, num_routes, num_stops, seed_sequence))
 
-        # 3. 完了：目的地の県庁所在地を追加
-        route.append(
-            {
-                "name": end_city["city_name"],
-                "lat": end_city["lat"],
-                "lon": end_city["lon"],
-                "pref_name": end_city["pref_name"],
-                "visitor_count": end_city["visitor_count"],
-            }
-        )
+    if workers == 1:
+        _worker_generator = generator
+        for task in tasks:
+            yield task[0], task[1], _simulate_chunk(*task)
+        return
 
-        return route
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_simulation_worker
+    ) as executor:
+        futures = {executor.submit(_simulate_chunk, *task): task for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            yield task[0], task[1], future.result()
 
 
 def start_server():
@@ -324,5 +816,40 @@ def main():
     start_server()
 
 
+def simulate_main(argv):
+    """コマンドライン：ルートのモンテカルロ集計を実行して要約を表示"""
+    parser = argparse.ArgumentParser(
+        prog="route_algorithm.py simulate",
+        description="出発地・目的地の組ごとにルートを生成し、分布を集計する",
+    )
+    parser.add_argument("pairs", nargs="+", help="出発地:目的地（例: 北海道:沖縄県）")
+    parser.add_argument("--routes", type=int, default=100000, help="組ごとのルート数")
+    parser.add_argument("--stops", type=int, default=5, help="経由地の数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数のシード")
+    parser.add_argument("--workers", type=int, default=None, help="ワーカー数")
+    args = parser.parse_args(argv)
+
+    od_pairs = [tuple(pair.split(":", 1)) for pair in args.pairs]
+    totals = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        city_names = RouteGenerator().city_names
+    for start_pref, end_pref, stats in simulate_routes(
+        od_pairs, args.routes, args.stops, seed=args.seed, workers=args.workers
+    ):
+        key = (start_pref, end_pref)
+        if key in totals:
+            totals[key].merge(stats)
+        else:
+            totals[key] = stats
+        print(f"{start_pref} → {end_pref}: {totals[key].routes}/{args.routes}件")
+
+    for (start_pref, end_pref), stats in totals.items():
+        print(f"\n=== {start_pref} → {end_pref} ===")
+        print(json.dumps(stats.summary(city_names), ensure_ascii=False, indent=2))
+
+
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == "simulate":
+        simulate_main(sys.argv[2:])
+    else:
+        main()